@@ -0,0 +1,113 @@
+import functools
+import logging
+
+import pandas as pd
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+# Ce que l'application envoie au navigateur. Les tableaux partent avec des
+# colonnes numériques (Arrow) et un format d'affichage appliqué par le
+# navigateur, plutôt qu'en chaînes pré-formatées ; un tableau identique à celui
+# de la réexécution précédente n'est envoyé que sous forme de référence grâce au
+# cache de messages de Streamlit (seuil global.minCachedMessageSize abaissé
+# dans .streamlit/config.toml). Chaque exécution du script, ou de fragment seul
+# (progression des tâches longues), compte les octets des messages envoyés à la
+# session, par étape, pour suivre le poids des pages sur les connexions lentes.
+# La mesure passe par un attribut privé de Streamlit (ScriptRunContext._enqueue),
+# vérifié sur les versions VERSIONS_MESURE : avec une autre version, ou si
+# l'attribut a disparu, elle est désactivée et un avertissement est journalisé.
+
+CLE_ENVOIS = '_envois_navigateur'
+NB_EXECUTIONS_GARDEES = 200
+# Versions (majeure, mineure) de Streamlit où ScriptRunContext._enqueue a été vérifié
+VERSIONS_MESURE = ((1, 66), (1, 66))
+
+journal = logging.getLogger(__name__)
+
+
+def colonnes_numeriques(decimales):
+    """column_config d'un tableau : {colonne: nombre de décimales affichées}"""
+    return {colonne: st.column_config.NumberColumn(format=f"%.{nb}f") for colonne, nb in decimales.items()}
+
+
+def afficher_tableau(tableau, decimales=None, **options):
+    """st.dataframe avec les colonnes numériques formatées par le navigateur"""
+    options.setdefault('width', 'stretch')
+    st.dataframe(tableau, column_config=colonnes_numeriques(decimales or {}), **options)
+
+
+def _nouvelle_execution(executions, type_execution, etape):
+    execution = {'Étape': etape, 'Exécution': type_execution, 'Octets': 0, 'Messages': 0, 'Références': 0}
+    executions.append(execution)
+    del executions[:-NB_EXECUTIONS_GARDEES]
+    return execution
+
+
+@functools.lru_cache(maxsize=None)
+def _mesure_desactivee(raison):
+    # Un seul avertissement par processus et par raison
+    journal.warning("Mesure des octets envoyés désactivée : %s", raison)
+    return None
+
+
+def _version_streamlit():
+    return tuple(int(partie) for partie in st.__version__.split('.')[:2])
+
+
+def mesurer_envois():
+    """Compte les messages envoyés au navigateur pendant l'exécution en cours du script
+
+    Retourne le dictionnaire des mesures, dont l'appelant renseigne 'Étape' une
+    fois la page connue (None hors de Streamlit, ou si la mesure n'est pas
+    possible avec cette version de Streamlit). Les réexécutions de fragments
+    qui suivent ont chacune leur propre ligne.
+    """
+    ctx = get_script_run_ctx()
+    if ctx is None:
+        return None
+    premiere, derniere = VERSIONS_MESURE
+    if not premiere <= _version_streamlit() <= derniere:
+        return _mesure_desactivee(f"Streamlit {st.__version__} non vérifié "
+                                  f"({'.'.join(map(str, premiere))} à {'.'.join(map(str, derniere))})")
+    if not callable(getattr(ctx, '_enqueue', None)) or not isinstance(getattr(ctx, 'cursors', None), dict):
+        return _mesure_desactivee(f"ScriptRunContext._enqueue absent de Streamlit {st.__version__}")
+    executions = st.session_state.setdefault(CLE_ENVOIS, [])
+    # Chaque exécution (complète ou de fragment) repart d'un nouveau dictionnaire ctx.cursors
+    courante = {'execution': _nouvelle_execution(executions, 'Complète', None), 'marqueur': ctx.cursors}
+
+    # Le contexte peut servir à plusieurs exécutions : on repart de la fonction d'origine
+    envoyer = getattr(ctx._enqueue, '__wrapped__', ctx._enqueue)
+
+    def compter(message):
+        try:
+            if ctx.cursors is not courante['marqueur']:
+                # Fragment réexécuté seul : le script principal ne repasse pas par ici
+                courante['execution'] = _nouvelle_execution(executions, 'Fragment',
+                                                            courante['execution']['Étape'])
+                courante['marqueur'] = ctx.cursors
+            execution = courante['execution']
+            execution['Octets'] += message.ByteSize()
+            execution['Messages'] += 1
+            execution['Références'] += message.HasField('ref_hash')
+        except Exception:
+            # La mesure ne doit jamais empêcher l'envoi
+            pass
+        envoyer(message)
+
+    compter.__wrapped__ = envoyer
+    ctx._enqueue = compter
+    return courante['execution']
+
+
+def tableau_envois():
+    """Octets envoyés par réexécution, par étape et type d'exécution (exécutions terminées de la session)"""
+    executions = pd.DataFrame(st.session_state.get(CLE_ENVOIS, [])[:-1],
+                              columns=['Étape', 'Exécution', 'Octets', 'Messages', 'Références'])
+    par_etape = executions.groupby(['Étape', 'Exécution'])
+    return pd.DataFrame({
+        'Réexécutions': par_etape.size(),
+        'Octets (moyenne)': par_etape['Octets'].mean(),
+        'Octets (max)': par_etape['Octets'].max(),
+        'Octets (dernière)': par_etape['Octets'].last(),
+        'Messages en référence': par_etape['Références'].sum(),
+    })
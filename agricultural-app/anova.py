@@ -0,0 +1,232 @@
+from itertools import combinations
+from math import prod
+
+import numpy as np
+
+# Calculs d'ANOVA vectorisés : les deux (ou trois) derniers axes portent le
+# dispositif, les axes précédents permettent de traiter des lots de jeux de
+# données en un seul appel.
+
+# Valeurs traitées à la fois par anova_brc en précision réduite
+TAILLE_TRANCHE = 2 ** 18
+
+
+def ddl_brc(nb_traitements, nb_blocs, nb_manquantes=0):
+    """Degrés de liberté d'un Bloc Randomisé Complet"""
+    # Chaque parcelle perdue retire un DDL au total et à l'erreur
+    return {
+        'ddl_total': nb_traitements * nb_blocs - 1 - nb_manquantes,
+        'ddl_traitements': nb_traitements - 1,
+        'ddl_blocs': nb_blocs - 1,
+        'ddl_erreur': (nb_traitements - 1) * (nb_blocs - 1) - nb_manquantes,
+    }
+
+
+def carres_moyens(resultats, effets, erreur):
+    # CM = SC / DDL, puis F = CM effet / CM erreur
+    for effet in effets + [erreur]:
+        resultats[f'cm_{effet}'] = resultats[f'sc_{effet}'] / resultats[f'ddl_{effet}']
+    for effet in effets:
+        resultats[f'f_{effet}'] = resultats[f'cm_{effet}'] / resultats[f'cm_{erreur}']
+    return resultats
+
+
+def somme_compensee(x, axis, keepdims=False):
+    """Somme compensée par paires le long des axes donnés
+
+    Les termes sont additionnés moitié contre moitié (log2 n passes, chacune
+    vectorisée sur tout le tableau) ; l'erreur d'arrondi de chaque addition est
+    récupérée exactement (TwoSum de Knuth) puis ajoutée au total : en float32
+    on garde une précision comparable à une somme float64.
+    """
+    axes = tuple(a % x.ndim for a in np.atleast_1d(axis))
+    forme_lot = [n for i, n in enumerate(x.shape) if i not in axes]
+    termes = np.moveaxis(x, axes, range(-len(axes), 0)).reshape(forme_lot + [-1])
+
+    erreur = np.zeros(forme_lot, dtype=x.dtype)
+    while termes.shape[-1] > 1:
+        moitie = termes.shape[-1] // 2
+        a, b = termes[..., :moitie], termes[..., moitie:2 * moitie]
+        total = a + b
+        # (a + b) - total exactement, sans branche sur le plus grand terme
+        b_virtuel = total - a
+        erreur += ((a - (total - b_virtuel)) + (b - b_virtuel)).sum(axis=-1)
+        if termes.shape[-1] % 2:
+            total = np.concatenate([total, termes[..., -1:]], axis=-1)
+        termes = total
+    somme = termes[..., 0] + erreur
+    if keepdims:
+        somme = np.expand_dims(somme, axes)
+    return somme
+
+
+def _sc_brc(y, somme):
+    # SC d'un lot (..., nb_blocs, nb_traitements) avec le sommateur donné
+    nb_blocs, nb_trait = y.shape[-2:]
+    # Deux passes (moyennes puis écarts centrés) : pas de soustraction de
+    # grands nombres voisins comme dans ΣX² - (ΣX)²/n
+    moyenne_generale = somme(y, (-2, -1), keepdims=True) / (nb_blocs * nb_trait)
+    moy_traitements = somme(y, -2, keepdims=True) / nb_blocs
+    moy_blocs = somme(y, -1, keepdims=True) / nb_trait
+    return {
+        'sc_total': somme((y - moyenne_generale) ** 2, (-2, -1)),
+        'sc_traitements': nb_blocs * somme((moy_traitements - moyenne_generale) ** 2, (-2, -1)),
+        'sc_blocs': nb_trait * somme((moy_blocs - moyenne_generale) ** 2, (-2, -1)),
+        # Résidus calculés directement : la différence SC totale - SC traitements -
+        # SC blocs perd tous ses chiffres quand l'erreur est petite devant les effets
+        'sc_erreur': somme((y - moy_traitements - moy_blocs + moyenne_generale) ** 2, (-2, -1)),
+    }
+
+
+def _somme_numpy(x, axis, keepdims=False):
+    # float64 : somme NumPy (par paires)
+    return x.sum(axis=axis, keepdims=keepdims)
+
+
+def anova_brc(valeurs, dtype=np.float64):
+    """ANOVA d'un BRC, valeurs de forme (..., nb_blocs, nb_traitements)
+
+    dtype=np.float32 divise par deux la mémoire des lots volumineux : le lot
+    est traité par tranches de TAILLE_TRANCHE valeurs, si bien qu'au-delà des
+    valeurs elles-mêmes le calcul n'alloue que les temporaires d'une tranche
+    (quelques Mo) et les tableaux de résultats. Les sommes sont compensées
+    pour rester proches du calcul en float64.
+    """
+    y = np.asarray(valeurs, dtype=dtype)
+    nb_blocs, nb_trait = y.shape[-2:]
+    resultats = ddl_brc(nb_trait, nb_blocs)
+    if np.dtype(dtype) == np.float64:
+        resultats.update(_sc_brc(y, _somme_numpy))
+        return carres_moyens(resultats, ['traitements', 'blocs'], 'erreur')
+
+    lots = y.reshape(-1, nb_blocs, nb_trait)
+    par_tranche = max(1, TAILLE_TRANCHE // (nb_blocs * nb_trait))
+    tranches = []
+    for debut in range(0, len(lots), par_tranche):
+        tranche = lots[debut:debut + par_tranche]
+        # Décalage par la première observation : les SC sont invariantes et les
+        # écarts, proches de zéro, gardent tous leurs chiffres significatifs
+        tranches.append(_sc_brc(tranche - tranche[:, :1, :1], somme_compensee))
+    for cle in tranches[0]:
+        resultats[cle] = np.concatenate([sc[cle] for sc in tranches]).reshape(y.shape[:-2])[()]
+    return carres_moyens(resultats, ['traitements', 'blocs'], 'erreur')
+
+
+def anova_carre_latin(valeurs, plan):
+    """ANOVA d'un Carré Latin, valeurs (..., n, n) et plan des traitements (n, n)"""
+    y = np.asarray(valeurs, dtype=float)
+    n = y.shape[-1]
+    # Indicatrices des traitements : (n, n, n) pour sommer chaque traitement
+    indicatrices = (np.asarray(plan)[..., None] == np.arange(n)).astype(float)
+
+    moyenne_generale = y.mean(axis=(-2, -1), keepdims=True)
+    moy_lignes = y.mean(axis=-1, keepdims=True)
+    moy_colonnes = y.mean(axis=-2, keepdims=True)
+    moy_traitements = np.einsum('...ij,...ijk->...k', y, indicatrices) / n
+
+    resultats = {
+        'ddl_total': n * n - 1,
+        'ddl_lignes': n - 1,
+        'ddl_colonnes': n - 1,
+        'ddl_traitements': n - 1,
+        'ddl_erreur': (n - 1) * (n - 2),
+    }
+    resultats['sc_total'] = ((y - moyenne_generale) ** 2).sum(axis=(-2, -1))
+    resultats['sc_lignes'] = n * ((moy_lignes - moyenne_generale) ** 2).sum(axis=(-2, -1))
+    resultats['sc_colonnes'] = n * ((moy_colonnes - moyenne_generale) ** 2).sum(axis=(-2, -1))
+    resultats['sc_traitements'] = n * ((moy_traitements - moyenne_generale[..., 0]) ** 2).sum(axis=-1)
+    # Résidus directs (voir anova_brc) ; moyenne du traitement de chaque case du plan
+    moy_traitements_cases = np.take(moy_traitements, np.asarray(plan), axis=-1)
+    resultats['sc_erreur'] = ((y - moy_lignes - moy_colonnes - moy_traitements_cases + 2 * moyenne_generale) ** 2
+                              ).sum(axis=(-2, -1))
+    return carres_moyens(resultats, ['traitements', 'lignes', 'colonnes'], 'erreur')
+
+
+def anova_split_plot(valeurs):
+    """ANOVA d'un Split-plot, valeurs (..., nb_blocs, niveaux A, niveaux B)"""
+    y = np.asarray(valeurs, dtype=float)
+    r, a, b = y.shape[-3:]
+    axes = (-3, -2, -1)
+
+    m = y.mean(axis=axes, keepdims=True)
+    m_r = y.mean(axis=(-2, -1), keepdims=True)
+    m_a = y.mean(axis=(-3, -1), keepdims=True)
+    m_b = y.mean(axis=(-3, -2), keepdims=True)
+    m_ra = y.mean(axis=-1, keepdims=True)
+    m_ab = y.mean(axis=-3, keepdims=True)
+
+    resultats = {
+        'ddl_total': r * a * b - 1,
+        'ddl_blocs': r - 1,
+        'ddl_a': a - 1,
+        'ddl_erreur_a': (r - 1) * (a - 1),
+        'ddl_b': b - 1,
+        'ddl_ab': (a - 1) * (b - 1),
+        'ddl_erreur_b': a * (r - 1) * (b - 1),
+    }
+    resultats['sc_total'] = ((y - m) ** 2).sum(axis=axes)
+    resultats['sc_blocs'] = a * b * ((m_r - m) ** 2).sum(axis=axes)
+    resultats['sc_a'] = r * b * ((m_a - m) ** 2).sum(axis=axes)
+    resultats['sc_erreur_a'] = b * ((m_ra - m_r - m_a + m) ** 2).sum(axis=axes)
+    resultats['sc_b'] = r * a * ((m_b - m) ** 2).sum(axis=axes)
+    resultats['sc_ab'] = r * ((m_ab - m_a - m_b + m) ** 2).sum(axis=axes)
+    # Résidus directs (voir anova_brc)
+    resultats['sc_erreur_b'] = ((y - m_ra - m_ab + m_a) ** 2).sum(axis=axes)
+
+    # Parcelles principales testées contre l'erreur a, sous-parcelles contre l'erreur b
+    carres_moyens(resultats, ['blocs', 'a'], 'erreur_a')
+    return carres_moyens(resultats, ['b', 'ab'], 'erreur_b')
+
+
+LETTRES_FACTEURS = 'abc'
+
+
+def effets_factoriels(nb_facteurs):
+    """Effets principaux puis interactions : ['a', 'b', 'ab'] pour deux facteurs"""
+    return [''.join(LETTRES_FACTEURS[i] for i in effet)
+            for ordre in range(1, nb_facteurs + 1)
+            for effet in combinations(range(nb_facteurs), ordre)]
+
+
+def anova_factoriel_brc(valeurs, nb_facteurs=2):
+    """ANOVA d'un factoriel en blocs complets, valeurs (..., nb_blocs, niveaux A, niveaux B[, niveaux C])
+
+    La SC des traitements (combinaisons de niveaux) est décomposée en effets
+    principaux et interactions par balayage des axes des facteurs : chaque axe
+    est séparé en sa moyenne et l'écart à cette moyenne, ce qui donne en une
+    passe par facteur tous les termes de la décomposition.
+    """
+    y = np.asarray(valeurs, dtype=float)
+    niveaux = y.shape[-nb_facteurs:]
+    nb_blocs = y.shape[-nb_facteurs - 1]
+    nb_combinaisons = prod(niveaux)
+    axe_blocs = -nb_facteurs - 1
+    axes_facteurs = tuple(range(-nb_facteurs, 0))
+    axes = (axe_blocs,) + axes_facteurs
+
+    moyenne_generale = y.mean(axis=axes, keepdims=True)
+    moy_blocs = y.mean(axis=axes_facteurs, keepdims=True)
+    moy_combinaisons = y.mean(axis=axe_blocs, keepdims=True)
+
+    # termes[(0, 1)] : interaction A×B (axes hors effet réduits à 1)
+    termes = {(): moy_combinaisons}
+    for i, axe in enumerate(axes_facteurs):
+        suivants = {}
+        for effet, x in termes.items():
+            moyenne = x.mean(axis=axe, keepdims=True)
+            suivants[effet] = moyenne
+            suivants[effet + (i,)] = x - moyenne
+        termes = suivants
+
+    resultats = ddl_brc(nb_combinaisons, nb_blocs)
+    resultats['sc_total'] = ((y - moyenne_generale) ** 2).sum(axis=axes)
+    resultats['sc_blocs'] = nb_combinaisons * ((moy_blocs - moyenne_generale) ** 2).sum(axis=axes)
+    resultats['sc_traitements'] = nb_blocs * ((moy_combinaisons - moyenne_generale) ** 2).sum(axis=axes)
+    # Résidus directs (voir anova_brc)
+    resultats['sc_erreur'] = ((y - moy_blocs - moy_combinaisons + moyenne_generale) ** 2).sum(axis=axes)
+    for effet, nom in zip(sorted(termes.keys() - {()}, key=lambda e: (len(e), e)), effets_factoriels(nb_facteurs)):
+        # Chaque terme est répété sur les niveaux des facteurs absents de l'effet
+        repetitions = nb_blocs * nb_combinaisons // prod(niveaux[i] for i in effet)
+        resultats[f'ddl_{nom}'] = prod(niveaux[i] - 1 for i in effet)
+        resultats[f'sc_{nom}'] = repetitions * (termes[effet] ** 2).sum(axis=axes)
+    return carres_moyens(resultats, effets_factoriels(nb_facteurs) + ['traitements', 'blocs'], 'erreur')
@@ -0,0 +1,180 @@
+import os
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from anova import ddl_brc
+from banque_exercices import NB_EXERCICES_PAR_TAILLE
+from etat import ETAPES
+
+# Banc de charge : de nombreuses sessions de l'application, sans navigateur ni
+# réseau, pilotées par l'API de test de Streamlit (AppTest) dans plusieurs
+# processus en parallèle. Chaque session suit le parcours d'un étudiant des
+# étapes 1 à 8 ; chaque réexécution du script est chronométrée.
+#
+#     python banc_charge.py [nb_sessions] [nb_processus]
+
+APPLICATION = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'exp_corrected.py')
+DELAI_MAX = 300
+PERCENTILES = (50, 90, 95, 99)
+
+
+def _memoire_residente():
+    """Mémoire résidente actuelle du processus (octets)"""
+    try:
+        with open('/proc/self/statm') as fichier:
+            return int(fichier.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        # Hors Linux : pic de mémoire, en kilo-octets
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class _Session:
+    """Une session AppTest dont chaque réexécution est chronométrée
+
+    Une action dont le widget est introuvable (libellé changé dans une page)
+    est sautée et notée dans ignorees : le parcours continue et le rapport
+    signale les actions qui n'ont pas été mesurées.
+    """
+
+    def __init__(self):
+        from streamlit.testing.v1 import AppTest
+        self.app = AppTest.from_file(APPLICATION, default_timeout=DELAI_MAX)
+        self.mesures = []
+        self.ignorees = []
+
+    def executer(self, action, element=None):
+        debut = time.perf_counter()
+        (element or self.app).run()
+        self.mesures.append({'action': action, 'latence': time.perf_counter() - debut})
+        if self.app.exception:
+            raise RuntimeError(f"{action} : {self.app.exception[0].value}")
+
+    def etape(self, numero):
+        fichier, _, _ = ETAPES[numero - 1]
+        self.executer(f"étape {numero}", self.app.switch_page(fichier))
+
+    def _widget(self, action, widgets, debut_libelle=None, cle=None):
+        """Widget désigné par sa clé ou le début de son libellé ; None (action ignorée) s'il manque"""
+        widget = next((w for w in widgets if (w.key == cle if cle is not None
+                                              else w.label.startswith(debut_libelle))), None)
+        if widget is None:
+            self.ignorees.append(action)
+        return widget
+
+    def bouton(self, action, debut_libelle):
+        bouton = self._widget(action, self.app.button, debut_libelle)
+        if bouton is not None:
+            self.executer(action, bouton.click())
+
+    def saisir(self, action, valeur, cle=None, libelle=None):
+        champ = self._widget(action, self.app.number_input, libelle, cle)
+        if champ is not None:
+            self.executer(action, champ.set_value(valeur))
+
+    def choisir(self, action, valeur, libelle):
+        radio = self._widget(action, self.app.radio, libelle)
+        if radio is not None:
+            self.executer(action, radio.set_value(valeur))
+
+
+def parcours_etudiant(graine):
+    """Parcours complet d'un étudiant ; retourne les latences, la mémoire retenue,
+    le processus et les actions ignorées"""
+    rng = np.random.default_rng(graine)
+    memoire_avant = _memoire_residente()
+    session = _Session()
+    session.executer("ouverture")
+    session.etape(1)
+    session.bouton("validation dispositif", "✅")
+
+    session.etape(2)
+    nb_traitements, nb_blocs = int(rng.integers(3, 7)), int(rng.integers(3, 6))
+    if rng.random() < 0.5:
+        session.choisir("choix banque", "Exercice de la banque", "Source")
+        session.saisir("numéro exercice", int(rng.integers(NB_EXERCICES_PAR_TAILLE)),
+                       libelle="Numéro de l'exercice")
+    session.saisir("nb traitements", nb_traitements, libelle="Nombre de traitements")
+    session.saisir("nb blocs", nb_blocs, libelle="Nombre de blocs")
+    session.bouton("validation données", "✅ Données")
+
+    session.etape(3)
+    ddl = ddl_brc(nb_traitements, nb_blocs)
+    if rng.random() < 0.3:
+        # Première tentative fausse, puis correction
+        session.saisir("saisie DDL", ddl['ddl_total'] + 1, cle="ddl_total_etudiant")
+        session.bouton("vérification DDL", "🔍")
+    for cle, item in (('ddl_total_etudiant', 'ddl_total'), ('ddl_trait_etudiant', 'ddl_traitements'),
+                      ('ddl_blocs_etudiant', 'ddl_blocs'), ('ddl_erreur_etudiant', 'ddl_erreur')):
+        session.saisir("saisie DDL", ddl[item], cle=cle)
+    session.bouton("vérification DDL", "🔍")
+
+    session.etape(4)
+    etat = session.app.session_state
+    session.etape(5)
+    for cle, effet in (('cm_trait_etudiant', 'traitements'), ('cm_blocs_etudiant', 'blocs'),
+                       ('cm_erreur_etudiant', 'erreur')):
+        session.saisir("saisie CM", etat[f'sc_{effet}'] / ddl[f'ddl_{effet}'], cle=cle)
+    session.bouton("vérification CM", "🔍")
+
+    session.etape(6)
+    for cle, effet in (('f_trait_etudiant', 'traitements'), ('f_blocs_etudiant', 'blocs')):
+        session.saisir("saisie F", etat[f'cm_{effet}'] / etat['cm_erreur'], cle=cle)
+    session.bouton("vérification F", "🔍")
+
+    session.etape(7)
+    # α se choisit dans le graphique (côté navigateur) : pas de réexécution à mesurer
+    session.bouton("comparaison F comprise", "✅ J'ai compris")
+    session.etape(8)
+
+    # La session reste en vie jusqu'ici : la mémoire retenue inclut son état
+    memoire = _memoire_residente() - memoire_avant
+    return session.mesures, memoire, os.getpid(), session.ignorees
+
+
+def lancer(nb_sessions, nb_processus=None):
+    """Lance nb_sessions parcours sur nb_processus processus ; retourne le rapport"""
+    debut = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=nb_processus) as executeur:
+        resultats = list(executeur.map(parcours_etudiant, range(nb_sessions)))
+    duree = time.perf_counter() - debut
+
+    mesures = pd.DataFrame([dict(m, session=i) for i, (liste, _, _, _) in enumerate(resultats) for m in liste])
+    memoires = pd.Series([memoire for _, memoire, _, _ in resultats]) / 2 ** 20
+    latences = mesures.groupby('action', sort=False)['latence']
+    tableau = pd.DataFrame({'réexécutions': latences.size()})
+    for p in PERCENTILES:
+        tableau[f'p{p} (s)'] = latences.quantile(p / 100)
+    tableau['max (s)'] = latences.max()
+    tableau.loc['toutes'] = [len(mesures)] + [mesures['latence'].quantile(p / 100) for p in PERCENTILES] \
+        + [mesures['latence'].max()]
+    tableau['réexécutions'] = tableau['réexécutions'].astype(int)
+
+    resume = {
+        'sessions': nb_sessions,
+        'processus': len({pid for _, _, pid, _ in resultats}),
+        'durée (s)': duree,
+        'réexécutions / s': len(mesures) / duree,
+        'sessions / min': 60 * nb_sessions / duree,
+        'mémoire par session, moyenne (Mo)': memoires.mean(),
+        'mémoire par session, max (Mo)': memoires.max(),
+        'actions ignorées': ', '.join(sorted({a for *_, ignorees in resultats for a in ignorees})) or 'aucune',
+    }
+    return tableau, resume
+
+
+if __name__ == '__main__':
+    nb_sessions = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    nb_processus = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count()
+    # AppTest remplace __main__ dans les processus de travail : les tâches
+    # doivent désigner les fonctions par le nom du module
+    import banc_charge
+    tableau, resume = banc_charge.lancer(nb_sessions, nb_processus)
+    print(tableau.to_string(float_format='%.3f'))
+    print()
+    for nom, valeur in resume.items():
+        print(f"{nom:<36} {valeur:.2f}" if isinstance(valeur, float) else f"{nom:<36} {valeur}")
@@ -0,0 +1,173 @@
+import functools
+import os
+
+import numpy as np
+import pandas as pd
+
+from anova import anova_brc, anova_carre_latin, anova_split_plot
+
+# Banque d'exercices pré-générés : pour chaque dispositif et chaque taille,
+# un lot de jeux de données et toutes les réponses attendues (DDL, SC, CM, F).
+# Le fichier est stocké par colonnes (un tableau par grandeur) et chargé une
+# seule fois par processus ; un exercice est ensuite retrouvé par son identifiant.
+
+CHEMIN_BANQUE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'banque_exercices.npz')
+NB_EXERCICES_PAR_TAILLE = 1000
+GRAINE = 2024
+
+DISPOSITIFS = {
+    'BRC': "Bloc Randomisé Complet (BRC)",
+    'CL': "Carré Latin",
+    'SP': "Dispositif en Split-plot",
+}
+
+# Tailles disponibles : (traitements, blocs) pour le BRC, n pour le Carré Latin,
+# (blocs, niveaux A, niveaux B) pour le Split-plot
+TAILLES = {
+    'BRC': [(t, b) for t in range(3, 7) for b in range(3, 6)],
+    'CL': [(n,) for n in range(4, 7)],
+    'SP': [(r, a, b) for r in range(3, 5) for a in range(2, 4) for b in range(2, 5)],
+}
+
+
+def nom_groupe(code, taille):
+    return f"{code}-{'x'.join(str(d) for d in taille)}"
+
+
+def identifiant_exercice(code, taille, numero):
+    return f"{nom_groupe(code, taille)}-{numero:04d}"
+
+
+def _decoder_identifiant(identifiant):
+    groupe, numero = identifiant.rsplit('-', 1)
+    return groupe, int(numero)
+
+
+def _plans_carre_latin(rng, nb, n):
+    # Plan cyclique (i + j) mod n, puis permutation aléatoire des lignes,
+    # des colonnes et des symboles pour chaque exercice
+    perm_lignes = np.argsort(rng.random((nb, n)), axis=1)
+    perm_colonnes = np.argsort(rng.random((nb, n)), axis=1)
+    perm_symboles = np.argsort(rng.random((nb, n)), axis=1)
+    cyclique = (perm_lignes[:, :, None] + perm_colonnes[:, None, :]) % n
+    return np.take_along_axis(perm_symboles[:, :, None], cyclique.reshape(nb, n * n, 1), axis=1).reshape(nb, n, n)
+
+
+def _generer_groupe(rng, code, taille, nb):
+    # Valeurs stockées en dixièmes (int16) : les réponses sont calculées sur
+    # exactement les valeurs affichées à l'étudiant
+    colonnes = {}
+    if code == 'BRC':
+        t, b = taille
+        y = (10 + rng.normal(0, 1.5, (nb, 1, t)) + rng.normal(0, 1, (nb, b, 1))
+             + rng.normal(0, 1, (nb, b, t)))
+        dixiemes = np.round(y * 10).astype(np.int16)
+        reponses = anova_brc(dixiemes / 10)
+    elif code == 'CL':
+        n, = taille
+        plans = _plans_carre_latin(rng, nb, n)
+        effets_trait = rng.normal(0, 1.5, (nb, n))
+        y = (10 + np.take_along_axis(effets_trait, plans.reshape(nb, -1), axis=1).reshape(nb, n, n)
+             + rng.normal(0, 1, (nb, n, 1)) + rng.normal(0, 1, (nb, 1, n))
+             + rng.normal(0, 1, (nb, n, n)))
+        dixiemes = np.round(y * 10).astype(np.int16)
+        reponses = anova_carre_latin(dixiemes / 10, plans)
+        colonnes['plan'] = plans.astype(np.int8)
+    else:
+        r, a, b = taille
+        y = (10 + rng.normal(0, 1, (nb, r, 1, 1)) + rng.normal(0, 1.5, (nb, 1, a, 1))
+             + rng.normal(0, 1, (nb, r, a, 1)) + rng.normal(0, 1.5, (nb, 1, 1, b))
+             + rng.normal(0, 0.5, (nb, 1, a, b)) + rng.normal(0, 1, (nb, r, a, b)))
+        dixiemes = np.round(y * 10).astype(np.int16)
+        reponses = anova_split_plot(dixiemes / 10)
+
+    colonnes['valeurs'] = dixiemes
+    for nom, valeur in reponses.items():
+        colonnes[nom] = np.asarray(valeur)
+    return colonnes
+
+
+def generer_banque(nb_par_taille=NB_EXERCICES_PAR_TAILLE, graine=GRAINE):
+    """Génère toutes les tailles de tous les dispositifs"""
+    rng = np.random.default_rng(graine)
+    banque = {}
+    for code, tailles in TAILLES.items():
+        for taille in tailles:
+            banque[nom_groupe(code, taille)] = _generer_groupe(rng, code, taille, nb_par_taille)
+    return banque
+
+
+def sauvegarder_banque(banque, chemin=CHEMIN_BANQUE):
+    os.makedirs(os.path.dirname(chemin), exist_ok=True)
+    colonnes = {f"{groupe}/{nom}": valeur
+                for groupe, tableau in banque.items()
+                for nom, valeur in tableau.items()}
+    # Écriture atomique : plusieurs processus peuvent générer la banque en même temps
+    temporaire = f"{chemin}.{os.getpid()}.tmp.npz"
+    np.savez_compressed(temporaire, **colonnes)
+    os.replace(temporaire, chemin)
+
+
+@functools.lru_cache(maxsize=None)
+def charger_banque(chemin=CHEMIN_BANQUE):
+    """Charge la banque une fois par processus (la génère si le fichier est absent)"""
+    if not os.path.exists(chemin):
+        sauvegarder_banque(generer_banque(), chemin)
+    banque = {}
+    with np.load(chemin) as fichier:
+        for cle in fichier.files:
+            groupe, nom = cle.split('/', 1)
+            banque.setdefault(groupe, {})[nom] = fichier[cle]
+    return banque
+
+
+def exercice(identifiant, chemin=CHEMIN_BANQUE):
+    """Retourne les données et les réponses attendues d'un exercice"""
+    groupe, numero = _decoder_identifiant(identifiant)
+    colonnes = charger_banque(chemin)[groupe]
+    resultat = {
+        'identifiant': identifiant,
+        'dispositif': DISPOSITIFS[groupe.split('-')[0]],
+        'valeurs': colonnes['valeurs'][numero] / 10,
+        'reponses': {},
+    }
+    if 'plan' in colonnes:
+        resultat['plan'] = colonnes['plan'][numero]
+    for nom, valeur in colonnes.items():
+        if nom.startswith(('ddl_', 'sc_', 'cm_', 'f_')):
+            resultat['reponses'][nom] = valeur.item() if valeur.ndim == 0 else float(valeur[numero])
+    return resultat
+
+
+def reponses(identifiant, chemin=CHEMIN_BANQUE):
+    return exercice(identifiant, chemin)['reponses']
+
+
+def reponses_lot(identifiants, chemin=CHEMIN_BANQUE):
+    """Réponses attendues de nombreux exercices (une ligne par identifiant)
+
+    Un seul accès indexé par colonne et par taille d'exercice, sans boucle
+    sur les identifiants.
+    """
+    banque = charger_banque(chemin)
+    identifiants = pd.Series(pd.unique(pd.Series(identifiants, dtype=str)))
+    decoupe = identifiants.str.rsplit('-', n=1, expand=True)
+    morceaux = []
+    for groupe, lignes in decoupe.groupby(0):
+        if groupe not in banque:
+            continue
+        numeros = pd.to_numeric(lignes[1], errors='coerce')
+        lignes = lignes[numeros.between(0, len(banque[groupe]['valeurs']) - 1)]
+        numeros = numeros[lignes.index].astype(int).to_numpy()
+        colonnes = {}
+        for nom, valeur in banque[groupe].items():
+            if nom.startswith(('ddl_', 'sc_', 'cm_', 'f_')):
+                colonnes[nom] = np.broadcast_to(valeur, (len(numeros),)) if valeur.ndim == 0 else valeur[numeros]
+        morceaux.append(pd.DataFrame(colonnes, index=identifiants[lignes.index].to_numpy()))
+    return pd.concat(morceaux) if morceaux else pd.DataFrame()
+
+
+if __name__ == '__main__':
+    banque = generer_banque()
+    sauvegarder_banque(banque)
+    print(f"{sum(len(g['valeurs']) for g in banque.values())} exercices écrits dans {CHEMIN_BANQUE}")
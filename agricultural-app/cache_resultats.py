@@ -0,0 +1,180 @@
+import functools
+import hashlib
+import os
+import pickle
+import sqlite3
+import time
+
+import numpy as np
+
+# Cache disque des résultats d'analyse (tableaux d'ANOVA, diagnostics, rapports
+# et figures), partagé par tous les processus du serveur : un même exercice
+# traité par toute une classe n'est calculé qu'une fois par déploiement. La clé
+# est l'empreinte du contenu des entrées (valeurs, dispositif via la forme du
+# tableau, α...) et de VERSION_MOTEUR ; chaque résultat est un fichier pickle
+# écrit de façon atomique, et un index SQLite garde sa taille et son dernier
+# accès pour l'éviction des moins récemment utilisés au-delà de TAILLE_MAX,
+# ainsi que les compteurs de succès et d'échecs communs à tous les processus.
+
+# À incrémenter dès qu'un calcul mis en cache change de résultat
+VERSION_MOTEUR = 3
+DOSSIER_CACHE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'cache_resultats')
+TAILLE_MAX = 256 * 1024 ** 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entrees (cle TEXT PRIMARY KEY, taille INTEGER, dernier_acces REAL);
+CREATE INDEX IF NOT EXISTS entrees_acces ON entrees (dernier_acces);
+CREATE TABLE IF NOT EXISTS compteurs (nom TEXT PRIMARY KEY, valeur INTEGER);
+INSERT OR IGNORE INTO compteurs VALUES ('succes', 0), ('echecs', 0);
+"""
+
+
+def _ajouter(hachage, partie):
+    if isinstance(partie, np.ndarray):
+        partie = np.ascontiguousarray(partie)
+        hachage.update(f'ndarray{partie.dtype.str}{partie.shape}'.encode())
+        hachage.update(partie.tobytes())
+    elif isinstance(partie, (tuple, list)):
+        hachage.update(f'{type(partie).__name__}{len(partie)}'.encode())
+        for element in partie:
+            _ajouter(hachage, element)
+    elif isinstance(partie, dict):
+        _ajouter(hachage, sorted(partie.items()))
+    else:
+        hachage.update(f'{type(partie).__name__}:{partie!r};'.encode())
+
+
+def empreinte(*parties):
+    """Clé du cache : SHA-256 des parties (tableaux par contenu) et de VERSION_MOTEUR"""
+    hachage = hashlib.sha256(f'moteur{VERSION_MOTEUR};'.encode())
+    _ajouter(hachage, parties)
+    return hachage.hexdigest()
+
+
+class CacheDisque:
+    """Résultats rangés par empreinte dans un dossier commun à plusieurs processus"""
+
+    def __init__(self, dossier=DOSSIER_CACHE, taille_max=TAILLE_MAX):
+        self.dossier = dossier
+        self.taille_max = taille_max
+        os.makedirs(dossier, exist_ok=True)
+        with self._connexion() as connexion:
+            connexion.executescript(SCHEMA)
+
+    def _connexion(self):
+        # Une connexion par opération : rien n'est partagé entre fils ou processus
+        connexion = sqlite3.connect(os.path.join(self.dossier, 'index.sqlite'), timeout=30,
+                                    isolation_level=None)
+        connexion.execute('PRAGMA journal_mode=WAL')
+        return _Connexion(connexion)
+
+    def _chemin(self, cle):
+        return os.path.join(self.dossier, f'{cle}.pkl')
+
+    def lire(self, cle):
+        """(True, valeur) si cle est en cache, (False, None) sinon ; compte le succès ou l'échec"""
+        with self._connexion() as connexion:
+            present = connexion.execute('UPDATE entrees SET dernier_acces = ? WHERE cle = ?',
+                                        (time.time(), cle)).rowcount
+            valeur = None
+            if present:
+                try:
+                    with open(self._chemin(cle), 'rb') as fichier:
+                        valeur = pickle.load(fichier)
+                except (OSError, pickle.UnpicklingError, EOFError):
+                    # Fichier évincé entre-temps ou illisible : l'entrée est oubliée
+                    connexion.execute('DELETE FROM entrees WHERE cle = ?', (cle,))
+                    present = 0
+            connexion.execute('UPDATE compteurs SET valeur = valeur + 1 WHERE nom = ?',
+                              ('succes' if present else 'echecs',))
+        return bool(present), valeur
+
+    def ecrire(self, cle, valeur):
+        """Range valeur sous cle, puis évince les entrées les plus anciennes au-delà de taille_max"""
+        contenu = pickle.dumps(valeur, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(contenu) > self.taille_max:
+            return
+        chemin = self._chemin(cle)
+        temporaire = f'{chemin}.{os.getpid()}.tmp'
+        with open(temporaire, 'wb') as fichier:
+            fichier.write(contenu)
+        os.replace(temporaire, chemin)
+
+        with self._connexion() as connexion:
+            connexion.execute('BEGIN IMMEDIATE')
+            connexion.execute('INSERT OR REPLACE INTO entrees VALUES (?, ?, ?)', (cle, len(contenu), time.time()))
+            total = connexion.execute('SELECT SUM(taille) FROM entrees').fetchone()[0]
+            evincees = []
+            if total > self.taille_max:
+                for ancienne, taille in connexion.execute(
+                        'SELECT cle, taille FROM entrees ORDER BY dernier_acces'):
+                    if total <= self.taille_max:
+                        break
+                    evincees.append(ancienne)
+                    total -= taille
+                connexion.executemany('DELETE FROM entrees WHERE cle = ?', [(c,) for c in evincees])
+            connexion.execute('COMMIT')
+        for ancienne in evincees:
+            try:
+                os.remove(self._chemin(ancienne))
+            except FileNotFoundError:
+                pass
+
+    def obtenir(self, cle, calcul):
+        """Valeur en cache, ou calcul() rangé sous cle"""
+        trouve, valeur = self.lire(cle)
+        if not trouve:
+            valeur = calcul()
+            self.ecrire(cle, valeur)
+        return valeur
+
+    def statistiques(self):
+        """Succès, échecs, taux de succès, nombre d'entrées et octets occupés"""
+        with self._connexion() as connexion:
+            compteurs = dict(connexion.execute('SELECT nom, valeur FROM compteurs'))
+            nb_entrees, octets = connexion.execute('SELECT COUNT(*), COALESCE(SUM(taille), 0) FROM entrees').fetchone()
+        demandes = compteurs['succes'] + compteurs['echecs']
+        return {
+            'succes': compteurs['succes'],
+            'echecs': compteurs['echecs'],
+            'taux_succes': compteurs['succes'] / demandes if demandes else 0.0,
+            'nb_entrees': nb_entrees,
+            'octets': octets,
+        }
+
+
+class _Connexion:
+    # sqlite3.Connection en gestionnaire de contexte ne ferme pas la connexion
+    __slots__ = ('connexion',)
+
+    def __init__(self, connexion):
+        self.connexion = connexion
+
+    def __enter__(self):
+        return self.connexion
+
+    def __exit__(self, *exception):
+        if exception[0] is not None and self.connexion.in_transaction:
+            self.connexion.execute('ROLLBACK')
+        self.connexion.close()
+
+
+@functools.lru_cache(maxsize=None)
+def cache_disque(dossier=DOSSIER_CACHE):
+    """Cache du dossier, un objet par processus"""
+    return CacheDisque(dossier)
+
+
+def memoiser(nom, *parametres):
+    """Décorateur : résultat de fonction(*args) lu dans le cache partagé quand il y est
+
+    La clé est l'empreinte de nom, des parametres fixes (α...) et des
+    arguments : ensemble, ils doivent contenir tout ce dont dépend le résultat.
+    """
+    def decorateur(fonction):
+        @functools.wraps(fonction)
+        def enveloppe(*args, **kwargs):
+            cle = empreinte(nom, parametres, args, kwargs)
+            return cache_disque().obtenir(cle, lambda: fonction(*args, **kwargs))
+        return enveloppe
+    return decorateur
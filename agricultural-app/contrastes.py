@@ -0,0 +1,98 @@
+import numpy as np
+
+# Contrastes entre traitements : décomposition de la SC des traitements en
+# comparaisons à 1 DDL. Les contrastes polynomiaux orthogonaux (linéaire,
+# quadratique, cubique) conviennent aux traitements quantitatifs (doses d'engrais,
+# espacées régulièrement ou non) ; l'utilisateur peut aussi donner les siens.
+# Tous les contrastes sont les lignes d'une matrice (k, t) appliquée aux moyennes
+# de traitement (..., t) en un seul produit matriciel : autant de jeux de
+# contrastes (lignes empilées) et de variables (axes de lot) que voulu.
+
+DEGRE_MAX = 3
+NOMS_DEGRES = ('Linéaire', 'Quadratique', 'Cubique')
+
+
+def coefficients_polynomiaux(doses, degre_max=DEGRE_MAX):
+    """Coefficients des contrastes polynomiaux orthogonaux, tableau (degré, t)
+
+    Obtenus par orthogonalisation (QR) des puissances des doses centrées :
+    chaque ligne est de somme nulle et orthogonale aux autres, et son signe
+    est choisi pour qu'un effet croissant avec la dose soit positif.
+    """
+    doses = np.asarray(doses, dtype=float)
+    if len(np.unique(doses)) != len(doses):
+        raise ValueError("Les doses des traitements doivent être toutes différentes")
+    degre = min(degre_max, len(doses) - 1)
+    puissances = np.vander(doses - doses.mean(), degre + 1, increasing=True)
+    q, r = np.linalg.qr(puissances)
+    coefficients = (q[:, 1:] * np.sign(np.diag(r)[1:])).T
+    # Plus petit coefficient non nul égal à 1 en valeur absolue : doses équidistantes,
+    # coefficients entiers des tables (-3, -1, 1, 3...) ; les SC n'en dépendent pas
+    absolus = np.abs(coefficients)
+    nuls = absolus <= 1e-9 * absolus.max(axis=1, keepdims=True)
+    coefficients = np.where(nuls, 0.0, coefficients)
+    return coefficients / np.where(nuls, np.inf, absolus).min(axis=1, keepdims=True)
+
+
+def _nombres(texte):
+    return [float(valeur) for valeur in texte.replace(';', ',').split(',')]
+
+
+def lire_doses(texte, nb_traitements):
+    """Doses saisies 'd1, d2, ...', une par traitement"""
+    try:
+        doses = _nombres(texte)
+    except ValueError:
+        raise ValueError("Doses non numériques") from None
+    if len(doses) != nb_traitements:
+        raise ValueError(f"{len(doses)} doses pour {nb_traitements} traitements")
+    return doses
+
+
+def lire_contrastes(texte, nb_traitements):
+    """Contrastes saisis une ligne par contraste, 'nom : c1, c2, ...' ; retourne (noms, coefficients)"""
+    noms, lignes = [], []
+    for numero, ligne in enumerate(texte.splitlines(), start=1):
+        if not ligne.strip():
+            continue
+        nom, _, coefficients = ligne.rpartition(':')
+        try:
+            valeurs = _nombres(coefficients)
+        except ValueError:
+            raise ValueError(f"Ligne {numero} : coefficients non numériques") from None
+        if len(valeurs) != nb_traitements:
+            raise ValueError(f"Ligne {numero} : {len(valeurs)} coefficients pour {nb_traitements} traitements")
+        noms.append(nom.strip() or f"Contraste {len(noms) + 1}")
+        lignes.append(valeurs)
+    return noms, np.array(lignes, dtype=float).reshape(len(lignes), nb_traitements)
+
+
+def analyse_contrastes(moyennes, contrastes, nb_repetitions, cm_erreur):
+    """Estimations, SC (1 DDL) et F de chaque contraste
+
+    moyennes : (..., t) moyennes de traitement, contrastes : (k, t),
+    cm_erreur : scalaire ou (...). Retourne des tableaux (..., k).
+    """
+    moyennes = np.asarray(moyennes, dtype=float)
+    contrastes = np.asarray(contrastes, dtype=float)
+    if contrastes.shape[-1] != moyennes.shape[-1]:
+        raise ValueError("Il faut un coefficient par traitement")
+    if not np.allclose(contrastes.sum(axis=-1), 0):
+        raise ValueError("Les coefficients d'un contraste doivent avoir une somme nulle")
+    if not np.all((contrastes ** 2).sum(axis=-1) > 0):
+        raise ValueError("Un contraste a tous ses coefficients nuls")
+
+    estimations = moyennes @ contrastes.T
+    # SC = r (Σ c·ȳ)² / Σ c²
+    sc = nb_repetitions * estimations ** 2 / (contrastes ** 2).sum(axis=-1)
+    return {
+        'estimations': estimations,
+        'sc': sc,
+        'f': sc / np.asarray(cm_erreur, dtype=float)[..., None],
+    }
+
+
+def orthogonaux(contrastes):
+    """Vrai si les contrastes sont orthogonaux deux à deux (leurs SC s'additionnent)"""
+    produits = contrastes @ contrastes.T
+    return np.allclose(produits - np.diag(np.diag(produits)), 0)
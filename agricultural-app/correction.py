@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+
+# Correction des réponses des étudiants (DDL, CM, F). Une soumission est une
+# ligne (etudiant, exercice, réponses) : toutes les lignes sont corrigées en une
+# seule passe vectorisée contre le tableau des réponses attendues, ce qui sert
+# aussi bien à la vérification d'un étudiant (étapes 3, 5, 6) qu'aux copies
+# d'examen saisies par milliers.
+
+CORRECT = 'CORRECT'
+INCORRECT = 'INCORRECT'
+MANQUANT = 'MANQUANT'
+
+TOLERANCE_ABSOLUE = 0.01
+TOLERANCE_RELATIVE = 0.0
+
+# Réponse : (libellé, entier ?, explication affichée en cas d'erreur)
+ITEMS = {
+    'ddl_total': ('DDL Total', True, " (car n-1 = {nb_obs}-1)"),
+    'ddl_traitements': ('DDL Traitements', True, " (car t-1 = {nb_trait}-1)"),
+    'ddl_blocs': ('DDL Blocs', True, " (car b-1 = {nb_blocs}-1)"),
+    'ddl_erreur': ('DDL Erreur', True, " (car (t-1)(b-1) = ({nb_trait}-1)×({nb_blocs}-1))"),
+    'cm_traitements': ('CM Traitements', False, ""),
+    'cm_blocs': ('CM Blocs', False, ""),
+    'cm_erreur': ('CM Erreur', False, ""),
+    'f_traitements': ('F Traitements', False, ""),
+    'f_blocs': ('F Blocs', False, ""),
+}
+
+
+def corriger(soumissions, attendues, tolerance_absolue=TOLERANCE_ABSOLUE,
+             tolerance_relative=TOLERANCE_RELATIVE):
+    """Corrige toutes les soumissions en une passe
+
+    soumissions : colonnes 'exercice' et réponses (noms de ITEMS) ;
+    attendues : réponses correctes indexées par identifiant d'exercice.
+    Retourne, pour chaque soumission et chaque réponse présente, un code
+    CORRECT / INCORRECT / MANQUANT (colonnes 'code_<réponse>') et le score.
+    Les DDL doivent être exacts ; CM et F sont acceptés si
+    |réponse - attendu| < tolérance absolue + tolérance relative × |attendu|.
+    """
+    items = [item for item in ITEMS if item in soumissions.columns and item in attendues.columns]
+    reponses = soumissions[items].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+    correctes = attendues.reindex(soumissions['exercice'].astype(str))[items].to_numpy(dtype=float)
+
+    entiers = np.array([ITEMS[item][1] for item in items])
+    ecarts = np.abs(reponses - correctes)
+    seuils = tolerance_absolue + tolerance_relative * np.abs(correctes)
+    justes = np.where(entiers, ecarts == 0, ecarts < seuils)
+
+    codes = np.where(np.isnan(reponses), MANQUANT, np.where(justes, CORRECT, INCORRECT))
+    resultats = soumissions.drop(columns=items).copy()
+    for j, item in enumerate(items):
+        resultats[f'code_{item}'] = codes[:, j]
+    resultats['score'] = justes.sum(axis=1)
+    resultats['sur'] = len(items)
+    # Exercice inconnu de la banque : rien à comparer
+    resultats['exercice_inconnu'] = np.isnan(correctes).all(axis=1) if items else True
+    return resultats
+
+
+def messages(codes, attendues, contexte=None):
+    """Messages (niveau, texte) de l'application pour une soumission corrigée"""
+    sortie = []
+    for item, (libelle, entier, explication) in ITEMS.items():
+        code = codes.get(f'code_{item}')
+        if code is None:
+            continue
+        attendu = f"{int(round(attendues[item]))}" if entier else f"{attendues[item]:.3f}"
+        if code == CORRECT:
+            sortie.append(('success', f"✅ {libelle} correct : {attendu}"))
+        else:
+            explication = explication.format(**contexte) if contexte else ""
+            sortie.append(('error', f"❌ {libelle} incorrect. Réponse : {attendu}{explication}"))
+    return sortie
+
+
+def corriger_une(reponses, attendues, contexte=None, **tolerances):
+    """Corrige les réponses d'un seul étudiant ; retourne (tout juste ?, messages)"""
+    soumission = pd.DataFrame([dict(reponses, exercice='courant')])
+    corrigee = corriger(soumission, pd.DataFrame([attendues], index=['courant']), **tolerances).iloc[0]
+    return corrigee['score'] == corrigee['sur'], messages(corrigee, attendues, contexte)
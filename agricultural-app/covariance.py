@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+
+# Analyse de covariance d'un BRC : une ou plusieurs covariables mesurées sur
+# chaque parcelle (nombre de plants, azote initial...) ajustent l'erreur, les
+# tests F et les moyennes des traitements. Toutes les variables sont centrées
+# par balayage des axes blocs / traitements, puis les produits croisés sont
+# formés par einsum : un seul appel traite autant de variables réponses que
+# voulu (axes de lot), avec les mêmes covariables.
+
+# Effet : (dénominateur du F, libellé)
+SOURCES = {
+    'traitements': ('erreur', 'Traitements (ajustés)'),
+    'blocs': ('erreur', 'Blocs (ajustés)'),
+    'covariables': ('erreur', 'Régression sur les covariables'),
+    'erreur': (None, 'Erreur (ajustée)'),
+}
+
+
+def _residus(v, sans_blocs, sans_traitements):
+    # Écarts aux moyennes de bloc et/ou de traitement (axes -2 et -1 du dispositif)
+    r = v - v.mean(axis=(-2, -1), keepdims=True)
+    if sans_blocs:
+        r = r - r.mean(axis=-1, keepdims=True)
+    if sans_traitements:
+        r = r - r.mean(axis=-2, keepdims=True)
+    return r
+
+
+def _sc_ajustee(ry, rx):
+    """SC de y corrigée de la régression sur x : Syy - Sxyᵀ Sxx⁻¹ Sxy
+
+    ry : (..., b, t), rx : (..., b, t, p). Retourne aussi Sxx⁻¹ Sxy.
+    """
+    sxx = np.einsum('...btp,...btq->...pq', rx, rx)
+    sxy = np.einsum('...btp,...bt->...p', rx, ry)
+    syy = np.einsum('...bt,...bt->...', ry, ry)
+    coefficients = np.linalg.solve(sxx, sxy[..., None])[..., 0]
+    return syy - np.einsum('...p,...p->...', sxy, coefficients), coefficients
+
+
+def anova_covariance(valeurs, covariables):
+    """ANCOVA d'un BRC
+
+    valeurs : (..., nb_blocs, nb_traitements), une ou plusieurs variables réponses ;
+    covariables : (nb_blocs, nb_traitements, nb_covariables), communes à toutes
+    les réponses (ou avec les mêmes axes de lot que valeurs).
+    """
+    y = np.asarray(valeurs, dtype=float)
+    x = np.asarray(covariables, dtype=float)
+    if x.ndim == 2:
+        # Une seule covariable (nb_blocs, nb_traitements)
+        x = x[..., None]
+    nb_blocs, nb_trait = y.shape[-2:]
+    nb_cov = x.shape[-1]
+    # Les covariables se centrent comme des réponses : axe des covariables en tête
+    x_dispositif = np.moveaxis(x, -1, -3)
+
+    def ajuster(sans_blocs, sans_traitements):
+        rx = np.moveaxis(_residus(x_dispositif, sans_blocs, sans_traitements), -3, -1)
+        return _sc_ajustee(_residus(y, sans_blocs, sans_traitements), rx)
+
+    # Erreur : résidus du modèle additif ; traitements (ou blocs) + erreur : résidus
+    # du modèle sans l'effet testé. Les SC ajustées se déduisent par différence.
+    sc_erreur, coefficients = ajuster(True, True)
+    sc_trait_erreur, _ = ajuster(True, False)
+    sc_blocs_erreur, _ = ajuster(False, True)
+    ry = _residus(y, True, True)
+
+    resultats = {
+        'ddl_traitements': nb_trait - 1,
+        'ddl_blocs': nb_blocs - 1,
+        'ddl_covariables': nb_cov,
+        'ddl_erreur': (nb_trait - 1) * (nb_blocs - 1) - nb_cov,
+        'sc_erreur': sc_erreur,
+        'sc_traitements': sc_trait_erreur - sc_erreur,
+        'sc_blocs': sc_blocs_erreur - sc_erreur,
+        'sc_covariables': np.einsum('...bt,...bt->...', ry, ry) - sc_erreur,
+    }
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for effet in SOURCES:
+            resultats[f'cm_{effet}'] = resultats[f'sc_{effet}'] / resultats[f'ddl_{effet}']
+        for effet, (denominateur, _) in SOURCES.items():
+            if denominateur is not None:
+                resultats[f'f_{effet}'] = resultats[f'cm_{effet}'] / resultats[f'cm_{denominateur}']
+
+    # Moyennes ajustées : ȳ_t - β · (x̄_t - x̄)
+    ecarts_x = x.mean(axis=-3) - x.mean(axis=(-3, -2))[..., None, :]
+    resultats['coefficients'] = coefficients
+    resultats['moyennes_ajustees'] = y.mean(axis=-2) - np.einsum('...tp,...p->...t', ecarts_x, coefficients)
+    return resultats
+
+
+def tableau_anova_covariance(resultats):
+    """Tableau d'ANCOVA pour l'affichage"""
+    return pd.DataFrame([{
+        'Source de variation': libelle,
+        'DDL': resultats[f'ddl_{effet}'],
+        'Somme des carrés': resultats[f'sc_{effet}'],
+        'Carré moyen': resultats[f'cm_{effet}'],
+        'F calculé': resultats.get(f'f_{effet}', np.nan),
+    } for effet, (_, libelle) in SOURCES.items()])
@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+# Vérification des conditions de l'ANOVA d'un BRC : normalité des résidus
+# (Shapiro-Wilk), homogénéité des variances entre traitements (Levene,
+# Bartlett) et additivité blocs + traitements (test de Tukey à un DDL). Tout
+# part des moyennes de blocs et de traitements déjà utilisées pour les SC, et
+# se calcule pour autant de variables que voulu (axes de lot).
+
+
+def diagnostics_residus(valeurs):
+    """Résidus du modèle additif et tests des conditions, valeurs (..., nb_blocs, nb_traitements)"""
+    y = np.asarray(valeurs, dtype=float)
+    nb_blocs, nb_trait = y.shape[-2:]
+
+    moyenne_generale = y.mean(axis=(-2, -1), keepdims=True)
+    effets_blocs = y.mean(axis=-1, keepdims=True) - moyenne_generale
+    effets_trait = y.mean(axis=-2, keepdims=True) - moyenne_generale
+    ajustees = moyenne_generale + effets_blocs + effets_trait
+    residus = y - ajustees
+    ddl_erreur = (nb_blocs - 1) * (nb_trait - 1)
+    sc_erreur = (residus ** 2).sum(axis=(-2, -1))
+
+    # Normalité des résidus
+    shapiro = stats.shapiro(residus.reshape(residus.shape[:-2] + (-1,)), axis=-1)
+
+    # Levene : ANOVA à un facteur (traitements) des écarts absolus des résidus
+    z = np.abs(residus - residus.mean(axis=-2, keepdims=True))
+    z_trait = z.mean(axis=-2, keepdims=True)
+    sc_entre = nb_blocs * ((z_trait - z.mean(axis=(-2, -1), keepdims=True)) ** 2).sum(axis=(-2, -1))
+    sc_dans = ((z - z_trait) ** 2).sum(axis=(-2, -1))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        f_levene = (sc_entre / (nb_trait - 1)) / (sc_dans / (nb_trait * (nb_blocs - 1)))
+
+        # Bartlett : variances des résidus par traitement
+        variances = (residus ** 2).sum(axis=-2) / (nb_blocs - 1)
+        variance_commune = variances.mean(axis=-1)
+        ddl_groupe = nb_blocs - 1
+        correction = 1 + (nb_trait / ddl_groupe - 1 / (nb_trait * ddl_groupe)) / (3 * (nb_trait - 1))
+        stat_bartlett = (nb_trait * ddl_groupe * np.log(variance_commune)
+                         - ddl_groupe * np.log(variances).sum(axis=-1)) / correction
+
+        # Tukey : un DDL pour la non-additivité, pris sur l'erreur
+        produit = (y * effets_blocs * effets_trait).sum(axis=(-2, -1))
+        sc_non_additivite = produit ** 2 / ((effets_blocs ** 2).sum(axis=(-2, -1))
+                                            * (effets_trait ** 2).sum(axis=(-2, -1)))
+        ddl_reste = ddl_erreur - 1
+        f_tukey = sc_non_additivite / ((sc_erreur - sc_non_additivite) / ddl_reste)
+
+    return {
+        'ajustees': ajustees,
+        'residus': residus,
+        'shapiro_w': shapiro.statistic,
+        'shapiro_p': shapiro.pvalue,
+        'levene_f': f_levene,
+        'levene_p': stats.f.sf(f_levene, nb_trait - 1, nb_trait * (nb_blocs - 1)),
+        'bartlett_stat': stat_bartlett,
+        'bartlett_p': stats.chi2.sf(stat_bartlett, nb_trait - 1),
+        'tukey_sc': sc_non_additivite,
+        'tukey_f': f_tukey,
+        'tukey_p': stats.f.sf(f_tukey, 1, ddl_reste),
+    }
+
+
+def tableau_diagnostics(resultats, alpha=0.05):
+    """Résumé des tests d'un seul jeu de données, pour l'affichage"""
+    tests = [
+        ('Normalité des résidus', 'Shapiro-Wilk (W)', 'shapiro_w', 'shapiro_p'),
+        ('Homogénéité des variances', 'Levene (F)', 'levene_f', 'levene_p'),
+        ('Homogénéité des variances', 'Bartlett (χ²)', 'bartlett_stat', 'bartlett_p'),
+        ('Additivité blocs + traitements', 'Tukey à 1 DDL (F)', 'tukey_f', 'tukey_p'),
+    ]
+    return pd.DataFrame([{
+        'Condition': condition,
+        'Test': test,
+        'Statistique': float(resultats[statistique]),
+        'p-value': float(resultats[p_value]),
+        'Condition respectée ?': "OUI" if resultats[p_value] >= alpha else "NON",
+    } for condition, test, statistique, p_value in tests])
@@ -0,0 +1,130 @@
+import functools
+
+import altair as alt
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+# Loi de Fisher pour la comparaison F calculé / F théorique. Les quantiles et
+# les grilles de densité sont calculés une fois par processus et partagés entre
+# les sessions ; le graphique de l'étape 7 embarque toutes les variantes (seuils
+# α, effets) et les bascule côté navigateur, sans nouvel appel à SciPy : le
+# choix de α dans le graphique est le seul réglage de α de l'étape 7.
+
+ALPHAS = (0.05, 0.01, 0.001)
+NB_POINTS = 300
+# Table pré-calculée : ν1 = 1..DDL1_MAX, ν2 = 1..DDL2_MAX
+DDL1_MAX = 30
+DDL2_MAX = 200
+# La densité de F(1, ν2) tend vers l'infini en 0 : on plafonne l'affichage
+DENSITE_MAX = 1.5
+# Axe des F : jusqu'au quantile à 1 % (au plus PLAFOND_AXE, car avec peu de DDL
+# de l'erreur ce quantile dépasse 50 et écrase la densité), et jusqu'au F calculé
+PLAFOND_AXE = 10.0
+MARGE_AXE = 1.2
+
+
+@functools.lru_cache(maxsize=None)
+def table_f(alphas=ALPHAS, ddl1_max=DDL1_MAX, ddl2_max=DDL2_MAX):
+    """Quantiles F(1-α ; ν1, ν2), tableau de forme (len(alphas), ddl1_max, ddl2_max)"""
+    alphas = np.asarray(alphas)[:, None, None]
+    ddl1 = np.arange(1, ddl1_max + 1)[None, :, None]
+    ddl2 = np.arange(1, ddl2_max + 1)[None, None, :]
+    return stats.f.ppf(1 - alphas, ddl1, ddl2)
+
+
+@functools.lru_cache(maxsize=4096)
+def f_critique(alpha, ddl1, ddl2):
+    """F théorique au seuil α (lu dans la table quand c'est possible)"""
+    ddl1, ddl2 = int(ddl1), int(ddl2)
+    if alpha in ALPHAS and 1 <= ddl1 <= DDL1_MAX and 1 <= ddl2 <= DDL2_MAX:
+        return float(table_f()[ALPHAS.index(alpha), ddl1 - 1, ddl2 - 1])
+    return float(stats.f.ppf(1 - alpha, ddl1, ddl2))
+
+
+def borne_axe(ddl1, ddl2, f_observe=0.0):
+    """Fin de l'axe des F : marge au-delà du quantile à 1 % (plafonné) et du F calculé"""
+    borne = max(min(f_critique(0.01, ddl1, ddl2), PLAFOND_AXE), f_observe)
+    # Arrondie au dixième : les grilles restent partagées entre effets voisins
+    return float(np.ceil(MARGE_AXE * borne * 10) / 10)
+
+
+@functools.lru_cache(maxsize=1024)
+def grille_densite(ddl1, ddl2, x_max, nb_points=NB_POINTS):
+    """Densité de F(ν1, ν2) sur [0, x_max]
+
+    x_max vient de borne_axe : tant que le F calculé reste sous le quantile à
+    1 % (plafonné), c'est borne_axe(ν1, ν2), la grille préchauffée.
+    """
+    x = np.linspace(0, x_max, nb_points)
+    with np.errstate(divide='ignore'):
+        densite = np.minimum(stats.f.pdf(x, ddl1, ddl2), DENSITE_MAX)
+    return x, densite
+
+
+@functools.lru_cache(maxsize=4096)
+def p_valeur(f_observe, ddl1, ddl2):
+    """P(F(ν1, ν2) > F calculé), gardée d'une réexécution à l'autre"""
+    return float(stats.f.sf(f_observe, ddl1, ddl2))
+
+
+def donnees_explorateur(effets):
+    """Densités et seuils de chaque effet, pour tous les α
+
+    effets : tuples (libellé, ν1, ν2, F calculé). La densité ne dépend pas
+    de α : les seuils sont des colonnes 'seuil_<i>' (i = rang de α dans ALPHAS).
+    Un seuil au-delà de la fin de l'axe (x_max) n'est pas tracé.
+    """
+    densites, seuils = [], []
+    for libelle, ddl1, ddl2, f_observe in effets:
+        ddl1, ddl2, f_observe = int(ddl1), int(ddl2), float(f_observe)
+        x_max = borne_axe(ddl1, ddl2, f_observe)
+        x, densite = grille_densite(ddl1, ddl2, x_max)
+        colonnes = {'effet': libelle, 'x': x.round(4), 'densite': densite.round(4)}
+        for i, alpha in enumerate(ALPHAS):
+            colonnes[f'seuil_{i}'] = f_critique(alpha, ddl1, ddl2)
+            seuils.append({'effet': libelle, 'alpha': alpha, 'ddl': f"F({ddl1}, {ddl2})",
+                           'f_critique': colonnes[f'seuil_{i}'], 'f_observe': f_observe,
+                           'p_valeur': p_valeur(f_observe, ddl1, ddl2), 'x_max': x_max,
+                           'decision': ("H₀ rejetée : effet significatif" if f_observe > colonnes[f'seuil_{i}']
+                                        else "H₀ non rejetée : effet non significatif")})
+        densites.append(pd.DataFrame(colonnes))
+    return pd.concat(densites, ignore_index=True), pd.DataFrame(seuils)
+
+
+def graphique_explorateur(effets, alpha=ALPHAS[0]):
+    """Densité de F avec zone de rejet, F calculé et décision ; α et l'effet se choisissent dans le graphique"""
+    densites, seuils = donnees_explorateur(effets)
+    choix_alpha = alt.param(name='alpha', value=alpha,
+                            bind=alt.binding_radio(options=list(ALPHAS), name='α '))
+    choix_effet = alt.param(name='effet', value=effets[0][0],
+                            bind=alt.binding_radio(options=[e[0] for e in effets], name='Effet '))
+
+    base = alt.Chart(densites).transform_filter(alt.datum.effet == choix_effet)
+    axe_x = alt.X('x:Q', title='Valeur F')
+    courbe = base.mark_line(color='steelblue').encode(
+        x=axe_x, y=alt.Y('densite:Q', title='Densité'))
+    colonnes_seuils = ', '.join(f'datum.seuil_{i}' for i in range(len(ALPHAS)))
+    rejet = base.transform_calculate(
+        seuil=f"[{colonnes_seuils}][indexof({list(ALPHAS)}, alpha)]"
+    ).transform_filter(alt.datum.x >= alt.datum.seuil).mark_area(
+        color='crimson', opacity=0.3).encode(x=axe_x, y='densite:Q')
+
+    lignes = alt.Chart(seuils).transform_filter(
+        (alt.datum.effet == choix_effet) & (alt.datum.alpha == choix_alpha))
+    infos = ['effet:N', 'ddl:N', alt.Tooltip('f_critique:Q', format='.3f'),
+             alt.Tooltip('f_observe:Q', format='.3f'), alt.Tooltip('p_valeur:Q', format='.4f')]
+    theorique = lignes.transform_filter(alt.datum.f_critique <= alt.datum.x_max).mark_rule(
+        color='gray', strokeDash=[6, 4]).encode(x='f_critique:Q', tooltip=infos)
+    observe = lignes.mark_rule(color='red', size=2).encode(x='f_observe:Q', tooltip=infos)
+    etiquette = lignes.transform_calculate(
+        texte="'F calc = ' + format(datum.f_observe, '.3f')"
+    ).mark_text(align='left', dx=4, dy=-8, color='red').encode(x='f_observe:Q', y=alt.value(0), text='texte:N')
+
+    decision = lignes.transform_calculate(
+        texte="'α = ' + datum.alpha + ' : F théorique = ' + format(datum.f_critique, '.3f') + ' → ' + datum.decision"
+    ).mark_text(align='left', baseline='top', fontWeight='bold').encode(
+        x=alt.value(5), y=alt.value(5), text='texte:N')
+
+    return (courbe + rejet + theorique + observe + etiquette + decision).add_params(
+        choix_alpha, choix_effet).properties(height=350)
@@ -0,0 +1,175 @@
+import numpy as np
+from scipy import sparse
+from scipy.sparse.linalg import spsolve
+
+from anova import anova_brc, carres_moyens, ddl_brc
+
+# Analyse d'un BRC incomplet :
+# - estimation classique des parcelles manquantes (formule de Yates) quand il
+#   n'y a que quelques trous ;
+# - ajustement par moindres carrés sur une matrice d'incidence creuse
+#   blocs × traitements pour les essais très déséquilibrés (SC de type I et III).
+
+SEUIL_YATES = 3
+
+
+def estimer_parcelles_manquantes(valeurs, iterations_max=100, tolerance=1e-10):
+    """Complète un tableau blocs × traitements (NaN = parcelle perdue)"""
+    y = np.array(valeurs, dtype=float)
+    manquantes = np.isnan(y)
+    if not manquantes.any():
+        return y
+
+    y[manquantes] = np.nanmean(y)
+    _iterations_yates(y, np.argwhere(manquantes), iterations_max, tolerance)
+    return y
+
+
+def _iterations_yates(y, positions, iterations_max, tolerance):
+    """Estime sur place les parcelles positions de y ; retourne le nombre de passes"""
+    # Formule de Yates : x = (t·T + b·B - G) / ((t-1)(b-1)), appliquée à tour
+    # de rôle à chaque parcelle jusqu'à stabilisation quand il y en a plusieurs
+    nb_blocs, nb_trait = y.shape
+    for iteration in range(1, iterations_max + 1):
+        ecart_max = 0.0
+        for b, t in positions:
+            precedente = y[b, t]
+            y[b, t] = 0.0
+            # T : total du traitement (colonne t), B : total du bloc (ligne b)
+            estimation = ((nb_trait * y[:, t].sum() + nb_blocs * y[b, :].sum() - y.sum())
+                          / ((nb_trait - 1) * (nb_blocs - 1)))
+            ecart_max = max(ecart_max, abs(estimation - precedente))
+            y[b, t] = estimation
+        if ecart_max < tolerance:
+            break
+    return iteration
+
+
+def anova_parcelles_manquantes(valeurs):
+    """ANOVA classique sur le tableau complété, DDL de l'erreur réduits"""
+    nb_manquantes = int(np.isnan(valeurs).sum())
+    complet = estimer_parcelles_manquantes(valeurs)
+    nb_blocs, nb_trait = complet.shape
+
+    resultats = anova_brc(complet)
+    resultats.update(ddl_brc(nb_trait, nb_blocs, nb_manquantes))
+    resultats = carres_moyens(resultats, ['traitements', 'blocs'], 'erreur')
+    resultats['valeurs_estimees'] = complet
+    return resultats
+
+
+def _sc_intra_groupe(codes, y, nb_groupes):
+    effectifs = np.bincount(codes, minlength=nb_groupes)
+    totaux = np.bincount(codes, weights=y, minlength=nb_groupes)
+    return (y ** 2).sum() - (totaux[effectifs > 0] ** 2 / effectifs[effectifs > 0]).sum()
+
+
+def _ajustement_additif(blocs, traitements, y):
+    # Ajustement blocs + traitements sur des observations sans NaN, codes recodés
+    # 0..k-1 : un bloc ou un traitement entièrement perdu disparaît du modèle
+    _, blocs = np.unique(blocs, return_inverse=True)
+    _, traitements = np.unique(traitements, return_inverse=True)
+    nb_blocs = blocs.max() + 1
+    nb_trait = traitements.max() + 1
+
+    # Matrice d'incidence N (blocs × traitements), jamais densifiée
+    incidence = sparse.csr_matrix((np.ones(len(y)), (blocs, traitements)), shape=(nb_blocs, nb_trait))
+    k = np.asarray(incidence.sum(axis=1)).ravel()
+    r = np.asarray(incidence.sum(axis=0)).ravel()
+    totaux_blocs = np.bincount(blocs, weights=y, minlength=nb_blocs)
+    totaux_trait = np.bincount(traitements, weights=y, minlength=nb_trait)
+
+    # Analyse intra-bloc : C·τ = Q avec C = diag(r) - N' diag(1/k) N
+    inv_k = sparse.diags(1.0 / k)
+    c = (sparse.diags(r) - incidence.T @ inv_k @ incidence).tocsc()
+    q = totaux_trait - incidence.T @ (totaux_blocs / k)
+    # C est de rang t-1 : on fixe le dernier effet à 0
+    tau = np.zeros(nb_trait)
+    tau[:-1] = spsolve(c[:-1, :-1], q[:-1]) if nb_trait > 2 else q[:1] / c[0, 0]
+    # Effets des blocs (incluant la moyenne)
+    beta = (totaux_blocs - incidence @ tau) / k
+    return {'blocs': blocs, 'traitements': traitements, 'incidence': incidence, 'k': k, 'c': c, 'q': q,
+            'tau': tau, 'beta': beta}
+
+
+def anova_moindres_carres(blocs, traitements, valeurs):
+    """Ajustement blocs + traitements par moindres carrés (codes entiers, format long)
+
+    Retourne les tableaux d'ANOVA de type I (blocs puis traitements) et de
+    type III (chaque effet ajusté pour l'autre), ainsi que les moyennes
+    ajustées des traitements.
+    """
+    y = np.asarray(valeurs, dtype=float)
+    observees = ~np.isnan(y)
+    y = y[observees]
+    ajustement = _ajustement_additif(np.asarray(blocs)[observees], np.asarray(traitements)[observees], y)
+    blocs, traitements = ajustement['blocs'], ajustement['traitements']
+    n = len(y)
+    nb_blocs, nb_trait = ajustement['incidence'].shape
+    sc_trait_ajustee = float(ajustement['tau'] @ ajustement['q'])
+
+    sc_total = float(((y - y.mean()) ** 2).sum())
+    sc_residuelle_blocs = _sc_intra_groupe(blocs, y, nb_blocs)
+    sc_residuelle_trait = _sc_intra_groupe(traitements, y, nb_trait)
+    sc_erreur = sc_residuelle_blocs - sc_trait_ajustee
+
+    ddl = {
+        'ddl_total': n - 1,
+        'ddl_traitements': nb_trait - 1,
+        'ddl_blocs': nb_blocs - 1,
+        'ddl_erreur': n - nb_blocs - nb_trait + 1,
+    }
+    type_1 = dict(ddl, sc_total=sc_total, sc_erreur=sc_erreur,
+                  sc_blocs=sc_total - sc_residuelle_blocs,
+                  sc_traitements=sc_trait_ajustee)
+    type_3 = dict(ddl, sc_total=sc_total, sc_erreur=sc_erreur,
+                  sc_blocs=sc_residuelle_trait - sc_erreur,
+                  sc_traitements=sc_trait_ajustee)
+    return {
+        'type_I': carres_moyens(type_1, ['traitements', 'blocs'], 'erreur'),
+        'type_III': carres_moyens(type_3, ['traitements', 'blocs'], 'erreur'),
+        'moyennes_ajustees': ajustement['tau'] + ajustement['beta'].mean(),
+    }
+
+
+def residus_moindres_carres(blocs, traitements, valeurs):
+    """Résidus et leviers de l'ajustement blocs + traitements (NaN aux valeurs manquantes)
+
+    Même ajustement que anova_moindres_carres. Le levier d'une observation
+    du bloc b et du traitement t vaut 1/k_b + z' C⁺ z, avec z = e_t - N_b / k_b :
+    seule la matrice C (t × t) est inversée.
+    """
+    y = np.asarray(valeurs, dtype=float)
+    observees = ~np.isnan(y)
+    ajustement = _ajustement_additif(np.asarray(blocs)[observees], np.asarray(traitements)[observees],
+                                     y[observees])
+    b, t = ajustement['blocs'], ajustement['traitements']
+    k = ajustement['k']
+    incidence = ajustement['incidence']
+
+    c_plus = np.linalg.pinv(ajustement['c'].toarray())
+    # C⁺ N' (t × blocs) et N_b C⁺ N_b' par bloc
+    c_plus_nt = np.asarray((incidence @ c_plus).T)
+    quadratiques = np.asarray(incidence.multiply(c_plus_nt.T).sum(axis=1)).ravel()
+    leviers_observes = (1 / k[b] + c_plus[t, t] - 2 * c_plus_nt[t, b] / k[b] + quadratiques[b] / k[b] ** 2)
+
+    residus = np.full(len(y), np.nan)
+    leviers = np.full(len(y), np.nan)
+    residus[observees] = y[observees] - ajustement['beta'][b] - ajustement['tau'][t]
+    leviers[observees] = leviers_observes
+    return residus, leviers
+
+
+def anova_brc_incomplet(valeurs):
+    """Choisit la méthode selon le nombre de parcelles perdues (tableau blocs × traitements)"""
+    nb_manquantes = int(np.isnan(valeurs).sum())
+    if nb_manquantes <= SEUIL_YATES:
+        resultats = anova_parcelles_manquantes(valeurs)
+        resultats['methode'] = 'Yates'
+        return resultats
+    nb_blocs, nb_trait = np.shape(valeurs)
+    blocs, traitements = np.indices((nb_blocs, nb_trait))
+    resultats = anova_moindres_carres(blocs.ravel(), traitements.ravel(), np.ravel(valeurs))
+    resultats = dict(resultats['type_I'], moyennes_ajustees=resultats['moyennes_ajustees'])
+    resultats['methode'] = 'Moindres carrés'
+    return resultats
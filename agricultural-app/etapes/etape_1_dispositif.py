@@ -0,0 +1,66 @@
+import streamlit as st
+
+from etat import etat
+
+st.header("📋 Étape 1: Comprendre et choisir le dispositif expérimental")
+
+col1, col2 = st.columns([1, 1])
+
+with col1:
+    st.subheader("Dispositifs disponibles :")
+    dispositif_choisi = st.radio(
+        "Sélectionnez votre dispositif :",
+        [
+            "Bloc Randomisé Complet (BRC)",
+            "Carré Latin",
+            "Dispositif en Split-plot"
+        ]
+    )
+    etat.dispositif = dispositif_choisi
+
+with col2:
+    st.subheader("Pourquoi ce choix ?")
+    if dispositif_choisi == "Bloc Randomisé Complet (BRC)":
+        st.info("""
+        **Bloc Randomisé Complet (BRC)**
+        **Principe :** Contrôler une source de variation connue
+        **Structure :**
+        - Traitements répartis aléatoirement dans chaque bloc
+        - Chaque traitement apparaît une fois par bloc
+        - Traitements simples ou combinaisons de deux facteurs (A × B)
+
+        **Sources de variation :**
+        - Variation due aux traitements
+        - Variation due aux blocs
+        - Variation résiduelle (erreur)
+        """)
+    elif dispositif_choisi == "Carré Latin":
+        st.info("""
+        **Carré Latin**
+        **Principe :** Contrôler deux sources de variation
+
+        **Structure :**
+        - Lignes et colonnes
+        - Chaque traitement apparaît une fois par ligne et par colonne
+        **Sources de variation :**
+        - Variation due aux traitements
+        - Variation due aux lignes
+        - Variation due aux colonnes
+        - Variation résiduelle
+        """)
+    else:
+        st.info("""
+        **Dispositif Split-plot**
+        **Principe :** Deux facteurs avec précisions différentes
+        **Structure :**
+        - Parcelles principales (facteur A)
+        - Sous-parcelles (facteur B)
+        **Sources de variation :**
+        - Variation facteur A
+        - Variation facteur B
+        - Interaction A×B
+        - Erreurs principales et secondaires
+        """)
+
+if st.button("✅ J'ai compris le principe, passer à l'étape suivante"):
+    st.success("Dispositif sélectionné ! Passez à l'étape 2.")
@@ -0,0 +1,240 @@
+import io
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from banque_exercices import NB_EXERCICES_PAR_TAILLE, exercice, identifiant_exercice
+from etat import afficher_retours, etat, exiger
+from historique import HistoriqueSaisie
+from matrice import MatriceEssai
+from sous_echantillonnage import anova_sous_echantillons, tableau_3d
+from stockage import RACINE_STOCKAGES, StockageParcelles, est_stockage, resoudre_stockage, version_stockage
+from validation import messages_validation, valider_colonnes
+
+@st.cache_data(show_spinner="Lecture du stockage colonnes...")
+def moyennes_stockage(dossier, version):
+    """Moyennes par parcelle lues par morceaux (la version invalide le cache)"""
+    return StockageParcelles(dossier).moyennes_parcelles()
+
+@st.cache_data(show_spinner="Analyse des sous-échantillons...")
+def analyse_sous_echantillons(fichier):
+    """ANOVA emboîtée d'un CSV (Bloc, Traitement, Valeur), une ligne par échantillon"""
+    valeurs, niveaux = tableau_3d(pd.read_csv(io.BytesIO(fichier)))
+    return anova_sous_echantillons(valeurs), valeurs.shape
+
+def recopier_version(historique):
+    """Recopie la version courante de l'historique dans les champs de saisie (avant leur création)"""
+    perdues = []
+    for (b, t), valeur in np.ndenumerate(historique.valeurs):
+        cle = f"B{b+1}_T{t+1}"
+        if np.isnan(valeur):
+            perdues.append(cle)
+        else:
+            st.session_state[cle] = float(valeur)
+    st.session_state.parcelles_perdues = perdues
+
+def changer_de_version(deplacement):
+    """Garde les résultats de la version quittée et reprend ceux de la nouvelle version"""
+    etat.historique.memoriser_resultats(etat.resultats_derives())
+    deplacement(etat.historique)
+    etat.remplacer_resultats_derives(etat.historique.resultats_version())
+
+def naviguer_historique(deplacement):
+    # Rappel des boutons : les champs sont remis à jour avant d'être recréés
+    changer_de_version(deplacement)
+    recopier_version(etat.historique)
+
+exiger(etat.dispositif is not None, "⚠️ Retournez à l'étape 1 pour choisir un dispositif !")
+
+st.header("📊 Étape 2: Saisie des données expérimentales")
+st.write(f"**Dispositif choisi :** {etat.dispositif}")
+
+if etat.dispositif == "Bloc Randomisé Complet (BRC)":
+    col1, col2 = st.columns([1, 1])
+
+    with col1:
+        source = st.radio(
+            "Source des données :",
+            ["Saisie libre", "Exercice de la banque", "Stockage sur disque", "Sous-échantillons (CSV)"],
+            horizontal=True
+        )
+        factoriel = source == "Saisie libre" and st.checkbox(
+            "Traitements factoriels (facteur A × facteur B)")
+        if source == "Stockage sur disque":
+            nom_stockage = st.text_input("Stockage colonnes (créé par stockage.py) :",
+                                         help=f"Nom d'un sous-dossier de {RACINE_STOCKAGES}")
+        elif source == "Sous-échantillons (CSV)":
+            fichier_echantillons = st.file_uploader(
+                "CSV Bloc, Traitement, Valeur (une ligne par échantillon)", type="csv")
+        elif factoriel:
+            niveaux_a = st.number_input("Niveaux du facteur A", min_value=2, max_value=6, value=2)
+            niveaux_b = st.number_input("Niveaux du facteur B", min_value=2, max_value=6, value=3)
+            nb_traitements = niveaux_a * niveaux_b
+            nb_blocs = st.number_input("Nombre de blocs", min_value=2, max_value=10, value=3)
+        else:
+            nb_traitements = st.number_input("Nombre de traitements", min_value=2 if source == "Saisie libre" else 3,
+                                             max_value=10 if source == "Saisie libre" else 6, value=4)
+            nb_blocs = st.number_input("Nombre de blocs", min_value=2 if source == "Saisie libre" else 3,
+                                       max_value=10 if source == "Saisie libre" else 5, value=3)
+
+    with col2:
+        st.write("**Questions de réflexion :**")
+        st.write("- Pourquoi utiliser plusieurs blocs ?")
+        st.write("- Que représente chaque bloc dans votre expérience ?")
+
+    if source == "Exercice de la banque":
+        st.subheader("Exercice attribué :")
+        numero = st.number_input("Numéro de l'exercice", min_value=0,
+                                 max_value=NB_EXERCICES_PAR_TAILLE - 1, value=0)
+        identifiant = identifiant_exercice('BRC', (nb_traitements, nb_blocs), numero)
+        valeurs_exercice = exercice(identifiant)['valeurs']
+        st.write(f"**Identifiant :** `{identifiant}`")
+        valeurs_essai = valeurs_exercice
+        etat.exercice_id = identifiant
+    elif source == "Stockage sur disque":
+        try:
+            dossier_stockage = resoudre_stockage(nom_stockage) if nom_stockage else None
+        except ValueError as erreur:
+            st.error(f"⚠️ {erreur}")
+            st.stop()
+        if dossier_stockage is None or not est_stockage(dossier_stockage):
+            st.warning("⚠️ Indiquez un stockage créé avec : "
+                       f"`python stockage.py donnees.csv {RACINE_STOCKAGES}/nom`")
+            st.stop()
+        # Seules les moyennes par parcelle sont chargées en mémoire
+        moyennes = moyennes_stockage(dossier_stockage, version_stockage(dossier_stockage))
+        nb_blocs, nb_traitements = moyennes.shape
+        st.write(f"**{nb_blocs} blocs × {nb_traitements} traitements** (moyennes par parcelle)")
+        valeurs_essai = moyennes
+        etat.exercice_id = None
+    elif source == "Sous-échantillons (CSV)":
+        if fichier_echantillons is None:
+            st.info("Chaque parcelle (bloc × traitement) doit compter le même nombre d'échantillons")
+            st.stop()
+        try:
+            resultats_echantillons, (nb_blocs, nb_traitements, nb_echantillons) = \
+                analyse_sous_echantillons(fichier_echantillons.getvalue())
+        except (KeyError, ValueError) as erreur:
+            st.error(f"⚠️ Fichier invalide : {erreur}")
+            st.stop()
+        st.write(f"**{nb_blocs} blocs × {nb_traitements} traitements × {nb_echantillons} échantillons** "
+                 "(l'analyse pas à pas porte sur les moyennes par parcelle)")
+        valeurs_essai = resultats_echantillons['moyennes_parcelles']
+        etat.exercice_id = None
+    else:
+        st.subheader("Saisissez vos données :")
+
+        st.write("**Tableau de saisie des données :**")
+
+        historique = etat.historique
+        if historique is None or historique.forme != (nb_blocs, nb_traitements):
+            historique = HistoriqueSaisie(10.0 + np.random.normal(0, 2, (nb_blocs, nb_traitements)))
+            etat.historique = historique
+            recopier_version(historique)
+        elif any(f"B{b+1}_T{t+1}" not in st.session_state
+                 for b in range(nb_blocs) for t in range(nb_traitements)):
+            # Retour à l'étape 2 : Streamlit a oublié les champs, l'historique les redonne
+            recopier_version(historique)
+
+        col_annuler, col_retablir, col_version = st.columns([1, 1, 3])
+        with col_annuler:
+            st.button("↩️ Annuler", disabled=not historique.peut_annuler,
+                      on_click=naviguer_historique, args=(HistoriqueSaisie.annuler,))
+        with col_retablir:
+            st.button("↪️ Rétablir", disabled=not historique.peut_retablir,
+                      on_click=naviguer_historique, args=(HistoriqueSaisie.retablir,))
+        with col_version:
+            if historique.nb_versions > 1:
+                st.session_state.version_saisie = historique.position
+                st.slider("Version des données", 0, historique.nb_versions - 1, key="version_saisie",
+                          on_change=lambda: naviguer_historique(
+                              lambda h: h.aller_a(st.session_state.version_saisie)))
+                st.caption(f"{historique.nb_versions} versions, {historique.taille_octets()} octets "
+                           "d'historique (seules les cellules modifiées sont gardées)")
+
+        donnees_saisies = {}
+        for b in range(nb_blocs):
+            st.write(f"**Bloc_{b+1} :**")
+            cols_bloc = st.columns(nb_traitements)
+            for t in range(nb_traitements):
+                with cols_bloc[t]:
+                    key = f"B{b+1}_T{t+1}"
+                    donnees_saisies[key] = st.number_input(
+                        f"A{t // niveaux_b + 1}B{t % niveaux_b + 1}" if factoriel else f"T{t+1}", 
+                        key=key,
+                        step=0.1
+                    )
+
+        parcelles_perdues = st.multiselect(
+            "Parcelles perdues (grêle, ravageurs, erreur de récolte...) :",
+            list(donnees_saisies.keys()),
+            key="parcelles_perdues"
+        )
+        for key in parcelles_perdues:
+            donnees_saisies[key] = np.nan
+        if any(all(f"B{b+1}_T{t+1}" in parcelles_perdues for t in range(nb_traitements)) for b in range(nb_blocs)) \
+                or any(all(f"B{b+1}_T{t+1}" in parcelles_perdues for b in range(nb_blocs)) for t in range(nb_traitements)):
+            st.error("⚠️ Un bloc ou un traitement entier est perdu : réduisez le nombre de blocs ou de traitements.")
+            st.stop()
+        valeurs_essai = np.array(list(donnees_saisies.values()), dtype=float).reshape(nb_blocs, nb_traitements)
+        if not np.array_equal(valeurs_essai, historique.valeurs, equal_nan=True):
+            # Nouvelle saisie : les résultats calculés sur l'ancienne version ne valent plus
+            changer_de_version(lambda h: h.enregistrer(valeurs_essai))
+        etat.exercice_id = None
+
+    matrice = MatriceEssai(valeurs_essai)
+    etat.nb_traitements = nb_traitements
+    etat.nb_blocs = nb_blocs
+    etat.nb_manquantes = matrice.nb_manquantes
+    # Traitement t = combinaison (A = t // niveaux B, B = t % niveaux B)
+    etat.facteurs = (niveaux_a, niveaux_b) if factoriel else None
+    etat.sous_echantillons = (
+        resultats_echantillons if source == "Sous-échantillons (CSV)" else None)
+
+    with st.expander("🗺️ Position des parcelles dans le champ (optionnel)"):
+        st.write("Rang et colonne de chaque parcelle, pour l'ajustement spatial de l'étape 4. "
+                 "Par défaut : un bloc par rang, les traitements dans l'ordre.")
+        positions = st.data_editor(
+            matrice.en_long()[['Bloc', 'Traitement', 'Rang', 'Colonne']],
+            disabled=['Bloc', 'Traitement'], hide_index=True, width='stretch',
+            key=f"positions_{nb_blocs}x{nb_traitements}"
+        )
+        if positions[['Rang', 'Colonne']].isna().any().any():
+            st.warning("⚠️ Positions incomplètes : les positions par défaut sont conservées")
+        else:
+            matrice = matrice.avec_positions(positions['Rang'].to_numpy().reshape(matrice.forme),
+                                             positions['Colonne'].to_numpy().reshape(matrice.forme))
+    etat.matrice = matrice
+
+    with st.expander("🔎 Contrôles de saisie"):
+        col_min, col_max = st.columns([1, 1])
+        with col_min:
+            borne_min = st.number_input("Valeur minimale plausible", value=0.0)
+        with col_max:
+            borne_max = st.number_input("Valeur maximale plausible", value=1000.0)
+    # Codes des blocs et des traitements de chaque parcelle, dans l'ordre de matrice.valeurs
+    codes_blocs, codes_trait = np.indices(matrice.forme)
+    controles = valider_colonnes(codes_blocs.ravel(), codes_trait.ravel(), matrice.valeurs.ravel(),
+                                 borne_min, borne_max)
+
+    st.subheader("Récapitulatif des données :")
+    signalees = controles['hors_bornes'] | controles['aberrant']
+    if signalees.any():
+        # Cellules signalées : rouge (hors bornes), orange (valeur suspecte). Le style
+        # ajoute le texte et le CSS de chaque cellule : seulement s'il y a quelque chose à montrer
+        couleurs = matrice.en_dataframe(np.select(
+            [controles['hors_bornes'].reshape(matrice.forme), controles['aberrant'].reshape(matrice.forme)],
+            ['background-color: #ffcdd2', 'background-color: #ffe0b2'], ''))
+        st.dataframe(matrice.en_dataframe().style.apply(lambda _: couleurs, axis=None),
+                     width='stretch')
+    else:
+        st.dataframe(matrice.en_dataframe(), width='stretch')
+    afficher_retours(messages_validation(controles))
+    if signalees.any():
+        st.dataframe(matrice.en_long().loc[signalees, ['Bloc', 'Traitement', 'Valeur']].assign(
+            **{'Résidu studentisé': controles['residu_studentise'][signalees].round(2)}),
+            hide_index=True, width='stretch')
+
+    if st.button("✅ Données saisies, passer aux calculs DDL"):
+        st.success("Données enregistrées ! Passez à l'étape 3.")
@@ -0,0 +1,74 @@
+import streamlit as st
+
+from anova import ddl_brc
+from correction import corriger_une
+from etat import afficher_retours, etat, exiger, reponses_attendues
+
+exiger(etat.matrice is not None, "⚠️ Saisissez d'abord vos données à l'étape 2 !")
+
+st.header("🧮 Étape 3: Comprendre et calculer les Degrés de Liberté (DDL)")
+
+col1, col2 = st.columns([1, 1])
+
+with col1:
+    st.subheader("🤔 D'abord, réfléchissons...")
+    st.write("**Questions :**")
+    st.write("1. Combien avez-vous d'observations au total ?")
+    st.write("2. Combien de paramètres allez-vous estimer ?")
+    st.write("3. Pourquoi le DDL total = n - 1 ?")
+
+    nb_obs_total = etat.matrice.nb_observations
+    nb_manquantes = etat.nb_manquantes
+    nb_trait = etat.nb_traitements  
+    nb_blocs = etat.nb_blocs
+
+    st.write(f"**Dans votre expérience :**")
+    st.write(f"- Nombre total d'observations : {nb_obs_total}")
+    st.write(f"- Nombre de traitements : {nb_trait}")
+    st.write(f"- Nombre de blocs : {nb_blocs}")
+    if nb_manquantes > 0:
+        st.write(f"- Parcelles perdues : {nb_manquantes} (chacune retire un DDL à l'erreur)")
+    if etat.facteurs:
+        niveaux_a, niveaux_b = etat.facteurs
+        st.write(f"- Traitements factoriels : {niveaux_a} niveaux de A × {niveaux_b} niveaux de B")
+        st.info(f"Les DDL Traitements se décomposent ensuite en A ({niveaux_a}-1), "
+                f"B ({niveaux_b}-1) et interaction A×B (({niveaux_a}-1)×({niveaux_b}-1)).")
+
+with col2:
+    st.subheader("✏️ Calculez vous-même :")
+
+    attendues = reponses_attendues() or ddl_brc(nb_trait, nb_blocs, nb_manquantes)
+
+    st.write("**DDL Total :**")
+    ddl_total_etudiant = st.number_input("DDL Total = ", value=0, key="ddl_total_etudiant")
+    ddl_total_correct = attendues['ddl_total']
+
+    st.write("**DDL Traitements :**")
+    ddl_trait_etudiant = st.number_input("DDL Traitements = ", value=0, key="ddl_trait_etudiant")
+    ddl_trait_correct = attendues['ddl_traitements']
+
+    st.write("**DDL Blocs :**")
+    ddl_blocs_etudiant = st.number_input("DDL Blocs = ", value=0, key="ddl_blocs_etudiant")
+    ddl_blocs_correct = attendues['ddl_blocs']
+
+    st.write("**DDL Erreur :**")
+    ddl_erreur_etudiant = st.number_input("DDL Erreur = ", value=0, key="ddl_erreur_etudiant")
+    ddl_erreur_correct = attendues['ddl_erreur']
+
+if st.button("🔍 Vérifier mes calculs"):
+    tout_juste, retours = corriger_une(
+        {'ddl_total': ddl_total_etudiant, 'ddl_traitements': ddl_trait_etudiant,
+         'ddl_blocs': ddl_blocs_etudiant, 'ddl_erreur': ddl_erreur_etudiant},
+        attendues,
+        contexte={'nb_obs': nb_obs_total, 'nb_trait': nb_trait, 'nb_blocs': nb_blocs}
+    )
+    afficher_retours(retours)
+
+    somme_ddl = ddl_trait_correct + ddl_blocs_correct + ddl_erreur_correct
+    if somme_ddl == ddl_total_correct:
+        st.info(f"✅ Vérification : {ddl_trait_correct} + {ddl_blocs_correct} + {ddl_erreur_correct} = {ddl_total_correct}")
+
+    if tout_juste:
+        etat.ddl_calculated = True
+        st.balloons()
+        st.success("🎉 Parfait ! Vous maîtrisez les DDL. Passez à l'étape 4.")
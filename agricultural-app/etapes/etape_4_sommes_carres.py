@@ -0,0 +1,182 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from affichage import afficher_tableau
+from anova import anova_factoriel_brc, effets_factoriels
+from cache_resultats import memoiser
+from covariance import anova_covariance, tableau_anova_covariance
+from donnees_manquantes import anova_brc_incomplet
+from etat import etat, exiger
+from rapports import decimales_anova, libelle_effet
+from sous_echantillonnage import tableau_anova_emboitee
+from spatial import ajustement_papadakis, index_voisins
+
+# Les ANOVA les plus coûteuses passent par le cache disque commun à tous les
+# processus : un exercice traité par toute une classe n'est calculé qu'une fois
+@st.cache_data(show_spinner=False)
+@memoiser('anova_brc_incomplet')
+def anova_incomplete_cache(valeurs):
+    return anova_brc_incomplet(valeurs)
+
+@st.cache_data(show_spinner=False)
+@memoiser('anova_factoriel_brc')
+def anova_factorielle_cache(valeurs):
+    return anova_factoriel_brc(valeurs)
+
+@st.cache_data(show_spinner=False)
+def voisins_cache(rangs, colonnes):
+    """Index creux des parcelles voisines, construit une fois par plan de champ"""
+    return index_voisins(rangs, colonnes)
+
+exiger(etat.ddl_calculated, "⚠️ Maîtrisez d'abord les DDL à l'étape 3 !")
+
+st.header("🧮 Étape 4: Calcul des Sommes de Carrés")
+
+matrice = etat.matrice
+valeurs = matrice.valeurs
+
+col1, col2 = st.columns([1, 1])
+
+with col1:
+    st.subheader("📊 Vos données :")
+    st.dataframe(matrice.en_dataframe())
+
+    moyenne_generale = matrice.moyenne_generale
+    st.write(f"**Moyenne générale :** {moyenne_generale:.3f}")
+
+    moy_traitements = matrice.moyennes_traitements
+    st.write("**Moyennes par traitement :**")
+    for t, moy in zip(matrice.traitements, moy_traitements):
+        st.write(f"- Traitement {t}: {moy:.3f}")
+
+    moy_blocs = matrice.moyennes_blocs
+    st.write("**Moyennes par bloc :**")
+    for b, moy in zip(matrice.blocs, moy_blocs):
+        st.write(f"- Bloc {b}: {moy:.3f}")
+
+with col2:
+    st.subheader("🔢 Formules à comprendre :")
+    st.latex(r'SC_{Total} = \sum_{i,j} (X_{ij} - \bar{X})^2')
+    st.latex(r'SC_{Traitements} = b \sum_j (\bar{X}_j - \bar{X})^2')
+    st.latex(r'SC_{Blocs} = t \sum_i (\bar{X}_i - \bar{X})^2')
+    st.latex(r'SC_{Erreur} = SC_{Total} - SC_{Traitements} - SC_{Blocs}')
+
+st.subheader("📈 Calculs détaillés :")
+
+if etat.nb_manquantes > 0:
+    resultats = anova_incomplete_cache(valeurs)
+    if resultats['methode'] == 'Yates':
+        st.warning(f"⚠️ {etat.nb_manquantes} parcelle(s) perdue(s) : valeurs estimées "
+                   "par la formule de Yates, DDL de l'erreur diminués d'autant")
+        st.latex(r'x = \frac{t \cdot T + b \cdot B - G}{(t-1)(b-1)}')
+        st.dataframe(matrice.en_dataframe(resultats['valeurs_estimees']).round(3))
+    else:
+        st.warning(f"⚠️ {etat.nb_manquantes} parcelles perdues : ajustement par moindres "
+                   "carrés (SC de type I, traitements ajustés pour les blocs)")
+    sc_total = resultats['sc_total']
+    sc_traitements = resultats['sc_traitements']
+    sc_blocs = resultats['sc_blocs']
+    sc_erreur = resultats['sc_erreur']
+else:
+    sc_total = ((valeurs - moyenne_generale) ** 2).sum()
+    sc_traitements = etat.nb_blocs * ((moy_traitements - moyenne_generale) ** 2).sum()
+    sc_blocs = etat.nb_traitements * ((moy_blocs - moyenne_generale) ** 2).sum()
+    sc_erreur = sc_total - sc_traitements - sc_blocs
+
+st.write(f"**SC Total :** {sc_total:.3f}")
+st.write(f"**SC Traitements :** {sc_traitements:.3f}")
+st.write(f"**SC Blocs :** {sc_blocs:.3f}")
+st.write(f"**SC Erreur :** {sc_erreur:.3f}")
+
+etat.sc_total = sc_total
+etat.sc_traitements = sc_traitements
+etat.sc_blocs = sc_blocs
+etat.sc_erreur = sc_erreur
+
+if etat.sous_echantillons is not None:
+    st.subheader("🌿 Sous-échantillons : ANOVA emboîtée")
+    st.write("Les SC ci-dessus portent sur les moyennes par parcelle. Avec tous les échantillons, "
+             "l'erreur se sépare en erreur expérimentale (entre parcelles) et erreur "
+             "d'échantillonnage (dans les parcelles) ; le F des traitements reste le même.")
+    tableau_emboitee = tableau_anova_emboitee(etat.sous_echantillons)
+    afficher_tableau(tableau_emboitee, decimales_anova(tableau_emboitee))
+
+etat.factoriel = None
+if etat.facteurs:
+    st.subheader("🧩 Décomposition factorielle de la SC Traitements")
+    if etat.nb_manquantes > 0:
+        st.warning("⚠️ La décomposition en A, B et A×B demande un dispositif complet")
+    else:
+        # Tableau blocs × A × B : les traitements sont rangés A puis B
+        factoriel = anova_factorielle_cache(valeurs.reshape(
+            etat.nb_blocs, *etat.facteurs))
+        st.latex(r'SC_{Traitements} = SC_A + SC_B + SC_{A \times B}')
+        for effet in effets_factoriels(2):
+            st.write(f"**SC {libelle_effet(effet)} :** {factoriel[f'sc_{effet}']:.3f}")
+        etat.factoriel = factoriel
+
+with st.expander("🗺️ Ajustement spatial (Papadakis)"):
+    st.write("La covariable de chaque parcelle est la moyenne des résidus (écarts aux moyennes "
+             "de traitement) de ses voisines dans le champ : l'ANCOVA retire ainsi les "
+             "tendances du sol à l'intérieur des blocs.")
+    if etat.nb_manquantes > 0:
+        st.warning("⚠️ L'ajustement spatial demande un dispositif complet")
+    else:
+        try:
+            spatial = ajustement_papadakis(valeurs, matrice.rangs, matrice.colonnes,
+                                           voisins_cache(matrice.rangs, matrice.colonnes))
+        except ValueError as erreur:
+            st.error(f"⚠️ {erreur}")
+        except np.linalg.LinAlgError:
+            st.error("⚠️ Aucune parcelle n'a de voisine : vérifiez les positions")
+        else:
+            tableau_spatial = tableau_anova_covariance(spatial)
+            afficher_tableau(tableau_spatial, decimales_anova(tableau_spatial))
+            ddl_erreur_brc = (etat.nb_traitements - 1) * (etat.nb_blocs - 1)
+            efficacite = (sc_erreur / ddl_erreur_brc) / spatial['cm_erreur']
+            st.write(f"**Efficacité relative de l'ajustement :** {efficacite:.2f} "
+                     "(CM Erreur sans ajustement ÷ CM Erreur ajusté)")
+
+with st.expander("📐 Analyse de covariance (ANCOVA)"):
+    st.write("Une covariable mesurée sur chaque parcelle (nombre de plants, azote initial...) "
+             "peut expliquer une partie de l'erreur : les SC, les F et les moyennes des "
+             "traitements sont alors ajustés.")
+    noms_covariables = [nom.strip() for nom in st.text_input(
+        "Covariables (séparées par des virgules) :", "Nombre de plants").split(',') if nom.strip()]
+    ddl_erreur_brc = (etat.nb_traitements - 1) * (etat.nb_blocs - 1)
+    if etat.nb_manquantes > 0:
+        st.warning("⚠️ L'ANCOVA demande un dispositif complet")
+    elif not noms_covariables or len(noms_covariables) >= ddl_erreur_brc:
+        st.warning(f"⚠️ Indiquez entre 1 et {ddl_erreur_brc - 1} covariables")
+    else:
+        saisie_covariables = st.data_editor(
+            matrice.en_long()[['Bloc', 'Traitement']].assign(**{nom: np.nan for nom in noms_covariables}),
+            disabled=['Bloc', 'Traitement'], hide_index=True, width='stretch',
+            key=f"covariables_{etat.nb_blocs}x{etat.nb_traitements}"
+        )
+        if saisie_covariables[noms_covariables].isna().any().any():
+            st.info("Complétez les covariables de toutes les parcelles")
+        else:
+            # Lignes de l'éditeur dans l'ordre bloc puis traitement, comme matrice.valeurs
+            covariables = saisie_covariables[noms_covariables].to_numpy(dtype=float).reshape(
+                matrice.forme + (len(noms_covariables),))
+            try:
+                ancova = anova_covariance(valeurs, covariables)
+            except np.linalg.LinAlgError:
+                st.error("⚠️ Covariable constante ou entièrement expliquée par les blocs et "
+                         "traitements : ajustement impossible")
+            else:
+                tableau_ancova = tableau_anova_covariance(ancova)
+                afficher_tableau(tableau_ancova, decimales_anova(tableau_ancova))
+                st.write("**Coefficients de régression :** " + " ; ".join(
+                    f"{nom} : {coefficient:.3f}"
+                    for nom, coefficient in zip(noms_covariables, ancova['coefficients'])))
+                st.write("**Moyennes des traitements :**")
+                st.dataframe(pd.DataFrame({
+                    'Moyenne observée': matrice.moyennes_traitements,
+                    'Moyenne ajustée': ancova['moyennes_ajustees'],
+                }, index=pd.Index(matrice.traitements, name='Traitement')).round(3), width='stretch')
+
+if st.button("✅ J'ai compris les sommes de carrés"):
+    st.success("Parfait ! Passez à l'étape 5 pour les carrés moyens.")
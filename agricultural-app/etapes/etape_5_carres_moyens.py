@@ -0,0 +1,99 @@
+import streamlit as st
+
+from anova import ddl_brc, effets_factoriels
+from correction import corriger_une
+from etat import afficher_retours, etat, exiger, reponses_attendues
+from rapports import libelle_effet
+
+exiger(etat.sc_total is not None, "⚠️ Calculez d'abord les sommes de carrés à l'étape 4 !")
+
+st.header("📊 Étape 5: Des Sommes de Carrés aux Carrés Moyens")
+
+col1, col2 = st.columns([1, 1])
+
+with col1:
+    st.subheader("🧠 Principe des Carrés Moyens")
+    st.info("""
+    **Carré Moyen = Somme de Carrés ÷ DDL**
+
+    Pourquoi diviser par les DDL ?
+    - Pour obtenir une variance estimée
+    - Pour comparer des sources de variation
+    - Pour calculer le test F
+    """)
+
+    st.subheader("📋 Récapitulatif précédent :")
+
+    nb_trait = etat.nb_traitements
+    nb_blocs = etat.nb_blocs
+    ddl = ddl_brc(nb_trait, nb_blocs, etat.nb_manquantes)
+    ddl_trait = ddl['ddl_traitements']
+    ddl_blocs = ddl['ddl_blocs']
+    ddl_erreur = ddl['ddl_erreur']
+
+    st.write("**DDL :**")
+    st.write(f"- Traitements: {ddl_trait}")
+    st.write(f"- Blocs: {ddl_blocs}")
+    st.write(f"- Erreur: {ddl_erreur}")
+
+    st.write("**Sommes de Carrés :**")
+    st.write(f"- SC Traitements: {etat.sc_traitements:.3f}")
+    st.write(f"- SC Blocs: {etat.sc_blocs:.3f}")
+    st.write(f"- SC Erreur: {etat.sc_erreur:.3f}")
+
+with col2:
+    st.subheader("✏️ Calculez les Carrés Moyens :")
+
+    st.write("**CM Traitements :**")
+    cm_trait_etudiant = st.number_input(
+        f"CM Traitements = {etat.sc_traitements:.3f} ÷ {ddl_trait} =",
+        value=0.0,
+        step=0.001,
+        key="cm_trait_etudiant"
+    )
+
+    st.write("**CM Blocs :**")
+    cm_blocs_etudiant = st.number_input(
+        f"CM Blocs = {etat.sc_blocs:.3f} ÷ {ddl_blocs} =",
+        value=0.0,
+        step=0.001,
+        key="cm_blocs_etudiant"
+    )
+
+    st.write("**CM Erreur :**")
+    cm_erreur_etudiant = st.number_input(
+        f"CM Erreur = {etat.sc_erreur:.3f} ÷ {ddl_erreur} =",
+        value=0.0,
+        step=0.001,
+        key="cm_erreur_etudiant"
+    )
+
+attendues = reponses_attendues()
+if attendues is not None:
+    cm_trait_correct = attendues['cm_traitements']
+    cm_blocs_correct = attendues['cm_blocs']
+    cm_erreur_correct = attendues['cm_erreur']
+else:
+    cm_trait_correct = etat.sc_traitements / ddl_trait
+    cm_blocs_correct = etat.sc_blocs / ddl_blocs
+    cm_erreur_correct = etat.sc_erreur / ddl_erreur
+
+if st.button("🔍 Vérifier mes calculs CM"):
+    tout_juste, retours = corriger_une(
+        {'cm_traitements': cm_trait_etudiant, 'cm_blocs': cm_blocs_etudiant, 'cm_erreur': cm_erreur_etudiant},
+        {'cm_traitements': cm_trait_correct, 'cm_blocs': cm_blocs_correct, 'cm_erreur': cm_erreur_correct}
+    )
+    afficher_retours(retours)
+
+    if tout_juste:
+        etat.cm_traitements = cm_trait_correct
+        etat.cm_blocs = cm_blocs_correct
+        etat.cm_erreur = cm_erreur_correct
+        st.balloons()
+        st.success("🎉 Excellent ! Vous pouvez maintenant calculer F !")
+
+if etat.factoriel is not None:
+    st.info("**Décomposition factorielle :** " + " ; ".join(
+        f"CM {libelle_effet(effet)} = {etat.factoriel[f'sc_{effet}']:.3f} ÷ "
+        f"{etat.factoriel[f'ddl_{effet}']} = {etat.factoriel[f'cm_{effet}']:.3f}"
+        for effet in effets_factoriels(2)))
@@ -0,0 +1,74 @@
+import streamlit as st
+
+from anova import effets_factoriels
+from correction import corriger_une
+from etat import afficher_retours, etat, exiger, reponses_attendues
+from rapports import libelle_effet
+
+exiger(etat.cm_erreur is not None, "⚠️ Calculez d'abord les carrés moyens à l'étape 5 !")
+
+st.header("🎯 Étape 6: Calcul du F calculé")
+
+col1, col2 = st.columns([1, 1])
+
+with col1:
+    st.subheader("🧠 Comprendre le test F")
+    st.info("""
+    **F = Carré Moyen de l'effet / Carré Moyen de l'erreur**
+
+    **Logique :**
+    - Si l'effet est significatif → F sera grand
+    - Si pas d'effet → F sera proche de 1
+    - L'erreur est au dénominateur (référence)
+    """)
+
+    st.subheader("📊 Vos Carrés Moyens :")
+    st.write(f"- CM Traitements: {etat.cm_traitements:.3f}")
+    st.write(f"- CM Blocs: {etat.cm_blocs:.3f}")  
+    st.write(f"- CM Erreur: {etat.cm_erreur:.3f}")
+
+with col2:
+    st.subheader("✏️ Calculez le F :")
+
+    st.write("**F Traitements :**")
+    f_trait_etudiant = st.number_input(
+        f"F = {etat.cm_traitements:.3f} ÷ {etat.cm_erreur:.3f} =",
+        value=0.0,
+        step=0.01,
+        key="f_trait_etudiant"
+    )
+
+    st.write("**F Blocs :**")
+    f_blocs_etudiant = st.number_input(
+        f"F = {etat.cm_blocs:.3f} ÷ {etat.cm_erreur:.3f} =",
+        value=0.0,
+        step=0.01,
+        key="f_blocs_etudiant"
+    )
+
+attendues = reponses_attendues()
+if attendues is not None:
+    f_trait_correct = attendues['f_traitements']
+    f_blocs_correct = attendues['f_blocs']
+else:
+    f_trait_correct = etat.cm_traitements / etat.cm_erreur
+    f_blocs_correct = etat.cm_blocs / etat.cm_erreur
+
+if st.button("🔍 Vérifier mes calculs F"):
+    tout_juste, retours = corriger_une(
+        {'f_traitements': f_trait_etudiant, 'f_blocs': f_blocs_etudiant},
+        {'f_traitements': f_trait_correct, 'f_blocs': f_blocs_correct}
+    )
+    afficher_retours(retours)
+
+    if tout_juste:
+        etat.f_traitements = f_trait_correct
+        etat.f_blocs = f_blocs_correct
+        st.balloons()
+        st.success("🎉 F calculés ! Maintenant comparons avec F théorique !")
+
+if etat.factoriel is not None:
+    st.info("**Décomposition factorielle :** " + " ; ".join(
+        f"F {libelle_effet(effet)} = {etat.factoriel[f'cm_{effet}']:.3f} ÷ "
+        f"{etat.factoriel['cm_erreur']:.3f} = {etat.factoriel[f'f_{effet}']:.3f}"
+        for effet in effets_factoriels(2)))
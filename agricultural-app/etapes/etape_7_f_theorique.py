@@ -0,0 +1,87 @@
+import pandas as pd
+import streamlit as st
+
+from affichage import afficher_tableau
+from anova import ddl_brc, effets_factoriels
+from distribution_f import ALPHAS, f_critique, graphique_explorateur
+from etat import etat, exiger
+from rapports import libelle_effet
+
+exiger(etat.f_traitements is not None, "⚠️ Calculez d'abord le F à l'étape 6 !")
+
+st.header("📊 Étape 7: Comparaison avec F théorique")
+
+col1, col2 = st.columns([1, 1])
+
+with col1:
+    st.subheader("🎯 Vos F calculés :")
+    st.write(f"- **F Traitements :** {etat.f_traitements:.3f}")
+    st.write(f"- **F Blocs :** {etat.f_blocs:.3f}")
+
+    nb_trait = etat.nb_traitements
+    nb_blocs = etat.nb_blocs
+    ddl = ddl_brc(nb_trait, nb_blocs, etat.nb_manquantes)
+    ddl1_trait = ddl['ddl_traitements']
+    ddl2 = ddl['ddl_erreur']
+    ddl1_blocs = ddl['ddl_blocs']
+
+    st.write(f"**DDL pour Traitements :** ν1 = {ddl1_trait}, ν2 = {ddl2}")
+    st.write(f"**DDL pour Blocs :** ν1 = {ddl1_blocs}, ν2 = {ddl2}")
+
+with col2:
+    st.subheader("📖 F théorique (table de Fisher)")
+    # Tous les seuils à la fois : α se choisit dans le graphique, sans réexécution
+    f_theor_trait = [f_critique(alpha, ddl1_trait, ddl2) for alpha in ALPHAS]
+    f_theor_blocs = [f_critique(alpha, ddl1_blocs, ddl2) for alpha in ALPHAS]
+    table_fisher = pd.DataFrame({
+        'α': ALPHAS,
+        f'Traitements F({ddl1_trait},{ddl2})': f_theor_trait,
+        f'Blocs F({ddl1_blocs},{ddl2})': f_theor_blocs,
+    })
+    afficher_tableau(table_fisher, {colonne: 3 for colonne in table_fisher.columns[1:]}, hide_index=True)
+
+def seuil_le_plus_strict(f_calcule, f_theoriques):
+    """Plus petit α auquel F calculé dépasse le F théorique (None si aucun)"""
+    significatifs = [alpha for alpha, f_theor in zip(ALPHAS, f_theoriques) if f_calcule > f_theor]
+    return min(significatifs) if significatifs else None
+
+st.subheader("🔍 Comparaison et Décision :")
+
+col3, col4 = st.columns([1, 1])
+
+with col3:
+    st.write("**Pour les Traitements :**")
+    alpha_trait = seuil_le_plus_strict(etat.f_traitements, f_theor_trait)
+    if alpha_trait is not None:
+        f_theor = f_theor_trait[ALPHAS.index(alpha_trait)]
+        st.success(f"✅ F calc ({etat.f_traitements:.3f}) > F théor ({f_theor:.3f}) au seuil α = {alpha_trait}")
+        st.success("**Conclusion : Effet des traitements SIGNIFICATIF** 📈")
+    else:
+        st.error(f"❌ F calc ({etat.f_traitements:.3f}) ≤ F théor ({f_theor_trait[0]:.3f}) au seuil α = {ALPHAS[0]}")
+        st.error("**Conclusion : Effet des traitements NON significatif**")
+
+with col4:
+    st.write("**Pour les Blocs :**")
+    alpha_blocs = seuil_le_plus_strict(etat.f_blocs, f_theor_blocs)
+    if alpha_blocs is not None:
+        f_theor = f_theor_blocs[ALPHAS.index(alpha_blocs)]
+        st.success(f"✅ F calc ({etat.f_blocs:.3f}) > F théor ({f_theor:.3f}) au seuil α = {alpha_blocs}")
+        st.success("**Conclusion : Effet des blocs SIGNIFICATIF** 📈")
+    else:
+        st.info(f"ℹ️ F calc ({etat.f_blocs:.3f}) ≤ F théor ({f_theor_blocs[0]:.3f}) au seuil α = {ALPHAS[0]}")
+        st.info("**Conclusion : Effet des blocs NON significatif**")
+
+st.subheader("📊 Visualisation des F")
+st.write("Densité de la loi F : la zone rouge est la zone de rejet de H₀ au seuil α, "
+         "la ligne pointillée le F théorique et la ligne rouge votre F calculé. "
+         "Changez α ou l'effet sous le graphique : la décision affichée suit le seuil choisi.")
+effets_f = (("Traitements", ddl1_trait, ddl2, etat.f_traitements),
+            ("Blocs", ddl1_blocs, ddl2, etat.f_blocs))
+if etat.factoriel is not None:
+    effets_f += tuple((libelle_effet(effet), etat.factoriel[f'ddl_{effet}'], ddl2,
+                       etat.factoriel[f'f_{effet}'])
+                      for effet in effets_factoriels(2))
+st.altair_chart(graphique_explorateur(effets_f), width='stretch')
+
+if st.button("✅ J'ai compris la comparaison F"):
+    st.success("Parfait ! Passez à l'interprétation finale !")
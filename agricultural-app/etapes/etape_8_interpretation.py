@@ -0,0 +1,360 @@
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import streamlit as st
+from scipy import stats
+
+from affichage import afficher_tableau
+from anova import ddl_brc, effets_factoriels
+from cache_resultats import memoiser
+from contrastes import (NOMS_DEGRES, analyse_contrastes, coefficients_polynomiaux, lire_contrastes, lire_doses,
+                        orthogonaux)
+from correction import ITEMS as ITEMS_CORRECTION, TOLERANCE_ABSOLUE, TOLERANCE_RELATIVE
+from diagnostics import diagnostics_residus, tableau_diagnostics
+from distribution_f import f_critique
+from etat import etat, exiger, suivre_tache
+from multi_environnements import COLONNES as COLONNES_MULTI_ENV, SOURCES as SOURCES_MULTI_ENV
+from multi_environnements import composantes_variance, tableau_anova_combinee
+from non_parametrique import tableau_comparaisons, test_friedman
+from rapports import (ALPHA, decimales_anova, rapport_html, rapport_pdf, tableau_anova, tableau_contrastes,
+                      tableau_factoriel, verdict_cv)
+from sous_echantillonnage import tableau_anova_emboitee
+from taches import analyser_multi_environnements, soumettre_correction
+
+# Cache mémoire du processus, puis cache disque commun à tous les processus
+@st.cache_data(show_spinner=False)
+@memoiser('diagnostics')
+def diagnostics_cache(valeurs):
+    return diagnostics_residus(valeurs)
+
+@st.cache_data(show_spinner="Préparation du rapport...")
+@memoiser('rapport_html', ALPHA)
+def rapport_html_cache(valeurs):
+    return rapport_html("Mon essai", valeurs)
+
+@st.cache_data(show_spinner="Préparation du rapport...")
+@memoiser('rapport_pdf', ALPHA)
+def rapport_pdf_cache(valeurs):
+    return rapport_pdf("Mon essai", valeurs)
+
+exiger(etat.f_traitements is not None, "⚠️ Completez d'abord toutes les étapes précédentes !")
+
+st.header("🎓 Étape 8: Interprétation des résultats")
+
+st.subheader("📋 Récapitulatif de votre analyse ANOVA")
+
+nb_trait = etat.nb_traitements
+nb_blocs = etat.nb_blocs
+ddl = ddl_brc(nb_trait, nb_blocs, etat.nb_manquantes)
+ddl_trait = ddl['ddl_traitements']
+ddl_blocs = ddl['ddl_blocs']
+ddl_erreur = ddl['ddl_erreur']
+ddl_total = ddl['ddl_total']
+
+f_theor_trait = f_critique(0.05, ddl_trait, ddl_erreur)
+f_theor_blocs = f_critique(0.05, ddl_blocs, ddl_erreur)
+
+resultats = dict(ddl, **{
+    cle: getattr(etat, cle)
+    for cle in ['sc_traitements', 'sc_blocs', 'sc_erreur', 'sc_total',
+                'cm_traitements', 'cm_blocs', 'cm_erreur', 'f_traitements', 'f_blocs']
+})
+anova_table = tableau_anova(resultats)
+# Le tableau est affiché ici, une fois les lignes des contrastes éventuels ajoutées
+tableau_principal = st.container()
+
+with st.expander("📐 Contrastes entre traitements"):
+    st.write("Décomposez la SC des traitements en comparaisons à 1 DDL : contrastes polynomiaux "
+             "(effet linéaire, quadratique, cubique) pour des doses, ou vos propres contrastes "
+             "(coefficients de somme nulle). Ils s'ajoutent au tableau sous la ligne des traitements.")
+    if etat.nb_manquantes > 0:
+        st.warning("⚠️ Les contrastes demandent un dispositif complet")
+    else:
+        polynomiaux = st.checkbox("Contrastes polynomiaux (traitements quantitatifs)")
+        doses_texte = st.text_input("Doses des traitements", ", ".join(str(t) for t in range(1, nb_trait + 1)),
+                                    key=f"doses_{nb_trait}", disabled=not polynomiaux)
+        personnels = st.text_area("Contrastes personnels, un par ligne « nom : c1, c2, ... »",
+                                  placeholder="T1 contre les autres : " + ", ".join(
+                                      [str(nb_trait - 1)] + ["-1"] * (nb_trait - 1)))
+        try:
+            noms, coefficients = lire_contrastes(personnels, nb_trait)
+            if polynomiaux:
+                polynomes = coefficients_polynomiaux(lire_doses(doses_texte, nb_trait))
+                noms = list(NOMS_DEGRES[:len(polynomes)]) + noms
+                coefficients = np.vstack([polynomes, coefficients])
+            # Tous les contrastes en un seul produit matriciel sur les moyennes de traitement
+            analyse = analyse_contrastes(etat.matrice.moyennes_traitements, coefficients, nb_blocs, etat.cm_erreur)
+        except ValueError as erreur:
+            st.error(f"⚠️ {erreur}")
+        else:
+            if noms:
+                st.dataframe(pd.DataFrame(coefficients, index=noms, columns=etat.matrice.traitements).round(3),
+                             width='stretch')
+                if orthogonaux(coefficients):
+                    st.caption(f"Contrastes orthogonaux : ensemble, ils expliquent "
+                               f"{analyse['sc'].sum() / etat.sc_traitements:.0%} de la SC des traitements")
+                else:
+                    st.caption("⚠️ Contrastes non orthogonaux : leurs SC ne s'additionnent pas")
+                anova_table = pd.concat([anova_table.iloc[:1], tableau_contrastes(analyse, noms, ddl_erreur),
+                                         anova_table.iloc[1:]], ignore_index=True)
+
+with tableau_principal:
+    afficher_tableau(anova_table, decimales_anova(anova_table), hide_index=True)
+
+if etat.sous_echantillons is not None:
+    emboitee = etat.sous_echantillons
+    st.write("**ANOVA emboîtée (tous les échantillons) :**")
+    tableau_emboitee = tableau_anova_emboitee(emboitee)
+    afficher_tableau(tableau_emboitee, decimales_anova(tableau_emboitee))
+    st.write(f"Variance entre parcelles : {emboitee['var_parcelles']:.3f} ; "
+             f"variance entre échantillons d'une parcelle : {emboitee['var_echantillonnage']:.3f}")
+
+if etat.factoriel is not None:
+    st.write("**Décomposition factorielle des traitements :**")
+    decomposition = tableau_factoriel(etat.factoriel, effets_factoriels(2))
+    afficher_tableau(decomposition, decimales_anova(decomposition), hide_index=True)
+
+st.subheader("🩺 Conditions d'application de l'ANOVA")
+if etat.nb_manquantes > 0:
+    st.info("Les diagnostics des résidus demandent un dispositif complet")
+else:
+    diagnostics = diagnostics_cache(etat.matrice.valeurs)
+    tableau_conditions = tableau_diagnostics(diagnostics)
+    afficher_tableau(tableau_conditions, decimales_anova(tableau_conditions), hide_index=True)
+    if (tableau_conditions['Condition respectée ?'] == "NON").any():
+        st.warning("⚠️ Une condition n'est pas respectée : interprétez le F avec prudence "
+                   "(transformation des données ou test de Friedman ci-dessous)")
+    # Graphiques rendus seulement à la demande
+    if st.toggle("Afficher les graphiques des résidus"):
+        fig_residus, (ax_qq, ax_ajuste) = plt.subplots(1, 2, figsize=(12, 4))
+        residus_tries = np.sort(diagnostics['residus'].ravel())
+        quantiles = np.linspace(0.5, len(residus_tries) - 0.5, len(residus_tries)) / len(residus_tries)
+        ax_qq.scatter(stats.norm.ppf(quantiles), residus_tries, color='steelblue')
+        ax_qq.axline((0, 0), slope=residus_tries.std(ddof=1), color='gray', linestyle='--')
+        ax_qq.set_title('Droite de Henry (QQ-plot)')
+        ax_qq.set_xlabel('Quantiles théoriques')
+        ax_qq.set_ylabel('Résidus')
+        ax_ajuste.scatter(diagnostics['ajustees'].ravel(), diagnostics['residus'].ravel(), color='steelblue')
+        ax_ajuste.axhline(0, color='gray', linestyle='--')
+        ax_ajuste.set_title('Résidus / valeurs ajustées')
+        ax_ajuste.set_xlabel('Valeurs ajustées')
+        ax_ajuste.set_ylabel('Résidus')
+        plt.tight_layout()
+        st.pyplot(fig_residus)
+        plt.close(fig_residus)
+
+with st.expander("📏 Test non paramétrique de Friedman (si les résidus ne sont pas normaux)"):
+    if etat.nb_manquantes > 0:
+        st.info("Le test de Friedman demande des blocs complets")
+    else:
+        matrice = etat.matrice
+        friedman = test_friedman(matrice.valeurs)
+        st.write(f"**χ² de Friedman :** {friedman['statistique']:.3f} "
+                 f"(DDL = {friedman['ddl']}), p-value = {friedman['p_value']:.4f}")
+        if friedman['p_value'] < 0.05:
+            st.success("✅ Les rangs des traitements diffèrent significativement (5%)")
+        else:
+            st.info("ℹ️ Pas de différence significative entre les rangs des traitements (5%)")
+        st.write("**Rangs moyens :** " + " ; ".join(
+            f"T{t} : {rang:.2f}" for t, rang in zip(matrice.traitements, friedman['rangs_moyens'])))
+        st.write("**Comparaisons par paires (Conover) :**")
+        comparaisons = tableau_comparaisons(friedman, [f"T{t}" for t in matrice.traitements])
+        afficher_tableau(comparaisons, decimales_anova(comparaisons), hide_index=True)
+
+col1, col2 = st.columns([1, 1])
+
+with col1:
+    st.subheader("🔍 Interprétation des Traitements")
+    if etat.f_traitements > f_theor_trait:
+        st.success("""
+        ✅ **Effet significatif des traitements**
+
+        **Cela signifie :**
+        - Les traitements ont un effet réel
+        - Les différences observées ne sont pas dues au hasard
+        - Vous pouvez rejeter H₀ : "pas de différence entre traitements"
+
+        **Prochaines étapes :**
+        - Test post-hoc (Tukey, Newman-Keuls...)
+        - Comparaison multiple des moyennes
+        """)
+    else:
+        st.error("""
+        ❌ **Effet non significatif des traitements**
+
+        **Cela signifie :**
+        - Pas de preuve d'effet des traitements
+        - Les différences peuvent être dues au hasard
+        - Vous acceptez H₀
+
+        **Possible causes :**
+        - Traitements réellement sans effet
+        - Variabilité trop importante
+        - Nombre de répétitions insuffisant
+        """)
+
+with col2:
+    st.subheader("🔍 Interprétation des Blocs")
+    if etat.f_blocs > f_theor_blocs:
+        st.success("""
+        ✅ **Effet significatif des blocs**
+
+        **Cela signifie :**
+        - Le dispositif en blocs était justifié
+        - Il y a effectivement de la variabilité entre blocs
+        - Vous avez bien contrôlé cette source de variation
+        """)
+    else:
+        st.info("""
+        ℹ️ **Effet non significatif des blocs**
+
+        **Cela signifie :**
+        - Pas de grande différence entre blocs
+        - Le dispositif en blocs n'était peut-être pas nécessaire
+        - Mais cela ne nuit pas à l'analyse
+        """)
+
+st.subheader("📊 Coefficient de Variation (CV%)")
+moyenne_generale = etat.matrice.moyenne_generale
+ecart_type_erreur = np.sqrt(etat.cm_erreur)
+cv_percent = (ecart_type_erreur / moyenne_generale) * 100
+
+st.write(f"**CV% = (√CM_erreur / Moyenne générale) × 100**")
+st.write(f"CV% = (√{etat.cm_erreur:.3f} / {moyenne_generale:.3f}) × 100 = **{cv_percent:.1f}%**")
+
+niveau_cv, message_cv = verdict_cv(cv_percent)
+{'success': st.success, 'info': st.info, 'warning': st.warning, 'error': st.error}[niveau_cv](message_cv)
+
+st.subheader("📈 Graphique des moyennes par traitement")
+matrice = etat.matrice
+moyennes_trait = pd.DataFrame({'mean': matrice.moyennes_traitements,
+                               'std': matrice.ecarts_types_traitements},
+                              index=pd.Index(matrice.traitements, name='Traitement'))
+
+fig, ax = plt.subplots(figsize=(10, 6))
+x_pos = np.arange(len(moyennes_trait))
+bars = ax.bar(x_pos, moyennes_trait['mean'], 
+             yerr=moyennes_trait['std'], 
+             capsize=5, alpha=0.7, 
+             color='lightblue', edgecolor='navy')
+
+ax.set_xlabel('Traitements')
+ax.set_ylabel('Valeur moyenne')
+ax.set_title('Moyennes par traitement avec écart-type')
+ax.set_xticks(x_pos)
+ax.set_xticklabels([f'T{i}' for i in moyennes_trait.index])
+ax.grid(True, alpha=0.3)
+
+for i, (bar, mean_val) in enumerate(zip(bars, moyennes_trait['mean'])):
+    ax.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 0.1,
+           f'{mean_val:.2f}', ha='center', va='bottom')
+
+plt.tight_layout()
+st.pyplot(fig)
+
+st.subheader("🤔 Questions de réflexion")
+st.write("""
+**Maintenant que vous maîtrisez l'ANOVA, réfléchissez :**
+
+1. **Pourquoi chaque étape est-elle importante ?**
+   - DDL → degrés de liberté disponibles
+   - SC → quantification de la variabilité
+   - CM → variance estimée
+   - F → rapport des variances
+
+2. **Que faire maintenant ?**
+   - Si significatif → tests de comparaisons multiples
+   - Si non significatif → revoir l'expérimentation
+
+3. **Comment améliorer l'expérience ?**
+   - Plus de répétitions pour diminuer l'erreur
+   - Mieux contrôler les conditions
+   - Choix d'un dispositif plus adapté
+""")
+
+st.subheader("📄 Rapport de l'analyse")
+valeurs_essai = etat.matrice.valeurs
+col_html, col_pdf = st.columns([1, 1])
+with col_html:
+    st.download_button("⬇️ Rapport HTML", rapport_html_cache(valeurs_essai),
+                       file_name="rapport_anova.html", mime="text/html")
+with col_pdf:
+    st.download_button("⬇️ Rapport PDF", rapport_pdf_cache(valeurs_essai),
+                       file_name="rapport_anova.pdf", mime="application/pdf")
+st.caption("Pour des milliers d'essais : `python rapports.py essais.csv dossier_sortie` "
+           "(colonnes Essai, Bloc, Traitement, Valeur)")
+
+with st.expander("🧑‍🏫 Correction d'examens par lot (enseignant)"):
+    st.write("CSV des copies : une ligne par étudiant avec les colonnes `etudiant`, `exercice` "
+             "(identifiant de la banque) et les réponses parmi : "
+             + ", ".join(f"`{item}`" for item in ITEMS_CORRECTION))
+    col_abs, col_rel = st.columns([1, 1])
+    with col_abs:
+        tolerance_absolue = st.number_input("Tolérance absolue (CM, F)", min_value=0.0,
+                                            value=TOLERANCE_ABSOLUE, step=0.001, format="%.3f")
+    with col_rel:
+        tolerance_relative = st.number_input("Tolérance relative (CM, F)", min_value=0.0,
+                                             value=TOLERANCE_RELATIVE, step=0.001, format="%.3f")
+    fichier_copies = st.file_uploader("Copies à corriger", type="csv", key="fichier_copies")
+    if fichier_copies is not None:
+        copies = pd.read_csv(fichier_copies)
+        if 'exercice' not in copies.columns:
+            st.error("⚠️ Colonne `exercice` absente du fichier")
+        else:
+            # Correction dans la file de tâches : la page reste utilisable pendant ce temps
+            copies_corrigees = suivre_tache(
+                "correction", (fichier_copies.file_id, tolerance_absolue, tolerance_relative),
+                lambda file, session, etape: soumettre_correction(file, session, etape, copies,
+                                                                  tolerance_absolue, tolerance_relative))
+            if copies_corrigees is not None:
+                st.write(f"**{len(copies_corrigees)} copies corrigées**, score moyen "
+                         f"{copies_corrigees['score'].mean():.2f} / {copies_corrigees['sur'].max()}")
+                if copies_corrigees['exercice_inconnu'].any():
+                    st.warning(f"⚠️ {copies_corrigees['exercice_inconnu'].sum()} copies avec un exercice inconnu")
+                st.dataframe(copies_corrigees.head(1000), width='stretch')
+                st.download_button("⬇️ Télécharger les corrections",
+                                   copies_corrigees.to_csv(index=False).encode('utf-8'),
+                                   file_name="corrections.csv", mime="text/csv")
+
+with st.expander("🌍 Analyse combinée multi-environnements (sites × années)"):
+    st.write("Le même BRC répété sur plusieurs sites et plusieurs années. Chargez un fichier CSV "
+             "au format long avec les colonnes : " + ", ".join(f"`{c}`" for c in COLONNES_MULTI_ENV))
+    fichier_multi_env = st.file_uploader("Fichier des essais", type="csv", key="fichier_multi_env")
+    if fichier_multi_env is not None:
+        try:
+            analyse = suivre_tache(
+                "multi_environnements", fichier_multi_env.file_id,
+                lambda file, session, etape: file.soumettre(
+                    session, etape, "Analyse multi-environnements", analyser_multi_environnements,
+                    [fichier_multi_env.getvalue()]))
+        except (KeyError, ValueError) as erreur:
+            st.error(f"⚠️ Fichier invalide : {erreur}")
+        else:
+            if analyse is not None:
+                resultats_combines, dimensions, niveaux = analyse
+                st.write(f"**{len(niveaux['Site'])} sites × {len(niveaux['Annee'])} années, "
+                         f"{len(niveaux['Bloc'])} blocs, {len(niveaux['Traitement'])} traitements**")
+                tableau_combine = tableau_anova_combinee(resultats_combines)
+                afficher_tableau(tableau_combine, decimales_anova(tableau_combine))
+                st.caption("Effets d'environnement testés contre les blocs, traitements testés contre "
+                           "l'interaction traitements × environnements, interactions contre l'erreur.")
+                if st.checkbox("Estimer les composantes de variance (environnements aléatoires)"):
+                    composantes = composantes_variance(resultats_combines, dimensions)
+                    st.dataframe(pd.DataFrame({
+                        'Source': [SOURCES_MULTI_ENV[effet][1] for effet in composantes],
+                        'Variance estimée': list(composantes.values())
+                    }).round(4), width='stretch')
+
+if st.button("🎉 J'ai maîtrisé l'ANOVA !"):
+    st.balloons()
+    st.success("""
+    🎓 **Félicitations !** 
+
+    Vous maîtrisez maintenant :
+    - La logique de l'analyse de variance
+    - Le calcul étape par étape 
+    - L'interprétation des résultats
+    - L'importance de chaque étape
+
+    Vous êtes prêt(e) pour vos expérimentations agricoles ! 🌱
+    """)
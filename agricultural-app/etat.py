@@ -0,0 +1,258 @@
+import hashlib
+import numbers
+import time
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from historique import HistoriqueSaisie
+from instantanes import decoder, encoder, magasin_instantanes, nouveau_jeton
+from matrice import MatriceEssai
+from taches import FileTaches
+
+# État partagé entre les pages des étapes. Chaque clé de st.session_state
+# utilisée par plusieurs pages est déclarée une fois ici, avec son type et sa
+# valeur initiale : les pages lisent et écrivent etat.matrice, etat.sc_total...
+# et une valeur du mauvais type est refusée à l'écriture plutôt que de casser
+# une autre page plus loin dans le parcours.
+
+# Pages de l'application : (fichier, titre, aide affichée dans la barre latérale)
+ETAPES = (
+    ('etapes/etape_1_dispositif.py', "1. Choix du dispositif",
+     "Choisissez le dispositif qui correspond à votre expérimentation"),
+    ('etapes/etape_2_saisie.py', "2. Saisie des données",
+     "Saisissez des données réalistes pour votre apprentissage"),
+    ('etapes/etape_3_ddl.py', "3. Calcul des DDL",
+     "Les DDL représentent les degrés de liberté. Réfléchissez aux paramètres estimés."),
+    ('etapes/etape_4_sommes_carres.py', "4. Calcul des sommes de carrés",
+     "Les sommes de carrés quantifient la variabilité de chaque source"),
+    ('etapes/etape_5_carres_moyens.py', "5. Calcul des carrés moyens",
+     "Les carrés moyens sont des variances estimées"),
+    ('etapes/etape_6_f.py', "6. Calcul du F",
+     "Le F compare la variance de l'effet à celle de l'erreur"),
+    ('etapes/etape_7_f_theorique.py', "7. Comparaison F théorique",
+     "Comparez votre F calculé au F théorique pour décider"),
+    ('etapes/etape_8_interpretation.py', "8. Interprétation",
+     "Interprétez vos résultats dans le contexte agricole"),
+)
+
+
+class Champ:
+    """Clé de st.session_state de type fixé (None accepté si c'est la valeur initiale)"""
+
+    def __init__(self, types, initiale=None):
+        self.types = types
+        self.initiale = initiale
+
+    def __set_name__(self, proprietaire, nom):
+        self.nom = nom
+
+    def __get__(self, instance, proprietaire):
+        if instance is None:
+            return self
+        return st.session_state.get(self.nom, self.initiale)
+
+    def __set__(self, instance, valeur):
+        if not (isinstance(valeur, self.types) or (valeur is None and self.initiale is None)):
+            raise TypeError(f"etat.{self.nom} : {type(valeur).__name__} reçu")
+        st.session_state[self.nom] = valeur
+
+    def __delete__(self, instance):
+        st.session_state.pop(self.nom, None)
+
+
+class EtatSession:
+    """Accès typé à l'état de la session de l'étudiant"""
+
+    etape = Champ(str)
+    dispositif = Champ(str)
+    matrice = Champ(MatriceEssai)
+    historique = Champ(HistoriqueSaisie)
+    exercice_id = Champ(str)
+    nb_traitements = Champ(numbers.Integral)
+    nb_blocs = Champ(numbers.Integral)
+    nb_manquantes = Champ(numbers.Integral, 0)
+    # Traitement t = combinaison (A = t // niveaux B, B = t % niveaux B)
+    facteurs = Champ(tuple)
+    sous_echantillons = Champ(dict)
+    ddl_calculated = Champ(bool, False)
+
+    # Résultats qui dépendent des valeurs saisies (voir resultats_derives)
+    sc_total = Champ(numbers.Real)
+    sc_traitements = Champ(numbers.Real)
+    sc_blocs = Champ(numbers.Real)
+    sc_erreur = Champ(numbers.Real)
+    cm_traitements = Champ(numbers.Real)
+    cm_blocs = Champ(numbers.Real)
+    cm_erreur = Champ(numbers.Real)
+    f_traitements = Champ(numbers.Real)
+    f_blocs = Champ(numbers.Real)
+    factoriel = Champ(dict)
+
+    DERIVES = ('sc_total', 'sc_traitements', 'sc_blocs', 'sc_erreur', 'cm_traitements', 'cm_blocs',
+               'cm_erreur', 'f_traitements', 'f_blocs', 'factoriel')
+
+    def resultats_derives(self):
+        """Résultats calculés sur les données actuelles"""
+        return {cle: st.session_state[cle] for cle in self.DERIVES if cle in st.session_state}
+
+    def remplacer_resultats_derives(self, resultats):
+        """Oublie les résultats actuels et reprend ceux donnés (ceux d'une autre version des données)"""
+        for cle in self.DERIVES:
+            delattr(self, cle)
+        for cle, valeur in (resultats or {}).items():
+            setattr(self, cle, valeur)
+
+    def champs(self):
+        """Valeurs de tous les champs présents dans la session"""
+        return {nom: st.session_state[nom] for nom, champ in vars(EtatSession).items()
+                if isinstance(champ, Champ) and nom in st.session_state}
+
+    def restaurer(self, champs):
+        """Reprend des champs sauvegardés (types vérifiés comme à toute écriture)"""
+        for nom, valeur in champs.items():
+            if not isinstance(vars(EtatSession).get(nom), Champ):
+                raise TypeError(f"etat.{nom} : champ inconnu")
+            setattr(self, nom, valeur)
+
+
+etat = EtatSession()
+
+
+def reponses_attendues():
+    """Réponses de l'exercice de la banque en cours (None en saisie libre)"""
+    if etat.exercice_id is None:
+        return None
+    from banque_exercices import reponses
+    return reponses(etat.exercice_id)
+
+
+def afficher_retours(retours):
+    for niveau, texte in retours:
+        {'success': st.success, 'info': st.info, 'error': st.error, 'warning': st.warning}[niveau](texte)
+
+
+@st.cache_resource
+def file_taches():
+    """File des tâches longues, partagée par les sessions du processus"""
+    return FileTaches()
+
+
+def identifiant_session():
+    return get_script_run_ctx().session_id
+
+
+def suivre_tache(nom, cle, soumettre):
+    """Lance une tâche longue et suit sa progression ; retourne son résultat une fois terminée
+
+    cle identifie les entrées de la tâche (fichier, paramètres) : elle n'est
+    relancée que si cle change. soumettre(file, session, etape) soumet la tâche
+    et retourne son identifiant. Tant que la tâche tourne, la progression est
+    rafraîchie chaque seconde sans réexécuter toute la page. Le résultat (ou
+    l'erreur) est ensuite gardé dans la session, la file n'en garde rien.
+    """
+    file = file_taches()
+    suivies = st.session_state.setdefault('_taches', {})
+    suivie = suivies.get(nom)
+    if suivie is not None and suivie['cle'] != cle:
+        file.oublier(suivie['identifiant'])
+        suivie = None
+    if suivie is None:
+        try:
+            identifiant = soumettre(file, identifiant_session(), etat.etape)
+        except ValueError as erreur:
+            st.warning(f"⚠️ {erreur}")
+            return None
+        suivie = suivies[nom] = {'cle': cle, 'identifiant': identifiant, 'resultat': None, 'erreur': None}
+
+    if suivie['erreur'] is not None:
+        raise suivie['erreur']
+    if suivie['identifiant'] is None:
+        return suivie['resultat']
+
+    identifiant = suivie['identifiant']
+    etat_tache = file.etat(identifiant)
+    if etat_tache is None or etat_tache['annulee']:
+        st.info("Tâche annulée" if etat_tache is not None else "Tâche annulée ou expirée")
+        if st.button("🔄 Relancer", key=f"relancer_{nom}"):
+            file.oublier(identifiant)
+            del suivies[nom]
+            st.rerun()
+        return None
+    if etat_tache['terminee']:
+        suivie['identifiant'] = None
+        try:
+            suivie['resultat'] = file.resultat(identifiant)
+        except Exception as erreur:
+            suivie['erreur'] = erreur
+            raise
+        return suivie['resultat']
+
+    @st.fragment(run_every=1.0)
+    def progression():
+        etat_tache = file.etat(identifiant)
+        if etat_tache is None or etat_tache['terminee']:
+            # Le résultat s'affiche avec le reste de la page
+            st.rerun()
+        st.progress(etat_tache['progression'], text=f"{etat_tache['nom']} : {etat_tache['progression']:.0%}")
+        if st.button("⏹️ Annuler", key=f"annuler_{nom}"):
+            file.annuler(identifiant)
+            st.rerun()
+
+    progression()
+    return None
+
+
+CLE_INSTANTANE = '_instantane'
+
+
+def reprendre_session():
+    """Reprend la session désignée par le jeton de l'URL, au premier passage sur ce serveur
+
+    Sans jeton (ou avec un instantané illisible), la session démarre à vide
+    sous un nouveau jeton. Retourne les mesures de l'instantané de la session.
+    """
+    mesures = st.session_state.get(CLE_INSTANTANE)
+    if mesures is None:
+        mesures = {'jeton': st.query_params.get('session'), 'empreinte': None, 'octets': None,
+                   'restauration_ms': None, 'sauvegarde_ms': None}
+        try:
+            contenu = magasin_instantanes().charger(mesures['jeton']) if mesures['jeton'] else None
+            if contenu is not None:
+                debut = time.perf_counter()
+                etat.restaurer(decoder(contenu))
+                mesures['restauration_ms'] = (time.perf_counter() - debut) * 1000
+                mesures['octets'] = len(contenu)
+                mesures['empreinte'] = hashlib.blake2b(contenu, digest_size=16).digest()
+        except (ValueError, TypeError) as erreur:
+            st.warning(f"⚠️ Session précédente non reprise : {erreur}")
+            mesures['jeton'] = None
+        if mesures['jeton'] is None:
+            mesures['jeton'] = nouveau_jeton()
+        st.session_state[CLE_INSTANTANE] = mesures
+    # Le changement de page peut vider l'URL : le jeton y est remis
+    if st.query_params.get('session') != mesures['jeton']:
+        st.query_params['session'] = mesures['jeton']
+    return mesures
+
+
+def sauvegarder_session():
+    """Écrit l'instantané de la session s'il a changé depuis la dernière écriture"""
+    mesures = st.session_state.get(CLE_INSTANTANE)
+    if mesures is None:
+        return
+    debut = time.perf_counter()
+    contenu = encoder(etat.champs())
+    empreinte = hashlib.blake2b(contenu, digest_size=16).digest()
+    if empreinte != mesures['empreinte']:
+        magasin_instantanes().sauvegarder(mesures['jeton'], contenu)
+        mesures['empreinte'] = empreinte
+        mesures['octets'] = len(contenu)
+        mesures['sauvegarde_ms'] = (time.perf_counter() - debut) * 1000
+
+
+def exiger(condition, message):
+    """Arrête la page avec un message si une étape précédente n'est pas faite"""
+    if not condition:
+        st.error(message)
+        st.stop()
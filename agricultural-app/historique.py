@@ -0,0 +1,122 @@
+import numpy as np
+
+# Historique des saisies de l'étape 2 avec annuler / rétablir. Seul le tableau
+# de la version courante est gardé en entier ; chaque version ne stocke que les
+# cellules modifiées (indices, anciennes et nouvelles valeurs), si bien que des
+# centaines de versions ne coûtent que quelques kilo-octets. Les résultats
+# d'analyse d'une version (SC, CM, F...) peuvent y être mémorisés pour être
+# repris tels quels quand on revient à cette version.
+
+NB_VERSIONS_MAX = 500
+
+
+def _cellules_modifiees(avant, apres):
+    # NaN (parcelle perdue) est égal à NaN
+    return np.flatnonzero(~((avant == apres) | (np.isnan(avant) & np.isnan(apres))))
+
+
+class HistoriqueSaisie:
+    """Versions successives d'un tableau blocs × traitements"""
+
+    __slots__ = ('_actuel', '_differences', '_identifiants', '_prochain', 'position', 'resultats')
+
+    def __init__(self, valeurs):
+        self._actuel = np.array(valeurs, dtype=np.float64, order='C')
+        # Différence k : passage de la version k à la version k + 1
+        self._differences = []
+        self._identifiants = [0]
+        self._prochain = 1
+        self.position = 0
+        self.resultats = {}
+
+    def __getstate__(self):
+        return {nom: getattr(self, nom) for nom in self.__slots__}
+
+    def __setstate__(self, etat):
+        for nom, valeur in etat.items():
+            setattr(self, nom, valeur)
+
+    @property
+    def forme(self):
+        return self._actuel.shape
+
+    @property
+    def valeurs(self):
+        """Copie du tableau de la version courante"""
+        return self._actuel.copy()
+
+    @property
+    def nb_versions(self):
+        return len(self._identifiants)
+
+    @property
+    def peut_annuler(self):
+        return self.position > 0
+
+    @property
+    def peut_retablir(self):
+        return self.position < len(self._differences)
+
+    def taille_octets(self):
+        """Mémoire occupée par les différences (le tableau courant en plus)"""
+        return sum(indices.nbytes + anciennes.nbytes + nouvelles.nbytes
+                   for indices, anciennes, nouvelles in self._differences)
+
+    def enregistrer(self, valeurs):
+        """Nouvelle version si valeurs diffère de la version courante ; retourne True dans ce cas
+
+        Les versions annulées (à rétablir) sont abandonnées, avec leurs résultats.
+        """
+        valeurs = np.asarray(valeurs, dtype=np.float64)
+        if valeurs.shape != self.forme:
+            raise ValueError("Les dimensions du tableau ont changé : créez un nouvel historique")
+        plat = self._actuel.reshape(-1)
+        indices = _cellules_modifiees(plat, valeurs.reshape(-1))
+        if not len(indices):
+            return False
+
+        for identifiant in self._identifiants[self.position + 1:]:
+            self.resultats.pop(identifiant, None)
+        del self._differences[self.position:]
+        del self._identifiants[self.position + 1:]
+
+        nouvelles = valeurs.reshape(-1)[indices]
+        self._differences.append((indices.astype(np.int32), plat[indices], nouvelles))
+        plat[indices] = nouvelles
+        self._identifiants.append(self._prochain)
+        self._prochain += 1
+        self.position += 1
+
+        if len(self._differences) > NB_VERSIONS_MAX:
+            # La plus ancienne version est oubliée
+            del self._differences[0]
+            self.resultats.pop(self._identifiants.pop(0), None)
+            self.position -= 1
+        return True
+
+    def aller_a(self, version):
+        """Se place sur une version (0 = la plus ancienne gardée) en rejouant les différences"""
+        version = min(max(int(version), 0), len(self._differences))
+        plat = self._actuel.reshape(-1)
+        while self.position > version:
+            self.position -= 1
+            indices, anciennes, _ = self._differences[self.position]
+            plat[indices] = anciennes
+        while self.position < version:
+            indices, _, nouvelles = self._differences[self.position]
+            plat[indices] = nouvelles
+            self.position += 1
+
+    def annuler(self):
+        self.aller_a(self.position - 1)
+
+    def retablir(self):
+        self.aller_a(self.position + 1)
+
+    def memoriser_resultats(self, resultats):
+        """Résultats d'analyse de la version courante"""
+        self.resultats[self._identifiants[self.position]] = dict(resultats)
+
+    def resultats_version(self):
+        """Résultats mémorisés pour la version courante, ou None"""
+        return self.resultats.get(self._identifiants[self.position])
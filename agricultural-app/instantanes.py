@@ -0,0 +1,148 @@
+import functools
+import io
+import json
+import os
+import secrets
+import time
+import zipfile
+
+import numpy as np
+
+from historique import HistoriqueSaisie
+from matrice import MatriceEssai
+
+# Instantanés de session : l'état d'un étudiant (dispositif, matrice, historique,
+# SC, CM, F...) est sérialisé en un bloc binaire compact et rangé dans un
+# magasin local partagé par les réplicas du serveur. Le jeton de la session
+# voyage dans l'URL : n'importe quel réplica peut reprendre la session, sans
+# affinité de session côté répartiteur de charge. Le format est un en-tête
+# (MAGIQUE, FORMAT) suivi d'une archive np.savez compressée : les tableaux NumPy
+# y sont écrits en binaire brut, les autres valeurs dans un document JSON où
+# tableaux et objets sont désignés par des étiquettes. Rien n'est dépicklé à la
+# lecture : un fichier déposé dans le magasin ne peut que décrire des valeurs,
+# pas exécuter de code. Les caches recalculables (ceux de MatriceEssai) n'y
+# figurent pas.
+
+MAGIQUE = b'AGRI'
+# À incrémenter si la forme des champs sauvegardés change
+FORMAT = 2
+DOSSIER_INSTANTANES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'sessions')
+# Une session sans activité depuis une semaine est oubliée
+AGE_MAX = 7 * 24 * 3600
+# Objets sauvegardés par leur état (__getstate__ / __setstate__)
+CLASSES = {classe.__name__: classe for classe in (MatriceEssai, HistoriqueSaisie)}
+
+
+def _vers_json(valeur, tableaux):
+    # Valeur JSON ; les tableaux sont ajoutés à tableaux et remplacés par leur nom
+    if isinstance(valeur, np.generic):
+        valeur = valeur.item()
+    if valeur is None or isinstance(valeur, (bool, int, float, str)):
+        return valeur
+    if isinstance(valeur, np.ndarray):
+        if valeur.dtype.hasobject:
+            raise TypeError("Tableau d'objets non sauvegardable")
+        nom = f't{len(tableaux)}'
+        tableaux[nom] = valeur
+        return {'tableau': nom}
+    if isinstance(valeur, list):
+        return [_vers_json(element, tableaux) for element in valeur]
+    if isinstance(valeur, tuple):
+        return {'tuple': [_vers_json(element, tableaux) for element in valeur]}
+    if isinstance(valeur, dict):
+        # Clés quelconques (entiers de l'historique...) : liste de paires
+        return {'dict': [[_vers_json(cle, tableaux), _vers_json(element, tableaux)]
+                         for cle, element in valeur.items()]}
+    if type(valeur) in CLASSES.values():
+        return {'objet': type(valeur).__name__, 'etat': _vers_json(valeur.__getstate__(), tableaux)}
+    raise TypeError(f"{type(valeur).__name__} non sauvegardable")
+
+
+def _depuis_json(valeur, tableaux):
+    if isinstance(valeur, list):
+        return [_depuis_json(element, tableaux) for element in valeur]
+    if not isinstance(valeur, dict):
+        return valeur
+    if 'tableau' in valeur:
+        return tableaux[valeur['tableau']]
+    if 'tuple' in valeur:
+        return tuple(_depuis_json(element, tableaux) for element in valeur['tuple'])
+    if 'dict' in valeur:
+        return {_depuis_json(cle, tableaux): _depuis_json(element, tableaux) for cle, element in valeur['dict']}
+    if valeur.get('objet') in CLASSES:
+        objet = object.__new__(CLASSES[valeur['objet']])
+        objet.__setstate__(_depuis_json(valeur['etat'], tableaux))
+        return objet
+    raise ValueError("valeur inconnue")
+
+
+def encoder(champs):
+    """Bloc binaire d'un dictionnaire {champ: valeur} ; TypeError pour une valeur non prévue"""
+    tableaux = {}
+    document = json.dumps(_vers_json(champs, tableaux))
+    tampon = io.BytesIO()
+    np.savez_compressed(tampon, champs=np.frombuffer(document.encode(), dtype=np.uint8), **tableaux)
+    return MAGIQUE + bytes([FORMAT]) + tampon.getvalue()
+
+
+def decoder(contenu):
+    """Champs d'un bloc produit par encoder ; ValueError si le bloc est d'un autre format"""
+    if contenu[:len(MAGIQUE) + 1] != MAGIQUE + bytes([FORMAT]):
+        raise ValueError("Instantané d'un autre format")
+    try:
+        with np.load(io.BytesIO(contenu[len(MAGIQUE) + 1:]), allow_pickle=False) as archive:
+            tableaux = {nom: archive[nom] for nom in archive.files}
+        document = json.loads(tableaux.pop('champs').tobytes().decode())
+        return _depuis_json(document, tableaux)
+    except (zipfile.BadZipFile, KeyError, OSError, AttributeError, TypeError, ValueError) as erreur:
+        raise ValueError(f"Instantané illisible : {erreur}") from erreur
+
+
+def nouveau_jeton():
+    return secrets.token_urlsafe(16)
+
+
+class MagasinInstantanes:
+    """Un fichier par session dans un dossier commun aux réplicas"""
+
+    def __init__(self, dossier=DOSSIER_INSTANTANES, age_max=AGE_MAX):
+        self.dossier = dossier
+        os.makedirs(dossier, exist_ok=True)
+        self.purger(age_max)
+
+    def _chemin(self, jeton):
+        # Le jeton vient de l'URL : il ne doit désigner qu'un fichier du dossier
+        if not jeton or not all(c.isalnum() or c in '-_' for c in jeton):
+            raise ValueError("Jeton de session invalide")
+        return os.path.join(self.dossier, f'{jeton}.bin')
+
+    def sauvegarder(self, jeton, contenu):
+        chemin = self._chemin(jeton)
+        temporaire = f'{chemin}.{os.getpid()}.tmp'
+        with open(temporaire, 'wb') as fichier:
+            fichier.write(contenu)
+        os.replace(temporaire, chemin)
+
+    def charger(self, jeton):
+        """Bloc de la session, ou None si elle est inconnue"""
+        try:
+            with open(self._chemin(jeton), 'rb') as fichier:
+                return fichier.read()
+        except FileNotFoundError:
+            return None
+
+    def purger(self, age_max):
+        """Supprime les instantanés non modifiés depuis age_max secondes"""
+        limite = time.time() - age_max
+        for entree in os.scandir(self.dossier):
+            if entree.name.endswith('.bin') and entree.stat().st_mtime < limite:
+                try:
+                    os.remove(entree.path)
+                except FileNotFoundError:
+                    pass
+
+
+@functools.lru_cache(maxsize=None)
+def magasin_instantanes(dossier=DOSSIER_INSTANTANES):
+    """Magasin du dossier, un objet par processus"""
+    return MagasinInstantanes(dossier)
@@ -0,0 +1,169 @@
+import numpy as np
+import pandas as pd
+
+# Représentation centrale d'un essai en blocs : un tableau contigu
+# (nb_blocs, nb_traitements) de float64, NaN pour les parcelles perdues, et
+# quelques libellés. Les moyennes et totaux de blocs et de traitements sont
+# calculés une fois puis gardés en cache ; le tableau est en lecture seule pour
+# que ces caches (et ceux de st.cache_data) restent valides. Les DataFrames ne
+# sont construits que pour l'affichage.
+
+
+def _lecture_seule(tableau, dtype):
+    # Un tableau déjà contigu et en lecture seule (celui d'une autre matrice) est
+    # partagé tel quel ; sinon on en fait une copie que personne ne peut modifier
+    if (isinstance(tableau, np.ndarray) and tableau.dtype == dtype
+            and tableau.flags.c_contiguous and not tableau.flags.writeable):
+        return tableau
+    copie = np.array(tableau, dtype=dtype, order='C')
+    copie.flags.writeable = False
+    return copie
+
+
+class MatriceEssai:
+    """Valeurs d'un essai blocs × traitements et libellés des lignes et colonnes"""
+
+    __slots__ = ('valeurs', 'blocs', 'traitements', 'rangs', 'colonnes', '_cache')
+
+    def __init__(self, valeurs, blocs=None, traitements=None, rangs=None, colonnes=None):
+        valeurs = _lecture_seule(valeurs, np.float64)
+        if valeurs.ndim != 2:
+            raise ValueError("Les valeurs doivent former un tableau blocs × traitements")
+        nb_blocs, nb_trait = valeurs.shape
+        self.valeurs = valeurs
+        self.blocs = tuple(blocs) if blocs is not None else tuple(range(1, nb_blocs + 1))
+        self.traitements = tuple(traitements) if traitements is not None else tuple(range(1, nb_trait + 1))
+        if (len(self.blocs), len(self.traitements)) != valeurs.shape:
+            raise ValueError("Le nombre de libellés ne correspond pas aux dimensions des valeurs")
+        # Position des parcelles dans le champ ; par défaut un bloc par rang
+        self.rangs = self._positions(rangs, np.arange(1, nb_blocs + 1)[:, None])
+        self.colonnes = self._positions(colonnes, np.arange(1, nb_trait + 1)[None, :])
+        self._cache = {}
+
+    def _positions(self, positions, defaut):
+        return _lecture_seule(np.broadcast_to(defaut if positions is None else positions, self.valeurs.shape),
+                              np.int64)
+
+    @classmethod
+    def depuis_long(cls, donnees, colonne_valeur='Valeur'):
+        """Matrice d'un tableau long (Bloc, Traitement, Valeur[, Rang, Colonne])"""
+        codes_blocs, blocs = pd.factorize(donnees['Bloc'], sort=True)
+        codes_trait, traitements = pd.factorize(donnees['Traitement'], sort=True)
+        forme = (len(blocs), len(traitements))
+
+        def grille(colonne, remplissage):
+            sortie = np.full(forme, remplissage)
+            sortie[codes_blocs, codes_trait] = donnees[colonne].to_numpy()
+            return sortie
+
+        positions = {}
+        if {'Rang', 'Colonne'}.issubset(donnees.columns):
+            positions = {'rangs': grille('Rang', 0), 'colonnes': grille('Colonne', 0)}
+        return cls(grille(colonne_valeur, np.nan), blocs, traitements, **positions)
+
+    def avec_positions(self, rangs, colonnes):
+        """Même essai (valeurs partagées, sans copie) avec d'autres positions"""
+        return MatriceEssai(self.valeurs, self.blocs, self.traitements, rangs, colonnes)
+
+    def __repr__(self):
+        return f"MatriceEssai({self.nb_blocs} blocs × {self.nb_traitements} traitements)"
+
+    def __getstate__(self):
+        return {nom: getattr(self, nom) for nom in self.__slots__ if nom != '_cache'}
+
+    def __setstate__(self, etat):
+        for nom, valeur in etat.items():
+            setattr(self, nom, valeur)
+        # Les tableaux relus d'un instantané ou d'un pickle sont modifiables
+        self.valeurs = _lecture_seule(self.valeurs, np.float64)
+        self.rangs = _lecture_seule(self.rangs, np.int64)
+        self.colonnes = _lecture_seule(self.colonnes, np.int64)
+        self._cache = {}
+
+    # Dimensions
+
+    @property
+    def forme(self):
+        return self.valeurs.shape
+
+    @property
+    def nb_blocs(self):
+        return self.valeurs.shape[0]
+
+    @property
+    def nb_traitements(self):
+        return self.valeurs.shape[1]
+
+    def _calcule(self, nom, fonction):
+        if nom not in self._cache:
+            self._cache[nom] = fonction()
+        return self._cache[nom]
+
+    @property
+    def manquantes(self):
+        return self._calcule('manquantes', lambda: np.isnan(self.valeurs))
+
+    @property
+    def nb_manquantes(self):
+        return int(self.manquantes.sum())
+
+    @property
+    def nb_observations(self):
+        return self.valeurs.size - self.nb_manquantes
+
+    @property
+    def complet(self):
+        return self.nb_manquantes == 0
+
+    # Totaux et moyennes (parcelles perdues ignorées)
+
+    @property
+    def total(self):
+        return self._calcule('total', lambda: float(np.nansum(self.valeurs)))
+
+    @property
+    def totaux_blocs(self):
+        return self._calcule('totaux_blocs', lambda: np.nansum(self.valeurs, axis=1))
+
+    @property
+    def totaux_traitements(self):
+        return self._calcule('totaux_traitements', lambda: np.nansum(self.valeurs, axis=0))
+
+    @property
+    def moyenne_generale(self):
+        return self._calcule('moyenne_generale', lambda: self.total / self.nb_observations)
+
+    @property
+    def moyennes_blocs(self):
+        return self._calcule('moyennes_blocs', lambda: self.totaux_blocs / (~self.manquantes).sum(axis=1))
+
+    @property
+    def moyennes_traitements(self):
+        return self._calcule('moyennes_traitements',
+                             lambda: self.totaux_traitements / (~self.manquantes).sum(axis=0))
+
+    @property
+    def ecarts_types_traitements(self):
+        return self._calcule('ecarts_types_traitements', lambda: np.nanstd(self.valeurs, axis=0, ddof=1))
+
+    # Conversions pour l'affichage
+
+    def en_dataframe(self, valeurs=None):
+        """Tableau blocs × traitements (les valeurs, ou un autre tableau de même forme)"""
+        return pd.DataFrame(self.valeurs if valeurs is None else valeurs,
+                            index=pd.Index(self.blocs, name='Bloc'),
+                            columns=pd.Index(self.traitements, name='Traitement'))
+
+    def en_long(self):
+        """Tableau long Bloc, Traitement, Valeur, Rang, Colonne (ordre bloc puis traitement)"""
+        return pd.DataFrame({
+            'Bloc': np.repeat(self.blocs, self.nb_traitements),
+            'Traitement': np.tile(self.traitements, self.nb_blocs),
+            'Valeur': self.valeurs.ravel(),
+            'Rang': self.rangs.ravel(),
+            'Colonne': self.colonnes.ravel(),
+        })
+
+    def serie_traitements(self, valeurs):
+        """Série indexée par les traitements (moyennes, rangs...)"""
+        return pd.Series(valeurs, index=pd.Index(self.traitements, name='Traitement'))
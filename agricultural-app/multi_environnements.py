@@ -0,0 +1,167 @@
+import numpy as np
+import pandas as pd
+
+# Analyse combinée d'un même BRC répété sur plusieurs sites et plusieurs années.
+# Les données sont rangées dans un tableau 4-D (site, année, bloc, traitement) et
+# toutes les sommes de carrés sont obtenues par réductions groupées sur ce
+# tableau : aucun passage par un format long ni par des groupby successifs.
+
+COLONNES = ['Site', 'Annee', 'Bloc', 'Traitement', 'Valeur']
+
+# Effet : (dénominateur du F, libellé)
+SOURCES = {
+    'sites': ('blocs', 'Sites'),
+    'annees': ('blocs', 'Années'),
+    'sites_annees': ('blocs', 'Sites × Années'),
+    'blocs': ('erreur', 'Blocs (dans environnement)'),
+    'traitements': ('interaction_te', 'Traitements'),
+    'trait_sites': ('erreur', 'Traitements × Sites'),
+    'trait_annees': ('erreur', 'Traitements × Années'),
+    'trait_sites_annees': ('erreur', 'Traitements × Sites × Années'),
+    'erreur': (None, 'Erreur'),
+}
+
+
+def tableau_4d(donnees):
+    """Passe du format long (COLONNES) au tableau (site, année, bloc, traitement)"""
+    codes = []
+    niveaux = {}
+    for colonne in COLONNES[:-1]:
+        code, uniques = pd.factorize(donnees[colonne], sort=True)
+        codes.append(code)
+        niveaux[colonne] = uniques
+    forme = tuple(len(niveaux[c]) for c in COLONNES[:-1])
+    # Une ligne en double écraserait l'autre sans bruit à l'affectation
+    effectifs = np.bincount(np.ravel_multi_index(tuple(codes), forme), minlength=int(np.prod(forme)))
+    if effectifs.max(initial=0) > 1:
+        raise ValueError("Chaque traitement doit apparaître une seule fois dans chaque bloc de chaque environnement")
+    y = np.full(forme, np.nan)
+    y[tuple(codes)] = donnees['Valeur'].to_numpy(dtype=float)
+    if np.isnan(y).any():
+        raise ValueError("Chaque traitement doit apparaître une fois dans chaque bloc de chaque environnement")
+    return y, niveaux
+
+
+def anova_combinee(valeurs):
+    """ANOVA combinée, valeurs de forme (..., sites, années, blocs, traitements)"""
+    y = np.asarray(valeurs, dtype=float)
+    S, A, B, T = y.shape[-4:]
+    ax_s, ax_a, ax_b, ax_t = -4, -3, -2, -1
+
+    # Moyennes marginales (keepdims pour la diffusion), calculées en cascade
+    # à partir des moyennes par parcelle d'environnement × traitement
+    m_sat = y.mean(axis=ax_b, keepdims=True)
+    m_sab = y.mean(axis=ax_t, keepdims=True)
+    m_sa = m_sab.mean(axis=ax_b, keepdims=True)
+    m_st = m_sat.mean(axis=ax_a, keepdims=True)
+    m_at = m_sat.mean(axis=ax_s, keepdims=True)
+    m_s = m_sa.mean(axis=ax_a, keepdims=True)
+    m_a = m_sa.mean(axis=ax_s, keepdims=True)
+    m_t = m_st.mean(axis=ax_s, keepdims=True)
+    m = m_s.mean(axis=ax_s, keepdims=True)
+
+    def sc(ecarts, poids):
+        return poids * (ecarts ** 2).sum(axis=(-4, -3, -2, -1))
+
+    r = {
+        'ddl_sites': S - 1,
+        'ddl_annees': A - 1,
+        'ddl_sites_annees': (S - 1) * (A - 1),
+        'ddl_blocs': S * A * (B - 1),
+        'ddl_traitements': T - 1,
+        'ddl_trait_sites': (T - 1) * (S - 1),
+        'ddl_trait_annees': (T - 1) * (A - 1),
+        'ddl_trait_sites_annees': (T - 1) * (S - 1) * (A - 1),
+        'ddl_erreur': S * A * (B - 1) * (T - 1),
+        'ddl_total': S * A * B * T - 1,
+    }
+    r['sc_total'] = sc(y - m, 1)
+    r['sc_sites'] = sc(m_s - m, A * B * T)
+    r['sc_annees'] = sc(m_a - m, S * B * T)
+    r['sc_sites_annees'] = sc(m_sa - m_s - m_a + m, B * T)
+    r['sc_blocs'] = sc(m_sab - m_sa, T)
+    r['sc_traitements'] = sc(m_t - m, S * A * B)
+    r['sc_trait_sites'] = sc(m_st - m_s - m_t + m, A * B)
+    r['sc_trait_annees'] = sc(m_at - m_a - m_t + m, S * B)
+    r['sc_trait_sites_annees'] = sc(m_sat - m_sa - m_st - m_at + m_s + m_a + m_t - m, B)
+    r['sc_erreur'] = r['sc_total'] - sum(r[f'sc_{effet}'] for effet in SOURCES if effet != 'erreur')
+
+    # Interaction traitements × environnements regroupée : dénominateur du F
+    # des traitements quand les environnements sont aléatoires
+    r['ddl_interaction_te'] = r['ddl_trait_sites'] + r['ddl_trait_annees'] + r['ddl_trait_sites_annees']
+    r['sc_interaction_te'] = r['sc_trait_sites'] + r['sc_trait_annees'] + r['sc_trait_sites_annees']
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for effet in list(SOURCES) + ['interaction_te']:
+            # Un seul site ou une seule année : la source n'existe pas
+            r[f'cm_{effet}'] = r[f'sc_{effet}'] / r[f'ddl_{effet}'] if r[f'ddl_{effet}'] > 0 else np.nan
+        for effet, (denominateur, _) in SOURCES.items():
+            if denominateur == 'interaction_te' and r['ddl_interaction_te'] == 0:
+                denominateur = 'erreur'
+            if denominateur is not None:
+                r[f'f_{effet}'] = r[f'cm_{effet}'] / r[f'cm_{denominateur}']
+    return r
+
+
+# Composante : termes dont le CM est retranché du sien, par ordre de préférence.
+# Avec une seule année (ou un seul site), les strates de l'année disparaissent :
+# la composante est estimée contre le premier terme présent, par exemple les
+# sites contre les blocs.
+TERMES_RETRANCHES = {
+    'trait_sites_annees': ('erreur',),
+    'trait_sites': ('trait_sites_annees', 'erreur'),
+    'trait_annees': ('trait_sites_annees', 'erreur'),
+    'blocs': ('erreur',),
+    'sites_annees': ('blocs', 'erreur'),
+    'sites': ('sites_annees', 'blocs', 'erreur'),
+    'annees': ('sites_annees', 'blocs', 'erreur'),
+}
+
+
+def composantes_variance(resultats, dimensions):
+    """Composantes de variance (environnements aléatoires, traitements fixes)
+
+    Seules les sources présentes (DDL > 0) ont une composante.
+    """
+    S, A, B, T = dimensions
+    # Coefficient de la composante dans l'espérance de son CM
+    coefficients = {
+        'trait_sites_annees': B,
+        'trait_sites': A * B,
+        'trait_annees': S * B,
+        'blocs': T,
+        'sites_annees': B * T,
+        'sites': A * B * T,
+        'annees': S * B * T,
+    }
+    presentes = [effet for effet in SOURCES if resultats[f'ddl_{effet}'] > 0]
+    composantes = {'erreur': resultats['cm_erreur']}
+    for effet, termes in TERMES_RETRANCHES.items():
+        if effet in presentes:
+            terme = next(terme for terme in termes if terme in presentes)
+            composantes[effet] = (resultats[f'cm_{effet}'] - resultats[f'cm_{terme}']) / coefficients[effet]
+    # Estimations négatives ramenées à zéro (méthode des moments)
+    return {effet: np.maximum(valeur, 0.0) for effet, valeur in composantes.items()}
+
+
+def tableau_anova_combinee(resultats):
+    """Tableau d'ANOVA combinée pour l'affichage"""
+    lignes = []
+    for effet, (_, libelle) in SOURCES.items():
+        if resultats[f'ddl_{effet}'] == 0:
+            continue
+        lignes.append({
+            'Source de variation': libelle,
+            'DDL': resultats[f'ddl_{effet}'],
+            'Somme des carrés': resultats[f'sc_{effet}'],
+            'Carré moyen': resultats[f'cm_{effet}'],
+            'F calculé': resultats.get(f'f_{effet}', np.nan),
+        })
+    lignes.append({
+        'Source de variation': 'Total',
+        'DDL': resultats['ddl_total'],
+        'Somme des carrés': resultats['sc_total'],
+        'Carré moyen': np.nan,
+        'F calculé': np.nan,
+    })
+    return pd.DataFrame(lignes)
@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+# Test de Friedman (alternative par rangs au F des traitements d'un BRC) et
+# comparaisons multiples de Conover. Les rangs dans chaque bloc sont calculés
+# par un seul tri le long de l'axe des traitements, ex aequo compris, pour
+# autant de variables que voulu (axes de lot).
+
+
+def rangs_blocs(valeurs):
+    """Rangs (1..t) des traitements dans chaque bloc, rang moyen pour les ex aequo
+
+    valeurs : (..., nb_blocs, nb_traitements)
+    """
+    y = np.asarray(valeurs, dtype=float)
+    nb_trait = y.shape[-1]
+    ordre = np.argsort(y, axis=-1, kind='stable')
+    tries = np.take_along_axis(y, ordre, axis=-1)
+    positions = np.broadcast_to(np.arange(nb_trait), y.shape)
+
+    # Chaque groupe d'ex aequo reçoit la moyenne de sa première et de sa dernière position
+    debut_groupe = np.concatenate([np.ones(y.shape[:-1] + (1,), dtype=bool),
+                                   tries[..., 1:] != tries[..., :-1]], axis=-1)
+    fin_groupe = np.concatenate([debut_groupe[..., 1:],
+                                 np.ones(y.shape[:-1] + (1,), dtype=bool)], axis=-1)
+    premiere = np.maximum.accumulate(np.where(debut_groupe, positions, 0), axis=-1)
+    derniere = np.flip(np.minimum.accumulate(
+        np.flip(np.where(fin_groupe, positions, nb_trait - 1), axis=-1), axis=-1), axis=-1)
+    rangs_tries = (premiere + derniere) / 2 + 1
+
+    rangs = np.empty_like(rangs_tries)
+    np.put_along_axis(rangs, ordre, rangs_tries, axis=-1)
+    return rangs
+
+
+def test_friedman(valeurs, alpha=0.05):
+    """Test de Friedman et comparaisons de Conover, valeurs (..., nb_blocs, nb_traitements)
+
+    La statistique est corrigée pour les ex aequo ; la p-value vient de la loi
+    du χ² à t-1 DDL. Les comparaisons par paires utilisent la loi t de Student
+    à (b-1)(t-1) DDL sur les différences de sommes de rangs.
+    """
+    rangs = rangs_blocs(valeurs)
+    nb_blocs, nb_trait = rangs.shape[-2:]
+    sommes_rangs = rangs.sum(axis=-2)
+    somme_carres = (rangs ** 2).sum(axis=(-2, -1))
+    terme_c = nb_blocs * nb_trait * (nb_trait + 1) ** 2 / 4
+    ecart = sommes_rangs - nb_blocs * (nb_trait + 1) / 2
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        statistique = (nb_trait - 1) * (ecart ** 2).sum(axis=-1) / (somme_carres - terme_c)
+        ddl_erreur = (nb_blocs - 1) * (nb_trait - 1)
+        # Erreur type des différences de sommes de rangs (Conover)
+        erreur_type = np.sqrt(2 * (nb_blocs * somme_carres - (sommes_rangs ** 2).sum(axis=-1)) / ddl_erreur)
+        differences = np.abs(sommes_rangs[..., :, None] - sommes_rangs[..., None, :])
+        p_paires = 2 * stats.t.sf(differences / erreur_type[..., None, None], ddl_erreur)
+
+    return {
+        'statistique': statistique,
+        'ddl': nb_trait - 1,
+        'p_value': stats.chi2.sf(statistique, nb_trait - 1),
+        'sommes_rangs': sommes_rangs,
+        'rangs_moyens': sommes_rangs / nb_blocs,
+        'difference_critique': stats.t.ppf(1 - alpha / 2, ddl_erreur) * erreur_type,
+        'p_paires': p_paires,
+    }
+
+
+def tableau_comparaisons(resultats, traitements, alpha=0.05):
+    """Comparaisons par paires d'un seul jeu de données, pour l'affichage"""
+    i, j = np.triu_indices(len(traitements), k=1)
+    return pd.DataFrame({
+        'Traitement 1': np.asarray(traitements)[i],
+        'Traitement 2': np.asarray(traitements)[j],
+        'Écart des sommes de rangs': np.abs(resultats['sommes_rangs'][i] - resultats['sommes_rangs'][j]),
+        'p-value': resultats['p_paires'][i, j],
+        'Différents ?': np.where(resultats['p_paires'][i, j] < alpha, "OUI", "NON"),
+    })
@@ -0,0 +1,78 @@
+import io
+import time
+
+import matplotlib
+matplotlib.use('Agg')
+import pandas as pd
+
+from anova import ddl_brc
+from banque_exercices import TAILLES, charger_banque
+from distribution_f import ALPHAS, borne_axe, f_critique, grille_densite, table_f
+
+# Préchauffage des ressources communes à toutes les sessions : cache des polices
+# et moteur de rendu matplotlib, tables de la loi F, banque d'exercices. Lancé
+# une fois par processus serveur (et en ligne de commande au démarrage du
+# conteneur, pour écrire les caches disque avant la première connexion).
+
+
+def _matplotlib():
+    # Premier import : lecture (ou construction) du cache des polices
+    import matplotlib.pyplot as plt
+    from matplotlib import font_manager
+    font_manager.findfont(font_manager.FontProperties(family=['sans-serif']))
+    fig, ax = plt.subplots(figsize=(2, 2))
+    ax.bar(['F calculé', 'F théorique'], [1.0, 2.0])
+    ax.set_title('Préchauffage')
+    fig.savefig(io.BytesIO(), format='png')
+    plt.close(fig)
+
+
+def _tables_f():
+    table_f()
+    # Grilles de densité et seuils de toutes les tailles de BRC de la banque
+    for t, b in TAILLES['BRC']:
+        ddl = ddl_brc(t, b)
+        ddl2 = int(ddl['ddl_erreur'])
+        for ddl1 in (int(ddl['ddl_traitements']), int(ddl['ddl_blocs'])):
+            # Même clé que donnees_explorateur pour un F calculé sous le quantile à 1 %
+            grille_densite(ddl1, ddl2, borne_axe(ddl1, ddl2))
+            for alpha in ALPHAS:
+                f_critique(alpha, ddl1, ddl2)
+
+
+def _banque():
+    # Génère le fichier au premier démarrage, puis le garde en mémoire
+    charger_banque()
+
+
+RESSOURCES = {
+    'matplotlib': ("Polices et rendu matplotlib", _matplotlib),
+    'tables_f': ("Tables et densités de la loi F", _tables_f),
+    'banque': ("Banque d'exercices", _banque),
+}
+
+
+def prechauffer():
+    """Charge toutes les ressources partagées ; retourne le rapport des temps
+
+    Chaque ressource est chargée puis redemandée : le premier temps est ce que
+    paierait la première requête sans préchauffage, le second ce qu'elle paie
+    une fois la ressource chargée.
+    """
+    lignes = []
+    for libelle, charger in RESSOURCES.values():
+        debut = time.perf_counter()
+        charger()
+        a_froid = time.perf_counter() - debut
+        debut = time.perf_counter()
+        charger()
+        prechauffe = time.perf_counter() - debut
+        lignes.append({'Ressource': libelle, 'À froid (s)': a_froid,
+                       'Préchauffé (s)': prechauffe, 'Gain (s)': a_froid - prechauffe})
+    return pd.DataFrame(lignes)
+
+
+if __name__ == '__main__':
+    rapport = prechauffer()
+    print(rapport.to_string(index=False, float_format='%.3f'))
+    print(f"Latence évitée à la première requête : {rapport['Gain (s)'].sum():.2f} s")
@@ -0,0 +1,340 @@
+import base64
+import html
+import io
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from string import Template
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+from matplotlib.backends.backend_pdf import PdfPages
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from anova import anova_brc
+from cache_resultats import DOSSIER_CACHE, cache_disque, empreinte
+from distribution_f import f_critique
+from donnees_manquantes import anova_brc_incomplet
+
+# Rapports de l'étape 8 (tableau d'ANOVA, verdict du CV%, graphiques des étapes 7
+# et 8) en HTML et en PDF, pour un essai ou pour des milliers d'essais. Les
+# figures sont rendues dans des processus séparés et rangées dans le cache disque
+# partagé (cache_resultats.py) d'après le contenu des données.
+
+ALPHA = 0.05
+
+CSS = """
+body { font-family: sans-serif; margin: 2rem; color: #222; }
+h1 { color: #2e7d32; }
+table { border-collapse: collapse; margin: 1rem 0; }
+th, td { border: 1px solid #ccc; padding: 0.4rem 0.8rem; text-align: right; }
+th { background: #4CAF50; color: white; }
+td:first-child { text-align: left; }
+.success { color: #2e7d32; } .info { color: #1565c0; }
+.warning { color: #ef6c00; } .error { color: #c62828; }
+img { max-width: 100%; }
+"""
+
+MODELE_HTML = Template("""<!DOCTYPE html>
+<html lang="fr">
+<head><meta charset="utf-8"><title>Rapport ANOVA - $nom</title><style>$css</style></head>
+<body>
+<h1>🌱 Rapport d'analyse de variance : $nom</h1>
+<p>Bloc Randomisé Complet : $nb_traitements traitements × $nb_blocs blocs</p>
+<h2>Tableau d'ANOVA</h2>
+$tableau
+<h2>Coefficient de Variation</h2>
+<p class="$niveau_cv">$verdict_cv</p>
+<h2>Comparaison F calculé / F théorique</h2>
+<img src="data:image/png;base64,$figure_f" alt="Comparaison des F">
+<h2>Moyennes par traitement</h2>
+<img src="data:image/png;base64,$figure_moyennes" alt="Moyennes par traitement">
+</body>
+</html>
+""")
+
+
+def verdict_cv(cv_percent):
+    """Niveau (success/info/warning/error) et message du CV%"""
+    if cv_percent < 10:
+        return 'success', f"✅ CV% = {cv_percent:.1f}% : Très bonne précision expérimentale"
+    elif cv_percent < 20:
+        return 'info', f"✅ CV% = {cv_percent:.1f}% : Bonne précision expérimentale"
+    elif cv_percent < 30:
+        return 'warning', f"⚠️ CV% = {cv_percent:.1f}% : Précision moyenne"
+    else:
+        return 'error', f"❌ CV% = {cv_percent:.1f}% : Précision insuffisante"
+
+
+def tableau_anova(resultats, alpha=ALPHA):
+    """Tableau d'ANOVA du BRC tel qu'affiché à l'étape 8"""
+    f_theor_trait = f_critique(alpha, resultats['ddl_traitements'], resultats['ddl_erreur'])
+    f_theor_blocs = f_critique(alpha, resultats['ddl_blocs'], resultats['ddl_erreur'])
+    p_value_trait = 1 - stats.f.cdf(resultats['f_traitements'], resultats['ddl_traitements'], resultats['ddl_erreur'])
+    p_value_blocs = 1 - stats.f.cdf(resultats['f_blocs'], resultats['ddl_blocs'], resultats['ddl_erreur'])
+
+    return pd.DataFrame({
+        'Source de variation': ['Traitements', 'Blocs', 'Erreur', 'Total'],
+        'DDL': [resultats['ddl_traitements'], resultats['ddl_blocs'], resultats['ddl_erreur'], resultats['ddl_total']],
+        'Somme des carrés': [resultats['sc_traitements'], resultats['sc_blocs'], resultats['sc_erreur'],
+                             resultats['sc_total']],
+        'Carré moyen': [resultats['cm_traitements'], resultats['cm_blocs'], resultats['cm_erreur'], np.nan],
+        'F calculé': [resultats['f_traitements'], resultats['f_blocs'], np.nan, np.nan],
+        f'F théorique ({alpha:.0%})': [f_theor_trait, f_theor_blocs, np.nan, np.nan],
+        'p-value': [p_value_trait, p_value_blocs, np.nan, np.nan],
+        'Significatif ?': [
+            "OUI" if resultats['f_traitements'] > f_theor_trait else "NON",
+            "OUI" if resultats['f_blocs'] > f_theor_blocs else "NON",
+            "-",
+            "-"
+        ]
+    }).astype({colonne: float for colonne in ('Somme des carrés', 'Carré moyen', 'F calculé',
+                                              f'F théorique ({alpha:.0%})', 'p-value')})
+
+
+def tableau_contrastes(contrastes, noms, ddl_erreur, alpha=ALPHA):
+    """Lignes des contrastes (analyse_contrastes) au format de tableau_anova, à insérer sous les traitements"""
+    f_theor = f_critique(alpha, 1, ddl_erreur)
+    return pd.DataFrame({
+        'Source de variation': [f"↳ {nom}" for nom in noms],
+        'DDL': 1,
+        'Somme des carrés': contrastes['sc'],
+        'Carré moyen': contrastes['sc'],
+        'F calculé': contrastes['f'],
+        f'F théorique ({alpha:.0%})': f_theor,
+        'p-value': stats.f.sf(contrastes['f'], 1, ddl_erreur),
+        'Significatif ?': np.where(contrastes['f'] > f_theor, "OUI", "NON"),
+    })
+
+
+def decimales_anova(tableau):
+    """Décimales affichées pour chaque colonne décimale d'un tableau (4 pour les p-values)"""
+    return {colonne: 4 if colonne == 'p-value' else 3
+            for colonne in tableau.select_dtypes(include='float').columns}
+
+
+def tableau_texte(tableau):
+    """Tableau d'ANOVA formaté en texte ('-' pour les cases vides), pour HTML et PDF"""
+    texte = tableau.copy()
+    for colonne, decimales in decimales_anova(tableau).items():
+        texte[colonne] = [f"{valeur:.{decimales}f}" if pd.notna(valeur) else "-" for valeur in tableau[colonne]]
+    return texte
+
+
+def libelle_effet(effet):
+    """'ab' -> 'A × B'"""
+    return ' × '.join(effet.upper())
+
+
+def tableau_factoriel(resultats, effets, alpha=ALPHA):
+    """Décomposition factorielle de la SC des traitements, au format de tableau_anova"""
+    lignes = []
+    for effet in effets:
+        f_theor = f_critique(alpha, resultats[f'ddl_{effet}'], resultats['ddl_erreur'])
+        p_value = stats.f.sf(resultats[f'f_{effet}'], resultats[f'ddl_{effet}'], resultats['ddl_erreur'])
+        lignes.append({
+            'Source de variation': libelle_effet(effet),
+            'DDL': resultats[f'ddl_{effet}'],
+            'Somme des carrés': float(resultats[f'sc_{effet}']),
+            'Carré moyen': float(resultats[f'cm_{effet}']),
+            'F calculé': float(resultats[f'f_{effet}']),
+            f'F théorique ({alpha:.0%})': f_theor,
+            'p-value': float(p_value),
+            'Significatif ?': "OUI" if resultats[f'f_{effet}'] > f_theor else "NON",
+        })
+    lignes.append({
+        'Source de variation': 'Erreur',
+        'DDL': resultats['ddl_erreur'],
+        'Somme des carrés': float(resultats['sc_erreur']),
+        'Carré moyen': float(resultats['cm_erreur']),
+        'F calculé': np.nan, f'F théorique ({alpha:.0%})': np.nan, 'p-value': np.nan, 'Significatif ?': "-",
+    })
+    return pd.DataFrame(lignes)
+
+
+def figure_comparaison_f(resultats, alpha=ALPHA):
+    """Graphique de l'étape 7 : F calculé vs F théorique"""
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(12, 5))
+    categories = ['F calculé', 'F théorique']
+    for ax, effet, titre in ((ax1, 'traitements', 'Traitements'), (ax2, 'blocs', 'Blocs')):
+        f_calc = resultats[f'f_{effet}']
+        f_theor = f_critique(alpha, resultats[f'ddl_{effet}'], resultats['ddl_erreur'])
+        ax.bar(categories, [f_calc, f_theor], color=['red' if f_calc > f_theor else 'blue', 'gray'], alpha=0.7)
+        ax.set_title(titre)
+        ax.set_ylabel('Valeur F')
+        ax.grid(True, alpha=0.3)
+    plt.tight_layout()
+    return fig
+
+
+def figure_moyennes(valeurs):
+    """Graphique de l'étape 8 : moyennes par traitement avec écart-type"""
+    moyennes = np.nanmean(valeurs, axis=0)
+    ecarts_types = np.nanstd(valeurs, axis=0, ddof=1)
+
+    fig, ax = plt.subplots(figsize=(10, 6))
+    x_pos = np.arange(len(moyennes))
+    bars = ax.bar(x_pos, moyennes, yerr=ecarts_types, capsize=5, alpha=0.7,
+                  color='lightblue', edgecolor='navy')
+    ax.set_xlabel('Traitements')
+    ax.set_ylabel('Valeur moyenne')
+    ax.set_title('Moyennes par traitement avec écart-type')
+    ax.set_xticks(x_pos)
+    ax.set_xticklabels([f'T{i+1}' for i in x_pos])
+    ax.grid(True, alpha=0.3)
+    for bar, mean_val in zip(bars, moyennes):
+        ax.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 0.1,
+                f'{mean_val:.2f}', ha='center', va='bottom')
+    plt.tight_layout()
+    return fig
+
+
+def _figure_png(nom_figure, valeurs, dossier_cache=DOSSIER_CACHE):
+    # Les figures ne dépendent que des valeurs : même essai, même image
+    valeurs = np.ascontiguousarray(valeurs, dtype=float)
+    return cache_disque(dossier_cache).obtenir(empreinte('figure', nom_figure, ALPHA, valeurs),
+                                               lambda: _rendre_png(nom_figure, valeurs))
+
+
+def _rendre_png(nom_figure, valeurs):
+    if nom_figure == 'comparaison_f':
+        fig = figure_comparaison_f(_anova(valeurs))
+    else:
+        fig = figure_moyennes(valeurs)
+    tampon = io.BytesIO()
+    fig.savefig(tampon, format='png', dpi=100)
+    plt.close(fig)
+    return tampon.getvalue()
+
+
+def _anova(valeurs):
+    # Parcelles perdues : même traitement qu'à l'étape 4
+    return anova_brc_incomplet(valeurs) if np.isnan(valeurs).any() else anova_brc(valeurs)
+
+
+def _resume(valeurs):
+    resultats = _anova(valeurs)
+    cv_percent = np.sqrt(resultats['cm_erreur']) / np.nanmean(valeurs) * 100
+    return resultats, verdict_cv(cv_percent)
+
+
+def rapport_html(nom, valeurs, dossier_cache=DOSSIER_CACHE):
+    """Rapport HTML autonome (figures intégrées en base64)"""
+    resultats, (niveau_cv, message_cv) = _resume(valeurs)
+    nb_blocs, nb_traitements = np.shape(valeurs)
+    return MODELE_HTML.substitute(
+        # Le nom vient du fichier des essais : échappé avant d'entrer dans le HTML
+        nom=html.escape(str(nom)),
+        css=CSS,
+        nb_traitements=nb_traitements,
+        nb_blocs=nb_blocs,
+        tableau=tableau_texte(tableau_anova(resultats)).to_html(index=False, border=0),
+        niveau_cv=niveau_cv,
+        verdict_cv=message_cv,
+        figure_f=base64.b64encode(_figure_png('comparaison_f', valeurs, dossier_cache)).decode(),
+        figure_moyennes=base64.b64encode(_figure_png('moyennes', valeurs, dossier_cache)).decode(),
+    )
+
+
+def rapport_pdf(nom, valeurs, dossier_cache=DOSSIER_CACHE):
+    """Rapport PDF : tableau d'ANOVA et CV% en page 1, graphiques ensuite"""
+    resultats, (_, message_cv) = _resume(valeurs)
+    tableau = tableau_texte(tableau_anova(resultats))
+
+    tampon = io.BytesIO()
+    with PdfPages(tampon) as pdf:
+        fig, ax = plt.subplots(figsize=(11.7, 8.3))
+        ax.axis('off')
+        ax.set_title(f"Rapport d'analyse de variance : {nom}", fontsize=16, loc='left')
+        table = ax.table(cellText=tableau.values, colLabels=tableau.columns, loc='upper center')
+        table.auto_set_font_size(False)
+        table.set_fontsize(9)
+        table.scale(1, 1.6)
+        # Sans le pictogramme initial, absent des polices PDF standard
+        ax.text(0, 0.35, message_cv.split(' ', 1)[1], fontsize=12, transform=ax.transAxes)
+        pdf.savefig(fig)
+        plt.close(fig)
+        # Les graphiques reprennent les PNG déjà rendus pour le rapport HTML
+        for nom_figure in ('comparaison_f', 'moyennes'):
+            image = plt.imread(io.BytesIO(_figure_png(nom_figure, valeurs, dossier_cache)))
+            fig = plt.figure(figsize=(image.shape[1] / 100, image.shape[0] / 100))
+            fig.figimage(image)
+            pdf.savefig(fig)
+            plt.close(fig)
+    return tampon.getvalue()
+
+
+def nom_fichier(nom):
+    """Nom de fichier sûr pour un essai : lettres ASCII, chiffres, '_' et '-'"""
+    return re.sub(r'[^A-Za-z0-9_-]+', '_', str(nom)).strip('_') or 'essai'
+
+
+def _chemin_rapport(dossier_sortie, nom):
+    # Le nom vient du fichier des essais : le rapport ne doit pas sortir du dossier
+    dossier = os.path.realpath(dossier_sortie)
+    base = os.path.realpath(os.path.join(dossier, nom_fichier(nom)))
+    if os.path.commonpath([dossier, base]) != dossier or base == dossier:
+        raise ValueError(f"Nom d'essai invalide : {nom!r}")
+    return base
+
+
+def _generer_un_rapport(arguments):
+    nom, valeurs, dossier_sortie, formats, dossier_cache = arguments
+    chemins = []
+    base = _chemin_rapport(dossier_sortie, nom)
+    if 'html' in formats:
+        with open(f'{base}.html', 'w', encoding='utf-8') as fichier:
+            fichier.write(rapport_html(nom, valeurs, dossier_cache))
+        chemins.append(f'{base}.html')
+    if 'pdf' in formats:
+        with open(f'{base}.pdf', 'wb') as fichier:
+            fichier.write(rapport_pdf(nom, valeurs, dossier_cache))
+        chemins.append(f'{base}.pdf')
+    return chemins
+
+
+def generer_rapports(essais, dossier_sortie, formats=('html', 'pdf'), nb_processus=None,
+                     dossier_cache=DOSSIER_CACHE):
+    """Génère les rapports d'un dictionnaire {nom de l'essai: tableau blocs × traitements}
+
+    Les fichiers portent le nom de l'essai réduit par nom_fichier ; deux essais
+    qui donneraient le même fichier sont refusés (ValueError).
+    """
+    fichiers = pd.Series([nom_fichier(nom) for nom in essais], index=list(essais), dtype=object)
+    doublons = fichiers[fichiers.duplicated(keep=False)]
+    if len(doublons):
+        raise ValueError("Essais de même nom de fichier : " + ", ".join(map(str, doublons.index)))
+    os.makedirs(dossier_sortie, exist_ok=True)
+    taches = [(nom, np.asarray(valeurs, dtype=float), dossier_sortie, formats, dossier_cache)
+              for nom, valeurs in essais.items()]
+    with ProcessPoolExecutor(max_workers=nb_processus) as executeur:
+        return [chemin for chemins in executeur.map(_generer_un_rapport, taches, chunksize=8)
+                for chemin in chemins]
+
+
+def _ordre_naturel(libelles):
+    # 'T2' avant 'T10', comme StockageParcelles.ordre : les barres T1..Tn des
+    # figures suivent alors les libellés du fichier
+    return sorted(libelles, key=lambda libelle: (len(str(libelle)), str(libelle)))
+
+
+def essais_depuis_csv(chemin_csv):
+    """Lit un CSV long (Essai, Bloc, Traitement, Valeur) en tableaux blocs × traitements
+
+    Blocs et traitements sont rangés dans l'ordre naturel de leurs libellés.
+    """
+    donnees = pd.read_csv(chemin_csv)
+    essais = {}
+    for nom, groupe in donnees.groupby('Essai'):
+        tableau = groupe.pivot(index='Bloc', columns='Traitement', values='Valeur')
+        essais[nom] = tableau.loc[_ordre_naturel(tableau.index), _ordre_naturel(tableau.columns)].to_numpy()
+    return essais
+
+
+if __name__ == '__main__':
+    chemins = generer_rapports(essais_depuis_csv(sys.argv[1]), sys.argv[2])
+    print(f"{len(chemins)} fichiers écrits dans {sys.argv[2]}")
@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+
+from anova import anova_brc, carres_moyens
+
+# BRC avec plusieurs échantillons par parcelle (plantes, images...). Les
+# valeurs sont rangées dans un tableau 3-D (bloc, traitement, échantillon) et
+# réduites par étapes : une seule somme sur les échantillons donne les moyennes
+# par parcelle, sur lesquelles se font toutes les autres SC ; l'écart aux
+# moyennes de parcelle est cumulé bloc par bloc pour ne jamais recopier tout le
+# tableau des échantillons.
+
+COLONNES = ['Bloc', 'Traitement', 'Valeur']
+
+# Effet : (dénominateur du F, libellé)
+SOURCES = {
+    'traitements': ('erreur', 'Traitements'),
+    'blocs': ('erreur', 'Blocs'),
+    'erreur': ('echantillonnage', 'Erreur expérimentale'),
+    'echantillonnage': (None, 'Erreur d\'échantillonnage'),
+}
+
+
+def tableau_3d(donnees):
+    """Passe du format long (une ligne par échantillon) au tableau (bloc, traitement, échantillon)"""
+    codes_blocs, blocs = pd.factorize(donnees['Bloc'], sort=True)
+    codes_trait, traitements = pd.factorize(donnees['Traitement'], sort=True)
+    rangs = donnees.groupby([codes_blocs, codes_trait]).cumcount().to_numpy()
+    effectifs = np.bincount(codes_blocs * len(traitements) + codes_trait,
+                            minlength=len(blocs) * len(traitements))
+    if effectifs.min() != effectifs.max() or effectifs.min() == 0:
+        raise ValueError("Chaque parcelle doit avoir le même nombre d'échantillons")
+    y = np.empty((len(blocs), len(traitements), effectifs[0]))
+    y[codes_blocs, codes_trait, rangs] = donnees['Valeur'].to_numpy(dtype=float)
+    return y, {'Bloc': blocs, 'Traitement': traitements}
+
+
+def anova_sous_echantillons(valeurs):
+    """ANOVA emboîtée, valeurs (..., nb_blocs, nb_traitements, nb_echantillons)"""
+    y = np.asarray(valeurs, dtype=float)
+    nb_blocs, nb_trait, nb_ech = y.shape[-3:]
+
+    # Étape 1 : moyennes par parcelle, calculées une seule fois
+    moyennes_parcelles = y.mean(axis=-1)
+    # Étape 2 : écarts aux moyennes de parcelle, cumulés bloc par bloc
+    sc_echantillonnage = np.zeros(y.shape[:-3])[()]
+    for b in range(nb_blocs):
+        ecarts = y[..., b, :, :] - moyennes_parcelles[..., b, :, None]
+        sc_echantillonnage += np.einsum('...ts,...ts->...', ecarts, ecarts)
+    # Étape 3 : BRC sur les moyennes, chaque moyenne pesant nb_ech échantillons
+    parcelles = anova_brc(moyennes_parcelles)
+
+    resultats = {
+        'ddl_traitements': nb_trait - 1,
+        'ddl_blocs': nb_blocs - 1,
+        'ddl_erreur': (nb_trait - 1) * (nb_blocs - 1),
+        'ddl_echantillonnage': nb_blocs * nb_trait * (nb_ech - 1),
+        'ddl_total': nb_blocs * nb_trait * nb_ech - 1,
+    }
+    for effet in ('traitements', 'blocs', 'erreur'):
+        resultats[f'sc_{effet}'] = nb_ech * parcelles[f'sc_{effet}']
+    resultats['sc_echantillonnage'] = sc_echantillonnage
+    resultats['sc_total'] = nb_ech * parcelles['sc_total'] + sc_echantillonnage
+
+    carres_moyens(resultats, ['traitements', 'blocs'], 'erreur')
+    carres_moyens(resultats, ['erreur'], 'echantillonnage')
+    # Composantes de variance : entre échantillons d'une parcelle, entre parcelles
+    resultats['var_echantillonnage'] = resultats['cm_echantillonnage']
+    resultats['var_parcelles'] = np.maximum(
+        (resultats['cm_erreur'] - resultats['cm_echantillonnage']) / nb_ech, 0.0)
+    resultats['moyennes_parcelles'] = moyennes_parcelles
+    return resultats
+
+
+def tableau_anova_emboitee(resultats):
+    """Tableau d'ANOVA emboîtée pour l'affichage"""
+    lignes = []
+    for effet, (_, libelle) in SOURCES.items():
+        lignes.append({
+            'Source de variation': libelle,
+            'DDL': resultats[f'ddl_{effet}'],
+            'Somme des carrés': resultats[f'sc_{effet}'],
+            'Carré moyen': resultats[f'cm_{effet}'],
+            'F calculé': resultats.get(f'f_{effet}', np.nan),
+        })
+    lignes.append({
+        'Source de variation': 'Total',
+        'DDL': resultats['ddl_total'],
+        'Somme des carrés': resultats['sc_total'],
+        'Carré moyen': np.nan,
+        'F calculé': np.nan,
+    })
+    return pd.DataFrame(lignes)
@@ -0,0 +1,64 @@
+import numpy as np
+from scipy import sparse
+
+from covariance import anova_covariance
+
+# Ajustement spatial de Papadakis : chaque parcelle porte ses coordonnées
+# (rang, colonne) dans le champ ; la covariable est la moyenne des résidus
+# (écarts aux moyennes de traitement) des parcelles voisines, puis l'analyse
+# de covariance retire la tendance du sol. L'index des voisins est une matrice
+# creuse construite une fois à partir des coordonnées : l'ajustement n'est
+# ensuite qu'un produit matrice creuse × vecteur.
+
+# Voisins directs : même rang, colonnes adjacentes ; même colonne, rangs adjacents
+DECALAGES = ((0, -1), (0, 1), (-1, 0), (1, 0))
+
+
+def index_voisins(rangs, colonnes, decalages=DECALAGES):
+    """Matrice creuse (n, n) : ligne i = moyenne des voisins de la parcelle i"""
+    rangs = np.asarray(rangs, dtype=np.int64).ravel()
+    colonnes = np.asarray(colonnes, dtype=np.int64).ravel()
+    n = len(rangs)
+    # Code unique par position (marge de 1 autour du champ pour les décalages)
+    largeur = colonnes.max() - colonnes.min() + 3
+    codes = (rangs - rangs.min() + 1) * largeur + (colonnes - colonnes.min() + 1)
+    ordre = np.argsort(codes)
+    codes_tries = codes[ordre]
+    if (codes_tries[1:] == codes_tries[:-1]).any():
+        raise ValueError("Deux parcelles ont les mêmes coordonnées")
+
+    lignes, voisins = [], []
+    for d_rang, d_colonne in decalages:
+        cibles = codes + d_rang * largeur + d_colonne
+        positions = np.minimum(np.searchsorted(codes_tries, cibles), n - 1)
+        trouves = codes_tries[positions] == cibles
+        lignes.append(np.flatnonzero(trouves))
+        voisins.append(ordre[positions[trouves]])
+    lignes = np.concatenate(lignes)
+    voisins = np.concatenate(voisins)
+
+    nb_voisins = np.bincount(lignes, minlength=n)
+    poids = 1.0 / nb_voisins[lignes]
+    return sparse.csr_matrix((poids, (lignes, voisins)), shape=(n, n))
+
+
+def covariable_papadakis(valeurs, voisins):
+    """Moyenne des résidus voisins, valeurs (..., nb_blocs, nb_traitements)
+
+    voisins : index_voisins des parcelles dans l'ordre de valeurs.reshape(..., -1).
+    """
+    y = np.asarray(valeurs, dtype=float)
+    residus = y - y.mean(axis=-2, keepdims=True)
+    plats = residus.reshape(-1, y.shape[-2] * y.shape[-1])
+    return (voisins @ plats.T).T.reshape(y.shape)
+
+
+def ajustement_papadakis(valeurs, rangs, colonnes, voisins=None):
+    """ANCOVA sur la covariable de Papadakis ; rangs et colonnes de forme (nb_blocs, nb_traitements)"""
+    if voisins is None:
+        voisins = index_voisins(rangs, colonnes)
+    covariable = covariable_papadakis(valeurs, voisins)
+    # Une covariable par variable réponse : axe des covariables en dernier
+    resultats = anova_covariance(valeurs, covariable[..., None])
+    resultats['covariable'] = covariable
+    return resultats
@@ -0,0 +1,165 @@
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Stockage en colonnes sur disque des données à la parcelle (ou au point de
+# moissonneuse) : un fichier binaire brut par colonne, ouvert en np.memmap, et un
+# fichier JSON de métadonnées. Les analyses lisent les colonnes par morceaux via
+# des vues sans copie ; seules les moyennes par parcelle (blocs × traitements)
+# sont matérialisées en mémoire.
+
+COLONNES = {
+    'bloc': np.int32,
+    'traitement': np.int32,
+    'valeur': np.float64,
+}
+TAILLE_MORCEAU = 1_000_000
+# Seuls les stockages rangés sous cette racine sont ouverts depuis l'application
+RACINE_STOCKAGES = os.environ.get(
+    'RACINE_STOCKAGES', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'stockages'))
+
+
+def _chemin_colonne(dossier, nom):
+    return os.path.join(dossier, f'{nom}.bin')
+
+
+def _chemin_meta(dossier):
+    return os.path.join(dossier, 'meta.json')
+
+
+def resoudre_stockage(nom, racine=RACINE_STOCKAGES):
+    """Chemin réel du stockage nom, sous-dossier de racine ; ValueError s'il en sort"""
+    racine = os.path.realpath(racine)
+    dossier = os.path.realpath(os.path.join(racine, nom))
+    # realpath résout '..' et les liens symboliques avant la vérification
+    if dossier == racine or os.path.commonpath([racine, dossier]) != racine:
+        raise ValueError("Le stockage doit être un sous-dossier de la racine des stockages")
+    return dossier
+
+
+def est_stockage(dossier):
+    return os.path.isfile(_chemin_meta(dossier))
+
+
+def version_stockage(dossier):
+    """Date d'écriture des métadonnées, écrites en dernier à chaque import"""
+    return os.path.getmtime(_chemin_meta(dossier))
+
+
+def importer_csv(chemin_csv, dossier, taille_morceau=TAILLE_MORCEAU,
+                 colonne_bloc='Bloc', colonne_traitement='Traitement', colonne_valeur='Valeur',
+                 dtype_valeur=np.float64):
+    """Convertit un CSV (format long) en stockage colonnes, morceau par morceau
+
+    dtype_valeur=np.float32 divise par deux la taille de la colonne des valeurs ;
+    les cumuls par parcelle restent calculés en float64.
+    """
+    os.makedirs(dossier, exist_ok=True)
+    types = dict(COLONNES, valeur=dtype_valeur)
+    libelles = {'bloc': pd.Index([]), 'traitement': pd.Index([])}
+    nb_lignes = 0
+    fichiers = {nom: open(_chemin_colonne(dossier, nom), 'wb') for nom in COLONNES}
+    try:
+        for morceau in pd.read_csv(chemin_csv, chunksize=taille_morceau,
+                                   usecols=[colonne_bloc, colonne_traitement, colonne_valeur]):
+            colonnes = {}
+            for nom, source in (('bloc', colonne_bloc), ('traitement', colonne_traitement)):
+                # Les libellés rencontrés pour la première fois reçoivent le code suivant
+                nouveaux = pd.Index(morceau[source].unique()).difference(libelles[nom], sort=False)
+                libelles[nom] = libelles[nom].append(nouveaux)
+                colonnes[nom] = libelles[nom].get_indexer(morceau[source])
+            colonnes['valeur'] = morceau[colonne_valeur].to_numpy()
+            for nom, dtype in types.items():
+                fichiers[nom].write(np.ascontiguousarray(colonnes[nom], dtype=dtype).tobytes())
+            nb_lignes += len(morceau)
+    finally:
+        for fichier in fichiers.values():
+            fichier.close()
+
+    meta = {
+        'nb_lignes': nb_lignes,
+        'colonnes': {nom: np.dtype(dtype).str for nom, dtype in types.items()},
+        'libelles': {nom: [str(libelle) for libelle in index] for nom, index in libelles.items()},
+    }
+    with open(_chemin_meta(dossier), 'w') as fichier:
+        json.dump(meta, fichier)
+    return StockageParcelles(dossier)
+
+
+class StockageParcelles:
+    """Données à la parcelle stockées en colonnes memmap"""
+
+    def __init__(self, dossier):
+        self.dossier = dossier
+        with open(_chemin_meta(dossier)) as fichier:
+            self.meta = json.load(fichier)
+        self.nb_lignes = self.meta['nb_lignes']
+        self.libelles = self.meta['libelles']
+        self._colonnes = {}
+
+    def __len__(self):
+        return self.nb_lignes
+
+    @property
+    def nb_blocs(self):
+        return len(self.libelles['bloc'])
+
+    @property
+    def nb_traitements(self):
+        return len(self.libelles['traitement'])
+
+    def colonne(self, nom):
+        """Vue memmap (lecture seule) sur une colonne entière"""
+        if nom not in self._colonnes:
+            self._colonnes[nom] = np.memmap(_chemin_colonne(self.dossier, nom), mode='r',
+                                            dtype=np.dtype(self.meta['colonnes'][nom]),
+                                            shape=(self.nb_lignes,))
+        return self._colonnes[nom]
+
+    def morceaux(self, taille_morceau=TAILLE_MORCEAU, colonnes=tuple(COLONNES)):
+        """Itère sur des tranches (vues sans copie) de chaque colonne"""
+        vues = {nom: self.colonne(nom) for nom in colonnes}
+        for debut in range(0, self.nb_lignes, taille_morceau):
+            yield {nom: vue[debut:debut + taille_morceau] for nom, vue in vues.items()}
+
+    def statistiques_parcelles(self, taille_morceau=TAILLE_MORCEAU):
+        """Effectifs, sommes et sommes de carrés par parcelle, cumulés morceau par morceau"""
+        nb_cellules = self.nb_blocs * self.nb_traitements
+        effectifs = np.zeros(nb_cellules)
+        sommes = np.zeros(nb_cellules)
+        sommes_carres = np.zeros(nb_cellules)
+        for morceau in self.morceaux(taille_morceau):
+            cellules = morceau['bloc'].astype(np.int64) * self.nb_traitements + morceau['traitement']
+            # Cumuls en float64 même quand la colonne est stockée en float32
+            valeurs = morceau['valeur'].astype(np.float64)
+            effectifs += np.bincount(cellules, minlength=nb_cellules)
+            sommes += np.bincount(cellules, weights=valeurs, minlength=nb_cellules)
+            sommes_carres += np.bincount(cellules, weights=valeurs * valeurs, minlength=nb_cellules)
+        forme = (self.nb_blocs, self.nb_traitements)
+        return effectifs.reshape(forme), sommes.reshape(forme), sommes_carres.reshape(forme)
+
+    def ordre(self, nom):
+        """Codes triés dans l'ordre naturel des libellés ('Bloc_2' avant 'Bloc_10')"""
+        libelles = self.libelles[nom]
+        return sorted(range(len(libelles)), key=lambda code: (len(libelles[code]), libelles[code]))
+
+    def moyennes_parcelles(self, taille_morceau=TAILLE_MORCEAU):
+        """Tableau blocs × traitements des moyennes par parcelle (NaN si parcelle vide)
+
+        Lignes et colonnes suivent l'ordre naturel des libellés.
+        """
+        effectifs, sommes, _ = self.statistiques_parcelles(taille_morceau)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            moyennes = np.where(effectifs > 0, sommes / effectifs, np.nan)
+        return moyennes[np.ix_(self.ordre('bloc'), self.ordre('traitement'))]
+
+
+if __name__ == '__main__':
+    compact = '--float32' in sys.argv
+    chemins = [argument for argument in sys.argv[1:] if not argument.startswith('--')]
+    stockage = importer_csv(chemins[0], chemins[1], dtype_valeur=np.float32 if compact else np.float64)
+    print(f"{len(stockage)} lignes, {stockage.nb_blocs} blocs, {stockage.nb_traitements} traitements "
+          f"écrits dans {stockage.dossier}")
@@ -0,0 +1,176 @@
+import functools
+import io
+import itertools
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+# File de tâches longues (correction d'examens par lot, gros fichiers
+# multi-environnements) exécutées par un groupe de processus, hors du fil du
+# script Streamlit : la page reste réactive et affiche la progression. Une
+# tâche est découpée en morceaux indépendants soumis séparément ; la
+# progression est la part des morceaux terminés et l'annulation retire les
+# morceaux pas encore commencés. Le résultat assemblé est remis une seule fois
+# à la session, qui le garde : la file oublie alors la tâche. Les tâches
+# annulées et celles jamais relevées (session fermée) sont retirées au plus tard
+# DUREE_MAX secondes après leur soumission.
+
+MAX_TACHES_PAR_SESSION = 2
+DUREE_MAX = 30 * 60
+TAILLE_MORCEAU_COPIES = 5_000
+
+
+class _Tache:
+    __slots__ = ('nom', 'session', 'etape', 'morceaux', 'assembler', 'soumise', 'annulee')
+
+    def __init__(self, nom, session, etape, morceaux, assembler):
+        self.nom = nom
+        self.session = session
+        self.etape = etape
+        self.morceaux = morceaux
+        self.assembler = assembler
+        self.soumise = time.monotonic()
+        self.annulee = False
+
+    @property
+    def terminee(self):
+        return all(morceau.done() for morceau in self.morceaux)
+
+    @property
+    def erreur(self):
+        for morceau in self.morceaux:
+            if morceau.done() and not morceau.cancelled() and morceau.exception() is not None:
+                return morceau.exception()
+        return None
+
+
+class FileTaches:
+    """File de tâches partagée par toutes les sessions d'un processus serveur"""
+
+    def __init__(self, nb_processus=None, max_par_session=MAX_TACHES_PAR_SESSION, duree_max=DUREE_MAX):
+        # 'spawn' : le serveur a déjà des fils d'exécution, un fork pourrait se bloquer
+        self._executeur = ProcessPoolExecutor(max_workers=nb_processus,
+                                              mp_context=multiprocessing.get_context('spawn'))
+        self._taches = {}
+        self._verrou = threading.Lock()
+        self._numeros = itertools.count(1)
+        self.max_par_session = max_par_session
+        self.duree_max = duree_max
+
+    # Toute lecture ou modification de self._taches se fait sous self._verrou :
+    # les sessions appellent la file depuis leurs propres fils d'exécution
+
+    @staticmethod
+    def _annuler_tache(tache):
+        if not tache.terminee:
+            tache.annulee = True
+            for morceau in tache.morceaux:
+                morceau.cancel()
+
+    def _nettoyer(self):
+        # Tâches annulées et arrêtées, ou trop anciennes pour être encore attendues (verrou pris)
+        limite = time.monotonic() - self.duree_max
+        perimees = [identifiant for identifiant, tache in self._taches.items()
+                    if (tache.annulee and tache.terminee) or tache.soumise < limite]
+        for identifiant in perimees:
+            self._annuler_tache(self._taches.pop(identifiant))
+
+    def soumettre(self, session, etape, nom, fonction, morceaux, assembler=None):
+        """Soumet fonction(morceau) pour chaque morceau ; retourne l'identifiant de la tâche
+
+        assembler(liste des résultats) forme le résultat final (par défaut le
+        résultat de l'unique morceau). Lève ValueError s'il n'y a aucun morceau
+        ou si la session a déjà max_par_session tâches en cours.
+        """
+        morceaux = list(morceaux)
+        if not morceaux:
+            raise ValueError("Aucune donnée à traiter")
+        with self._verrou:
+            self._nettoyer()
+            en_cours = sum(1 for tache in self._taches.values()
+                           if tache.session == session and not tache.annulee and not tache.terminee)
+            if en_cours >= self.max_par_session:
+                raise ValueError(f"{en_cours} tâches déjà en cours : attendez qu'une se termine")
+            identifiant = next(self._numeros)
+            futurs = [self._executeur.submit(fonction, morceau) for morceau in morceaux]
+            self._taches[identifiant] = _Tache(nom, session, etape, futurs,
+                                               assembler or (lambda resultats: resultats[0]))
+        return identifiant
+
+    def etat(self, identifiant):
+        """Nom, progression (0 à 1), terminee, annulee et erreur éventuelle d'une tâche
+
+        None si la file ne connaît pas (ou plus) la tâche.
+        """
+        with self._verrou:
+            tache = self._taches.get(identifiant)
+        if tache is None:
+            return None
+        faits = sum(morceau.done() for morceau in tache.morceaux)
+        return {
+            'nom': tache.nom,
+            'progression': faits / max(len(tache.morceaux), 1),
+            'terminee': tache.terminee,
+            'annulee': tache.annulee,
+            'erreur': tache.erreur,
+        }
+
+    def resultat(self, identifiant):
+        """Résultat assemblé d'une tâche terminée, remis une seule fois : la tâche est ensuite oubliée
+
+        Lève l'exception d'un morceau qui a échoué.
+        """
+        with self._verrou:
+            tache = self._taches.pop(identifiant)
+        # Assemblage hors du verrou : il peut être long (concaténation des morceaux)
+        return tache.assembler([morceau.result() for morceau in tache.morceaux])
+
+    def annuler(self, identifiant):
+        """Retire les morceaux pas encore commencés ; ceux en cours vont à leur terme"""
+        with self._verrou:
+            tache = self._taches.get(identifiant)
+            if tache is not None:
+                self._annuler_tache(tache)
+
+    def annuler_hors_etape(self, session, etape):
+        """Annule les tâches de la session lancées depuis une autre étape (et retire les tâches périmées)"""
+        with self._verrou:
+            for tache in self._taches.values():
+                if tache.session == session and tache.etape != etape:
+                    self._annuler_tache(tache)
+            self._nettoyer()
+
+    def oublier(self, identifiant):
+        with self._verrou:
+            tache = self._taches.pop(identifiant, None)
+            if tache is not None:
+                self._annuler_tache(tache)
+
+
+# Travaux exécutés dans les processus de la file
+
+def corriger_morceau(copies, tolerance_absolue, tolerance_relative):
+    from banque_exercices import reponses_lot
+    from correction import corriger
+    return corriger(copies, reponses_lot(copies['exercice']),
+                    tolerance_absolue=tolerance_absolue, tolerance_relative=tolerance_relative)
+
+
+def soumettre_correction(file, session, etape, copies, tolerance_absolue, tolerance_relative):
+    """Correction par lot, un morceau de TAILLE_MORCEAU_COPIES copies à la fois"""
+    morceaux = [copies.iloc[debut:debut + TAILLE_MORCEAU_COPIES]
+                for debut in range(0, len(copies), TAILLE_MORCEAU_COPIES)]
+    return file.soumettre(session, etape, "Correction des copies",
+                          functools.partial(corriger_morceau, tolerance_absolue=tolerance_absolue,
+                                            tolerance_relative=tolerance_relative),
+                          morceaux, assembler=functools.partial(pd.concat, ignore_index=True))
+
+
+def analyser_multi_environnements(contenu):
+    """Lecture d'un CSV (octets) et ANOVA combinée ; retourne (résultats, dimensions, niveaux)"""
+    from multi_environnements import anova_combinee, tableau_4d
+    valeurs, niveaux = tableau_4d(pd.read_csv(io.BytesIO(contenu)))
+    return anova_combinee(valeurs), valeurs.shape, niveaux
@@ -0,0 +1,34 @@
+import logging
+from types import SimpleNamespace
+
+import affichage
+
+# La mesure des octets envoyés remplace un attribut privé de Streamlit : hors des
+# versions vérifiées, ou sans cet attribut, elle doit se désactiver sans rien
+# modifier et le journaliser.
+
+
+def contexte():
+    return SimpleNamespace(_enqueue=lambda message: None, cursors={})
+
+
+def test_version_non_verifiee(monkeypatch, caplog):
+    ctx = contexte()
+    envoyer = ctx._enqueue
+    monkeypatch.setattr(affichage, 'get_script_run_ctx', lambda: ctx)
+    monkeypatch.setattr(affichage.st, '__version__', '9.0.0')
+    affichage._mesure_desactivee.cache_clear()
+    with caplog.at_level(logging.WARNING, logger=affichage.__name__):
+        assert affichage.mesurer_envois() is None
+    assert ctx._enqueue is envoyer
+    assert "Streamlit 9.0.0" in caplog.text
+
+
+def test_attribut_absent(monkeypatch, caplog):
+    ctx = SimpleNamespace(cursors={})
+    monkeypatch.setattr(affichage, 'get_script_run_ctx', lambda: ctx)
+    monkeypatch.setattr(affichage, '_version_streamlit', lambda: affichage.VERSIONS_MESURE[1])
+    affichage._mesure_desactivee.cache_clear()
+    with caplog.at_level(logging.WARNING, logger=affichage.__name__):
+        assert affichage.mesurer_envois() is None
+    assert "_enqueue absent" in caplog.text
@@ -0,0 +1,86 @@
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from anova import anova_brc, anova_carre_latin, anova_factoriel_brc, anova_split_plot
+
+# Le mode float32 de anova_brc doit redonner le tableau d'ANOVA du calcul float64
+# sur des données mal conditionnées : grande moyenne, effets de traitement
+# dominants et petite erreur. Les deux calculs partent des mêmes valeurs float32,
+# l'écart mesure donc l'arithmétique seule.
+
+CLES = ('sc_total', 'sc_traitements', 'sc_blocs', 'sc_erreur', 'cm_traitements', 'cm_blocs', 'cm_erreur',
+        'f_traitements', 'f_blocs')
+# Près de 5000, l'écart entre deux float32 voisins vaut 5e-4 : une erreur
+# d'écart-type 0,1 n'en couvre que quelques centaines, d'où 1e-4 à 2e-4 d'écart
+# relatif sur la SC de l'erreur dans les cas les plus durs
+TOLERANCE = 5e-4
+
+
+def essais(nb_essais, nb_blocs, nb_traitements, moyenne, sd_traitements, sd_blocs, sd_erreur, graine=0):
+    rng = np.random.default_rng(graine)
+    return (moyenne
+            + rng.normal(0, sd_traitements, (nb_essais, 1, nb_traitements))
+            + rng.normal(0, sd_blocs, (nb_essais, nb_blocs, 1))
+            + rng.normal(0, sd_erreur, (nb_essais, nb_blocs, nb_traitements))).astype(np.float32)
+
+
+@pytest.mark.parametrize('moyenne, sd_traitements, sd_blocs, sd_erreur', [
+    (5000, 200, 20, 0.1),
+    (5000, 50, 20, 0.5),
+    (1e5, 1000, 100, 1.0),
+    (10, 2, 1, 0.5),
+])
+@pytest.mark.parametrize('nb_blocs, nb_traitements', [(4, 6), (3, 12), (10, 3)])
+def test_float32_egale_float64(moyenne, sd_traitements, sd_blocs, sd_erreur, nb_blocs, nb_traitements):
+    y = essais(2000, nb_blocs, nb_traitements, moyenne, sd_traitements, sd_blocs, sd_erreur)
+    reduit = anova_brc(y, dtype=np.float32)
+    reference = anova_brc(y.astype(np.float64))
+    for cle in CLES:
+        np.testing.assert_allclose(reduit[cle], reference[cle], rtol=TOLERANCE, err_msg=cle)
+
+
+def test_float32_un_essai():
+    y = essais(1, 4, 5, 5000, 200, 20, 0.1)[0]
+    reduit = anova_brc(y, dtype=np.float32)
+    reference = anova_brc(y.astype(np.float64))
+    assert reduit['ddl_erreur'] == reference['ddl_erreur'] == 12
+    for cle in CLES:
+        np.testing.assert_allclose(reduit[cle], reference[cle], rtol=TOLERANCE, err_msg=cle)
+
+
+def test_sc_additives():
+    # Sur des données bien conditionnées, SC totale = somme des SC des sources
+    rng = np.random.default_rng(1)
+    y = rng.normal(10, 2, (50, 4, 6))
+    resultats = anova_brc(y)
+    np.testing.assert_allclose(resultats['sc_total'],
+                               resultats['sc_traitements'] + resultats['sc_blocs'] + resultats['sc_erreur'])
+
+    resultats = anova_factoriel_brc(y.reshape(50, 4, 2, 3))
+    np.testing.assert_allclose(resultats['sc_total'],
+                               resultats['sc_traitements'] + resultats['sc_blocs'] + resultats['sc_erreur'])
+    np.testing.assert_allclose(resultats['sc_traitements'], resultats['sc_a'] + resultats['sc_b'] + resultats['sc_ab'])
+
+    resultats = anova_split_plot(y.reshape(50, 4, 2, 3))
+    np.testing.assert_allclose(resultats['sc_total'], sum(resultats[f'sc_{source}'] for source in (
+        'blocs', 'a', 'erreur_a', 'b', 'ab', 'erreur_b')))
+
+    plan = (np.arange(5)[:, None] + np.arange(5)) % 5
+    resultats = anova_carre_latin(rng.normal(10, 2, (50, 5, 5)), plan)
+    np.testing.assert_allclose(resultats['sc_total'], sum(resultats[f'sc_{source}'] for source in (
+        'lignes', 'colonnes', 'traitements', 'erreur')))
+
+
+def test_float32_memoire_bornee():
+    # Au-delà des valeurs, seuls les résultats (9 grandeurs par essai) et les
+    # temporaires d'une tranche sont alloués : moins que les valeurs elles-mêmes
+    y = essais(100_000, 4, 5, 5000, 50, 20, 1.0)
+    tracemalloc.start()
+    try:
+        anova_brc(y, dtype=np.float32)
+        _, pic = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert pic < y.nbytes
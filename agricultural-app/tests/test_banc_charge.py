@@ -0,0 +1,28 @@
+import pytest
+
+from banc_charge import _Session, parcours_etudiant
+from etat import ETAPES
+
+# Un étudiant simulé parcourt les 8 étapes comme dans le banc de charge : un
+# changement d'interface qui casse le parcours (widget renommé ou supprimé)
+# fait échouer ce test plutôt que le banc.
+
+
+@pytest.mark.parametrize('graine', [0, 1], ids=['banque', 'saisie'])
+def test_parcours_complet(graine):
+    mesures, _, _, ignorees = parcours_etudiant(graine)
+    actions = [mesure['action'] for mesure in mesures]
+    assert [action for action in actions if action.startswith('étape')] == \
+        [f"étape {numero}" for numero in range(1, len(ETAPES) + 1)]
+    assert ignorees == []
+    assert all(mesure['latence'] >= 0 for mesure in mesures)
+
+
+def test_widget_introuvable_ignore():
+    session = _Session()
+    session.executer("ouverture")
+    session.bouton("bouton absent", "Aucun bouton ne porte ce libellé")
+    session.saisir("champ absent", 1, cle="cle_inexistante")
+    session.choisir("choix absent", "x", "Aucun choix")
+    assert session.ignorees == ["bouton absent", "champ absent", "choix absent"]
+    assert [mesure['action'] for mesure in session.mesures] == ["ouverture"]
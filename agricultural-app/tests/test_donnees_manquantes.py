@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from donnees_manquantes import (_iterations_yates, anova_moindres_carres, anova_parcelles_manquantes,
+                                estimer_parcelles_manquantes, residus_moindres_carres)
+
+# Les estimations de Yates sont les valeurs qui annulent le résidu du modèle
+# additif blocs + traitements aux parcelles perdues ; l'itération doit s'arrêter
+# dès qu'elles ne bougent plus, bien avant iterations_max.
+
+ITERATIONS_MAX = 100
+
+
+def essai_deux_manquantes(graine=0):
+    rng = np.random.default_rng(graine)
+    y = 50 + rng.normal(0, 5, (1, 5)) + rng.normal(0, 3, (4, 1)) + rng.normal(0, 1, (4, 5))
+    y[0, 1] = y[2, 3] = np.nan
+    return y
+
+
+def test_convergence_avant_iterations_max():
+    y = essai_deux_manquantes()
+    manquantes = np.isnan(y)
+    y[manquantes] = np.nanmean(y)
+    iterations = _iterations_yates(y, np.argwhere(manquantes), ITERATIONS_MAX, 1e-10)
+    assert iterations < ITERATIONS_MAX // 4
+
+
+def test_residus_nuls_aux_parcelles_estimees():
+    valeurs = essai_deux_manquantes()
+    complet = estimer_parcelles_manquantes(valeurs)
+    residus = (complet - complet.mean(axis=1, keepdims=True) - complet.mean(axis=0, keepdims=True)
+               + complet.mean())
+    np.testing.assert_allclose(residus[np.isnan(valeurs)], 0, atol=1e-8)
+    np.testing.assert_array_equal(complet[~np.isnan(valeurs)], valeurs[~np.isnan(valeurs)])
+
+
+def test_sc_erreur_egale_moindres_carres():
+    valeurs = essai_deux_manquantes()
+    blocs, traitements = np.indices(valeurs.shape)
+    moindres_carres = anova_moindres_carres(blocs.ravel(), traitements.ravel(), valeurs.ravel())
+    assert anova_parcelles_manquantes(valeurs)['sc_erreur'] == \
+        pytest.approx(moindres_carres['type_I']['sc_erreur'], rel=1e-9)
+
+
+def test_residus_et_leviers_moindres_carres():
+    valeurs = essai_deux_manquantes()
+    valeurs[3, 3] = np.nan
+    blocs, traitements = (codes.ravel() for codes in np.indices(valeurs.shape))
+    y = valeurs.ravel()
+    residus, leviers = residus_moindres_carres(blocs, traitements, y)
+
+    observees = ~np.isnan(y)
+    x = np.column_stack([np.eye(4)[blocs[observees]], np.eye(5)[traitements[observees]][:, 1:]])
+    chapeau = x @ np.linalg.pinv(x)
+    np.testing.assert_allclose(leviers[observees], np.diag(chapeau), atol=1e-12)
+    np.testing.assert_allclose(residus[observees], y[observees] - chapeau @ y[observees], atol=1e-10)
+    assert np.isnan(residus[~observees]).all()
@@ -0,0 +1,59 @@
+import os
+import pickle
+
+import numpy as np
+import pytest
+
+from historique import HistoriqueSaisie
+from instantanes import FORMAT, MAGIQUE, decoder, encoder
+from matrice import MatriceEssai
+
+# Un instantané est relu sans pickle : les champs reviennent à l'identique (la
+# matrice en lecture seule), et un bloc forgé dans le magasin n'exécute rien.
+
+
+def champs_session():
+    matrice = MatriceEssai(np.arange(12.0).reshape(3, 4), blocs=('B1', 'B2', 'B3'))
+    historique = HistoriqueSaisie(matrice.valeurs)
+    valeurs = matrice.valeurs.copy()
+    valeurs[0, 1] = np.nan
+    historique.enregistrer(valeurs)
+    historique.memoriser_resultats({'sc_total': np.float64(12.5), 'factoriel': {'ddl_a': np.int64(2)}})
+    return {'etape': 'etapes/etape_2_saisie.py', 'matrice': matrice, 'historique': historique,
+            'nb_blocs': 3, 'facteurs': (2, 2), 'f_blocs': np.float64(1.25), 'ddl_calculated': True,
+            'sous_echantillons': {'moyennes_parcelles': np.ones((3, 4)), 'cm_erreur': 0.5}}
+
+
+def test_aller_retour():
+    champs = decoder(encoder(champs_session()))
+    matrice = champs['matrice']
+    np.testing.assert_array_equal(matrice.valeurs, np.arange(12.0).reshape(3, 4))
+    assert matrice.blocs == ('B1', 'B2', 'B3')
+    assert not matrice.valeurs.flags.writeable and not matrice.rangs.flags.writeable
+    historique = champs['historique']
+    assert historique.resultats_version() == {'sc_total': 12.5, 'factoriel': {'ddl_a': 2}}
+    historique.annuler()
+    assert historique.valeurs[0, 1] == 1.0
+    assert champs['facteurs'] == (2, 2) and champs['f_blocs'] == 1.25
+    np.testing.assert_array_equal(champs['sous_echantillons']['moyennes_parcelles'], np.ones((3, 4)))
+
+
+def test_valeur_non_prevue_refusee():
+    with pytest.raises(TypeError):
+        encoder({'etape': object()})
+
+
+def test_pickle_forge_non_execute(tmp_path):
+    temoin = tmp_path / 'execute'
+    charge = pickle.dumps(_Piege(str(temoin)))
+    with pytest.raises(ValueError):
+        decoder(MAGIQUE + bytes([FORMAT]) + charge)
+    assert not temoin.exists()
+
+
+class _Piege:
+    def __init__(self, chemin):
+        self.chemin = chemin
+
+    def __reduce__(self):
+        return os.mkdir, (self.chemin,)
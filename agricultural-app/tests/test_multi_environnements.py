@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from multi_environnements import COLONNES, anova_combinee, composantes_variance, tableau_4d
+
+# Avec une seule année (ou un seul site), les strates de l'année n'existent pas :
+# les composantes des sites et de l'interaction traitements × sites doivent être
+# estimées contre les blocs et l'erreur, pas ramenées à zéro.
+
+
+def essai(S, A, B=3, T=5, graine=0):
+    rng = np.random.default_rng(graine)
+    return (10 + rng.normal(0, 3, (S, A, 1, 1)) + rng.normal(0, 1, (S, A, B, 1))
+            + rng.normal(0, 2, (1, 1, 1, T)) + rng.normal(0, 1.5, (S, A, 1, T)) + rng.normal(0, 0.5, (S, A, B, T)))
+
+
+def test_une_seule_annee():
+    y = essai(4, 1)
+    r = anova_combinee(y)
+    composantes = composantes_variance(r, y.shape)
+    assert set(composantes) == {'erreur', 'blocs', 'sites', 'trait_sites'}
+    assert composantes['sites'] == pytest.approx((r['cm_sites'] - r['cm_blocs']) / (3 * 5))
+    assert composantes['trait_sites'] == pytest.approx((r['cm_trait_sites'] - r['cm_erreur']) / 3)
+    assert composantes['sites'] > 0 and composantes['trait_sites'] > 0
+
+
+def test_un_seul_site_symetrique():
+    y = essai(4, 1)
+    sites = composantes_variance(anova_combinee(y), y.shape)
+    y = np.swapaxes(y, 0, 1)
+    annees = composantes_variance(anova_combinee(y), y.shape)
+    assert annees['annees'] == pytest.approx(sites['sites'])
+    assert annees['trait_annees'] == pytest.approx(sites['trait_sites'])
+
+
+def test_toutes_les_strates():
+    y = essai(3, 2)
+    assert len(composantes_variance(anova_combinee(y), y.shape)) == 8
+
+
+def test_ligne_en_double_refusee():
+    indices = np.indices((2, 2, 2, 3)).reshape(4, -1)
+    donnees = pd.DataFrame(dict(zip(COLONNES, [*indices, np.ones(indices.shape[1])])))
+    tableau_4d(donnees)
+    with pytest.raises(ValueError, match="une seule fois"):
+        tableau_4d(pd.concat([donnees, donnees.iloc[:1]]))
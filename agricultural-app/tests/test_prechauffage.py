@@ -0,0 +1,26 @@
+from anova import ddl_brc
+from distribution_f import donnees_explorateur, f_critique, grille_densite, p_valeur
+from prechauffage import _tables_f
+
+# Le préchauffage doit remplir les caches sous les clés que l'étape 7 demande
+# ensuite : après lui, l'explorateur ne recalcule aucune densité pour un F
+# calculé sous le quantile à 1 %, et une réexécution ne rappelle pas SciPy.
+
+
+def test_grilles_prechauffees_reutilisees():
+    _tables_f()
+    ddl = ddl_brc(4, 3)
+    ddl2 = ddl['ddl_erreur']
+    effets = (("Traitements", ddl['ddl_traitements'], ddl2, 0.5 * f_critique(0.05, ddl['ddl_traitements'], ddl2)),
+              ("Blocs", ddl['ddl_blocs'], ddl2, 1.0))
+    manques = grille_densite.cache_info().misses
+    donnees_explorateur(effets)
+    assert grille_densite.cache_info().misses == manques
+
+
+def test_reexecution_sans_recalcul():
+    effets = (("Traitements", 5, 20, 42.0),)
+    donnees_explorateur(effets)
+    manques = grille_densite.cache_info().misses, p_valeur.cache_info().misses
+    donnees_explorateur(effets)
+    assert (grille_densite.cache_info().misses, p_valeur.cache_info().misses) == manques
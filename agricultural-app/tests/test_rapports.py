@@ -0,0 +1,42 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from rapports import essais_depuis_csv, generer_rapports, nom_fichier
+
+# Les noms d'essais viennent d'un CSV déposé par l'utilisateur : les rapports
+# restent dans le dossier de sortie, et les traitements gardent l'ordre de
+# leurs libellés (T2 avant T10) pour que les barres T1..Tn soient les bonnes.
+
+
+@pytest.mark.parametrize('nom, attendu', [
+    ('../x', 'x'), ('/etc/passwd', 'etc_passwd'), ('..', 'essai'), ('Essai 1 (été)', 'Essai_1_t'), (42, '42'),
+])
+def test_nom_fichier(nom, attendu):
+    assert nom_fichier(nom) == attendu
+
+
+def test_rapports_dans_le_dossier_de_sortie(tmp_path):
+    sortie = tmp_path / 'sortie'
+    valeurs = np.arange(12.0).reshape(3, 4) + np.random.default_rng(0).normal(size=(3, 4))
+    chemins = generer_rapports({'../../evasion': valeurs}, str(sortie), formats=('html',), nb_processus=1,
+                               dossier_cache=str(tmp_path / 'cache'))
+    assert [os.path.dirname(os.path.realpath(chemin)) for chemin in chemins] == [os.path.realpath(sortie)]
+    assert not (tmp_path / 'evasion.html').exists()
+
+
+def test_noms_de_fichier_en_double_refuses(tmp_path):
+    valeurs = np.ones((3, 3))
+    with pytest.raises(ValueError, match="même nom"):
+        generer_rapports({'a b': valeurs, 'a_b': valeurs}, str(tmp_path), formats=('html',), nb_processus=1)
+
+
+def test_ordre_naturel_des_traitements(tmp_path):
+    traitements = [f'T{i}' for i in range(1, 12)]
+    donnees = pd.DataFrame([{'Essai': 'E', 'Bloc': f'B{b}', 'Traitement': t, 'Valeur': 10 * b + i}
+                            for b in range(1, 4) for i, t in enumerate(traitements, start=1)])
+    donnees.to_csv(tmp_path / 'essais.csv', index=False)
+    valeurs = essais_depuis_csv(tmp_path / 'essais.csv')['E']
+    np.testing.assert_array_equal(valeurs[0], np.arange(11, 22))
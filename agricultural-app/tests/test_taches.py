@@ -0,0 +1,56 @@
+import sys
+import threading
+import time
+import types
+
+from taches import FileTaches
+
+# La file est partagée par les fils d'exécution de toutes les sessions : des
+# soumissions, relevés, annulations et nettoyages simultanés ne doivent ni
+# lever d'erreur ni perdre de tâche.
+
+NB_SESSIONS = 8
+NB_TOURS = 50
+
+
+def test_acces_concurrents(monkeypatch):
+    # AppTest (test_banc_charge) remplace __main__ par le script de l'application :
+    # les processus 'spawn' de la file le réexécuteraient au démarrage
+    monkeypatch.setitem(sys.modules, '__main__', types.ModuleType('__main__'))
+    file = FileTaches(nb_processus=2, max_par_session=NB_TOURS, duree_max=0.05)
+    erreurs = []
+
+    def session(numero):
+        try:
+            identifiants = []
+            for tour in range(NB_TOURS):
+                identifiants.append(file.soumettre(numero, f'etape {tour % 3}', 'abs', abs, [-tour]))
+                file.etat(identifiants[0])
+                file.annuler_hors_etape(numero, f'etape {tour % 3}')
+                if tour % 5 == 0:
+                    file.oublier(identifiants.pop(0))
+            for identifiant in identifiants:
+                etat = file.etat(identifiant)
+                if etat is not None and etat['terminee'] and not etat['annulee']:
+                    try:
+                        file.resultat(identifiant)
+                    except KeyError:
+                        # Retirée entre-temps par le nettoyage d'une autre session
+                        pass
+        except Exception as erreur:
+            erreurs.append(erreur)
+
+    fils = [threading.Thread(target=session, args=(numero,)) for numero in range(NB_SESSIONS)]
+    try:
+        for fil in fils:
+            fil.start()
+        for fil in fils:
+            fil.join()
+        assert erreurs == []
+
+        # Toutes les tâches restantes finissent par expirer
+        time.sleep(0.1)
+        file.annuler_hors_etape(None, None)
+        assert file._taches == {}
+    finally:
+        file._executeur.shutdown(wait=True)
@@ -0,0 +1,63 @@
+import numpy as np
+
+from validation import DDL_ERREUR_MIN, messages_validation, valider_colonnes
+
+# Valeurs suspectes : sur une grille incomplète, les résidus studentisés sont
+# ceux de l'ajustement par moindres carrés ; une grille trop petite n'est pas
+# examinée, et le message le dit.
+
+
+def grille(nb_blocs, nb_traitements, graine=0):
+    rng = np.random.default_rng(graine)
+    return (50 + rng.normal(0, 5, (1, nb_traitements)) + rng.normal(0, 3, (nb_blocs, 1))
+            + rng.normal(0, 2, (nb_blocs, nb_traitements)))
+
+
+def controler(y, **options):
+    blocs, traitements = np.indices(y.shape)
+    return valider_colonnes(blocs.ravel(), traitements.ravel(), y.ravel(), **options)
+
+
+def test_faute_reperee_grille_incomplete():
+    reperees = 0
+    for graine in range(50):
+        y = grille(4, 5, graine)
+        y[0, 1] = y[2, 4] = np.nan
+        y[3, 2] += 20
+        resultats = controler(y)
+        assert resultats['aberrants_recherches']
+        reperees += resultats['aberrant'].reshape(4, 5)[3, 2]
+        assert resultats['aberrant'].sum() <= 1 + resultats['aberrant'].reshape(4, 5)[3, 2]
+    assert reperees >= 45
+
+
+def test_studentises_moindres_carres():
+    # Référence : matrice chapeau de l'ajustement blocs + traitements sur les parcelles observées
+    y = grille(4, 5)
+    y[0, 1] = y[2, 4] = np.nan
+    blocs, traitements = (codes.ravel() for codes in np.indices(y.shape))
+    observees = ~np.isnan(y.ravel())
+    x = np.column_stack([np.eye(4)[blocs[observees]], np.eye(5)[traitements[observees]][:, 1:]])
+    chapeau = x @ np.linalg.pinv(x)
+    residus = y.ravel()[observees] - chapeau @ y.ravel()[observees]
+    ddl = observees.sum() - 4 - 5 + 1
+    internes = residus / np.sqrt((residus ** 2).sum() / ddl * (1 - np.diag(chapeau)))
+    externes = internes * np.sqrt((ddl - 1) / (ddl - internes ** 2))
+    np.testing.assert_allclose(controler(y)['residu_studentise'][observees], externes, rtol=1e-9)
+
+
+def test_grille_trop_petite():
+    for forme in ((2, 3), (2, 2), (2, 10), (3, 3)):
+        resultats = controler(grille(*forme))
+        assert not resultats['aberrants_recherches']
+        assert not resultats['aberrant'].any()
+        niveaux = [niveau for niveau, _ in messages_validation(resultats)]
+        assert niveaux == ['info']
+
+
+def test_grille_complete_suffisante():
+    y = grille(3, 4)
+    resultats = controler(y)
+    assert resultats['aberrants_recherches']
+    assert (3 - 1) * (4 - 1) >= DDL_ERREUR_MIN
+    assert np.isfinite(resultats['residu_studentise']).all()
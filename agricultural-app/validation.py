@@ -0,0 +1,152 @@
+import sys
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from donnees_manquantes import residus_moindres_carres
+
+# Contrôles des données à la saisie ou au chargement : valeurs hors bornes,
+# doublons (plusieurs valeurs pour une même parcelle), parcelles manquantes et
+# valeurs aberrantes repérées par les résidus studentisés du modèle additif
+# blocs + traitements (celui de l'étape 4 par moindres carrés quand des
+# parcelles manquent). Tout se fait sur les codes entiers des blocs et des
+# traitements avec des np.bincount, sans groupby : un fichier d'un million de
+# parcelles se contrôle en quelques secondes.
+
+# Seuil des résidus studentisés : test de Bonferroni au risque ALPHA_ABERRANTS
+# sur l'ensemble des parcelles, sans descendre sous SEUIL_STUDENTISE_MIN (sans
+# correction, 0,3 % des valeurs d'un gros fichier dépasseraient 3 par hasard)
+ALPHA_ABERRANTS = 0.05
+SEUIL_STUDENTISE_MIN = 3.0
+# Taille minimale de la grille pour rechercher des valeurs aberrantes. Avec deux
+# blocs (ou deux traitements), les deux résidus d'un traitement sont opposés :
+# impossible de savoir laquelle des deux valeurs est fausse. En dessous de 6 DDL
+# d'erreur, une faute de 5 écarts-types passe inaperçue plus d'une fois sur deux.
+NB_NIVEAUX_MIN = 3
+DDL_ERREUR_MIN = 6
+
+
+def valider_colonnes(blocs, traitements, valeurs, borne_min=None, borne_max=None, seuil=None):
+    """Contrôles sur des colonnes de codes (0..b-1, 0..t-1) et de valeurs
+
+    Retourne un dictionnaire de tableaux par ligne ('hors_bornes', 'doublon',
+    'residu_studentise', 'aberrant'), les comptes ('nb_...') et le seuil utilisé.
+    Sur une grille trop petite (NB_NIVEAUX_MIN, DDL_ERREUR_MIN), la recherche
+    des valeurs aberrantes n'a pas lieu : 'aberrants_recherches' vaut False et
+    les résidus studentisés sont NaN.
+    """
+    blocs = np.asarray(blocs, dtype=np.int64)
+    traitements = np.asarray(traitements, dtype=np.int64)
+    y = np.asarray(valeurs, dtype=float)
+    nb_blocs, nb_trait = blocs.max() + 1, traitements.max() + 1
+    nb_cellules = nb_blocs * nb_trait
+    cellules = blocs * nb_trait + traitements
+    presentes = ~np.isnan(y)
+
+    hors_bornes = np.zeros(len(y), dtype=bool)
+    if borne_min is not None:
+        hors_bornes |= y < borne_min
+    if borne_max is not None:
+        hors_bornes |= y > borne_max
+
+    effectifs = np.bincount(cellules[presentes], minlength=nb_cellules)
+    doublon = effectifs[cellules] > 1
+    nb_manquantes = int((effectifs == 0).sum())
+
+    # DDL de l'erreur de l'ajustement sur les parcelles observées (un bloc ou un
+    # traitement entièrement perdu sort du modèle)
+    observees = effectifs.reshape(nb_blocs, nb_trait) > 0
+    ddl_erreur = int(observees.sum() - observees.any(axis=1).sum() - observees.any(axis=0).sum() + 1)
+    recherches = min(nb_blocs, nb_trait) >= NB_NIVEAUX_MIN and ddl_erreur >= DDL_ERREUR_MIN
+    if not recherches:
+        studentises = np.full(len(y), np.nan)
+        aberrant = np.zeros(len(y), dtype=bool)
+        seuil = np.nan if seuil is None else seuil
+    else:
+        # Moyennes par parcelle (les doublons sont moyennés), puis résidus du
+        # modèle additif sur les parcelles observées
+        with np.errstate(invalid='ignore', divide='ignore'):
+            moy_cellules = np.bincount(cellules[presentes], weights=y[presentes], minlength=nb_cellules) / effectifs
+        if nb_manquantes:
+            # Grille incomplète : résidus et leviers de l'ajustement par moindres carrés
+            residus_cellules, leviers_cellules = residus_moindres_carres(
+                np.repeat(np.arange(nb_blocs), nb_trait), np.tile(np.arange(nb_trait), nb_blocs), moy_cellules)
+            ajustees = moy_cellules - residus_cellules
+            variance = np.nansum(residus_cellules ** 2) / ddl_erreur
+            leviers = leviers_cellules[cellules]
+        else:
+            # Grille complète : effets marginaux, levier 1/b + 1/t - 1/(bt)
+            grille = moy_cellules.reshape(nb_blocs, nb_trait)
+            moyenne = grille.mean()
+            ajustees = (grille.mean(axis=1, keepdims=True) + grille.mean(axis=0, keepdims=True) - moyenne).ravel()
+            variance = ((moy_cellules - ajustees) ** 2).sum() / ddl_erreur
+            leviers = np.full(len(y), 1 / nb_blocs + 1 / nb_trait - 1 / nb_cellules)
+        residus = y - ajustees[cellules]
+
+        # Résidus studentisés externes
+        with np.errstate(invalid='ignore', divide='ignore'):
+            internes = residus / np.sqrt(variance * (1 - leviers))
+            studentises = internes * np.sqrt((ddl_erreur - 1) / np.maximum(ddl_erreur - internes ** 2, 1e-12))
+
+        if seuil is None:
+            seuil = max(SEUIL_STUDENTISE_MIN,
+                        stats.t.ppf(1 - ALPHA_ABERRANTS / (2 * presentes.sum()), ddl_erreur - 1))
+        aberrant = np.abs(studentises) > seuil
+    return {
+        'hors_bornes': hors_bornes,
+        'doublon': doublon,
+        'residu_studentise': studentises,
+        'aberrant': aberrant,
+        'aberrants_recherches': recherches,
+        'nb_hors_bornes': int(hors_bornes.sum()),
+        'nb_doublons': int((effectifs > 1).sum()),
+        'nb_manquantes': nb_manquantes,
+        'nb_aberrants': int(aberrant.sum()),
+        'seuil': float(seuil),
+    }
+
+
+def valider(donnees, borne_min=None, borne_max=None, seuil=None):
+    """Contrôles d'un tableau long (Bloc, Traitement, Valeur) ; retourne (drapeaux, comptes)"""
+    codes_blocs, _ = pd.factorize(donnees['Bloc'], sort=True)
+    codes_trait, _ = pd.factorize(donnees['Traitement'], sort=True)
+    resultats = valider_colonnes(codes_blocs, codes_trait, donnees['Valeur'].to_numpy(dtype=float),
+                                 borne_min, borne_max, seuil)
+    drapeaux = pd.DataFrame({nom: resultats[nom] for nom in
+                             ('hors_bornes', 'doublon', 'residu_studentise', 'aberrant')},
+                            index=donnees.index)
+    comptes = {nom: valeur for nom, valeur in resultats.items()
+               if nom.startswith('nb_') or nom in ('seuil', 'aberrants_recherches')}
+    return drapeaux, comptes
+
+
+def messages_validation(comptes):
+    """Messages (niveau, texte) à afficher sous le tableau de saisie"""
+    sortie = []
+    if comptes['nb_hors_bornes']:
+        sortie.append(('error', f"❌ {comptes['nb_hors_bornes']} valeur(s) hors des bornes plausibles"))
+    if comptes['nb_doublons']:
+        sortie.append(('error', f"❌ {comptes['nb_doublons']} parcelle(s) avec plusieurs valeurs"))
+    if comptes['nb_manquantes']:
+        sortie.append(('warning', f"⚠️ {comptes['nb_manquantes']} parcelle(s) sans valeur"))
+    if not comptes['aberrants_recherches']:
+        sortie.append(('info', f"ℹ️ Grille trop petite pour repérer les valeurs suspectes (au moins "
+                               f"{NB_NIVEAUX_MIN} blocs, {NB_NIVEAUX_MIN} traitements et {DDL_ERREUR_MIN} DDL "
+                               f"d'erreur) : vérifiez la saisie à l'œil"))
+    if comptes['nb_aberrants']:
+        sortie.append(('warning', f"⚠️ {comptes['nb_aberrants']} valeur(s) suspecte(s) "
+                                  f"(résidu studentisé > {comptes['seuil']:.2f}) : vérifiez une erreur de saisie"))
+    if not sortie:
+        sortie.append(('success', "✅ Aucune anomalie détectée dans les données"))
+    return sortie
+
+
+if __name__ == '__main__':
+    donnees = pd.read_csv(sys.argv[1], usecols=['Bloc', 'Traitement', 'Valeur'])
+    drapeaux, comptes = valider(donnees)
+    for _, texte in messages_validation(comptes):
+        print(texte)
+    suspects = donnees[drapeaux['aberrant'] | drapeaux['hors_bornes'] | drapeaux['doublon']]
+    if len(suspects):
+        print(suspects.assign(residu_studentise=drapeaux['residu_studentise']).head(50).to_string())